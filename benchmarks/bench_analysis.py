@@ -0,0 +1,120 @@
+# bench_analysis.py
+# Estadísticas ampliadas: VectorAnalyzer (NumPy) frente a consultas SQL equivalentes
+# sobre una tabla sintética. Uso: python benchmarks/bench_analysis.py [--rows N]
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from vector_analysis import VectorAnalyzer, PERCENTILES, ROLLING_WINDOW
+
+START_EPOCH = 1704067200  # 2024-01-01
+SPAN_SECONDS = 365 * 86400
+USERS = 10000
+INSERT_CHUNK = 100000
+
+class Database:
+    # Misma interfaz que SQLiteDatabase para VectorAnalyzer (atributo connection)
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+
+def build_table(path, rows, seed):
+    db = Database(path)
+    connection = db.connection
+    connection.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE usuarios (usuario_id TEXT PRIMARY KEY, seguidores INTEGER);
+        CREATE TABLE tweets (tweet_id TEXT PRIMARY KEY, usuario_id TEXT, fecha_epoch INTEGER,
+                             retweets INTEGER, likes INTEGER, sentimiento REAL);
+        CREATE INDEX idx_tweets_fecha_epoch ON tweets(fecha_epoch);
+    """)
+    rng = np.random.default_rng(seed)
+    followers = rng.lognormal(6, 2, USERS).astype(np.int64)
+    connection.executemany("INSERT INTO usuarios VALUES (?, ?)",
+                           ((str(i), int(followers[i])) for i in range(USERS)))
+    for start in range(0, rows, INSERT_CHUNK):
+        size = min(INSERT_CHUNK, rows - start)
+        users = rng.integers(0, USERS, size)
+        epochs = START_EPOCH + rng.integers(0, SPAN_SECONDS, size)
+        retweets = rng.poisson(3, size)
+        likes = rng.poisson(12, size)
+        sentiment = np.clip(rng.normal(0.05, 0.3, size), -1, 1)
+        connection.executemany("INSERT INTO tweets VALUES (?, ?, ?, ?, ?, ?)", zip(
+            map(str, range(start, start + size)), map(str, users.tolist()), epochs.tolist(),
+            retweets.tolist(), likes.tolist(), sentiment.tolist()
+        ))
+    connection.commit()
+    return db
+
+def sql_statistics(connection):
+    # Implementación equivalente sólo con SQL: una consulta por estadística
+    stats = {}
+    scored = connection.execute("SELECT COUNT(*) FROM tweets WHERE sentimiento IS NOT NULL").fetchone()[0]
+    stats['sentiment_percentiles'] = {
+        p: connection.execute(
+            "SELECT sentimiento FROM tweets WHERE sentimiento IS NOT NULL ORDER BY sentimiento LIMIT 1 OFFSET ?",
+            (min(scored - 1, int(p / 100 * (scored - 1))),)
+        ).fetchone()[0] for p in PERCENTILES
+    }
+    engagement = """
+        SELECT (t.likes + t.retweets) * 1.0 / u.seguidores AS tasa
+        FROM tweets t JOIN usuarios u ON u.usuario_id = t.usuario_id WHERE u.seguidores > 0
+    """
+    count, mean = connection.execute(f"SELECT COUNT(*), AVG(tasa) FROM ({engagement})").fetchone()
+    stats['engagement_mean'] = mean
+    stats['engagement_median'] = connection.execute(
+        f"SELECT tasa FROM ({engagement}) ORDER BY tasa LIMIT 1 OFFSET ?", (count // 2,)
+    ).fetchone()[0]
+    stats['heatmap'] = connection.execute("""
+        SELECT (fecha_epoch / 86400 + 3) % 7, (fecha_epoch / 3600) % 24, COUNT(*)
+        FROM tweets WHERE fecha_epoch IS NOT NULL GROUP BY 1, 2
+    """).fetchall()
+    stats['rolling'] = connection.execute(f"""
+        SELECT dia,
+               AVG(tweets) OVER (ORDER BY dia ROWS {ROLLING_WINDOW - 1} PRECEDING),
+               SUM(suma) OVER (ORDER BY dia ROWS {ROLLING_WINDOW - 1} PRECEDING)
+                 / SUM(conteo) OVER (ORDER BY dia ROWS {ROLLING_WINDOW - 1} PRECEDING)
+        FROM (SELECT fecha_epoch / 86400 AS dia, COUNT(*) AS tweets, SUM(sentimiento) AS suma,
+                     COUNT(sentimiento) AS conteo
+              FROM tweets WHERE fecha_epoch IS NOT NULL GROUP BY dia)
+    """).fetchall()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las estadísticas ampliadas del Analyzer')
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start_time = time.perf_counter()
+        db = build_table(os.path.join(directory, 'bench.db'), args.rows, args.seed)
+        print(f"Tabla sintética de {args.rows} tweets creada en {time.perf_counter() - start_time:.1f} s")
+
+        start_time = time.perf_counter()
+        sql_stats = sql_statistics(db.connection)
+        sql_time = time.perf_counter() - start_time
+
+        analyzer = VectorAnalyzer(db)
+        start_time = time.perf_counter()
+        numpy_stats = analyzer.compute()
+        numpy_time = time.perf_counter() - start_time
+        db.connection.close()
+
+    print(f"SQL:   {sql_time:8.2f} s")
+    print(f"NumPy: {numpy_time:8.2f} s (lectura {analyzer.load_time:.2f} s, cálculo {analyzer.compute_time:.2f} s)")
+    print(f"Aceleración: x{sql_time / numpy_time:.1f}")
+    print(f"Mediana del sentimiento: SQL {sql_stats['sentiment_percentiles'][50]:.4f}, "
+          f"NumPy {numpy_stats['sentiment_percentiles'][50]:.4f}")
+    print(f"Interacción media: SQL {sql_stats['engagement_mean']:.6f}, NumPy {numpy_stats['engagement_mean']:.6f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# bench_neo4j_workers.py
+# Rendimiento de la escritura en Neo4j según el número de escritores en paralelo
+# (insert_data_parallel) frente a un único hilo por lotes (insert_data_batched), sobre un
+# corpus sintético. Por defecto usa el controlador que registra las sentencias, con una
+# latencia simulada por sentencia; con --live escribe en la base configurada en .env.
+# Uso: python benchmarks/bench_neo4j_workers.py [--size 100k] [--workers 1,2,4,8] [--latency 0.005] [--live]
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import SyntheticCorpus, parse_size, DEFAULT_SEED
+from fakes import RecordingNeo4jDriver, install_neo4j_driver
+from records import TweetRecord
+from neo4j_db import Neo4jDatabase, DEFAULT_BATCH_SIZE
+
+DEFAULT_WORKERS = '1,2,4,8'
+DEFAULT_LATENCY = 0.005  # Segundos por sentencia: sin latencia, el GIL oculta la ganancia del paralelismo
+
+def load_records(size, seed):
+    records = []
+    for batch in SyntheticCorpus(size, seed=seed).iter_batches():
+        records.extend(TweetRecord.normalize_all(batch))
+    for record in records:
+        record.sentimiento = 0.0
+    return records
+
+def open_database(args, pool_size):
+    driver = None
+    if not args.live:
+        os.environ.setdefault('NEO4J_PASSWORD', 'benchmark')
+        driver = RecordingNeo4jDriver(args.latency)
+        install_neo4j_driver(driver)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return Neo4jDatabase(pool_size=pool_size), driver
+
+def measure(args, records, workers):
+    # workers=0: referencia en un solo hilo con insert_data_batched
+    db, driver = open_database(args, max(workers, 1))
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.perf_counter()
+        for start in range(0, len(records), args.batch_size):
+            chunk = records[start:start + args.batch_size]
+            if workers:
+                db.insert_data_parallel(chunk, workers=workers, batch_size=args.neo4j_batch_size)
+            else:
+                db.insert_data_batched(chunk, batch_size=args.neo4j_batch_size)
+        elapsed = time.perf_counter() - start_time
+        db.close_connection()
+    result = {'workers': workers or 1, 'mode': 'paralelo' if workers else 'lotes',
+              'seconds': round(elapsed, 3), 'records_per_s': round(len(records) / elapsed, 1)}
+    if driver:
+        result.update(driver.summary())
+        result.pop('by_kind', None)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Escritura en Neo4j según el número de escritores')
+    parser.add_argument('--size', type=str, default='100k', help='Tweets sintéticos: 10k, 100k, 1M, 10M o un número')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--workers', type=str, default=DEFAULT_WORKERS,
+                        help=f'Números de escritores a probar, separados por comas (por defecto {DEFAULT_WORKERS})')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Tweets por llamada, como los lotes de --load')
+    parser.add_argument('--neo4j-batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Tweets por transacción')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY,
+                        help=f'Latencia simulada por sentencia en segundos (por defecto {DEFAULT_LATENCY})')
+    parser.add_argument('--live', action='store_true',
+                        help='Escribir en la base Neo4j configurada (NEO4J_PASSWORD) en lugar del controlador simulado')
+    parser.add_argument('--output', type=str, help='Guardar los resultados en un archivo JSON')
+    args = parser.parse_args()
+    args.size = parse_size(args.size)
+    worker_counts = [int(value) for value in args.workers.split(',') if value.strip()]
+
+    records = load_records(args.size, args.seed)
+    results = [measure(args, records, 0)] + [measure(args, records, workers) for workers in worker_counts]
+
+    baseline = results[0]['records_per_s']
+    target = 'Neo4j real' if args.live else f"controlador simulado, {args.latency * 1000:.1f} ms por sentencia"
+    print(f"{len(records)} tweets sintéticos en lotes de {args.batch_size} ({target})")
+    print(f"{'modo':<10} {'escritores':>10} {'tiempo (s)':>11} {'tweets/s':>12} {'aceleración':>12}")
+    for result in results:
+        print(f"{result['mode']:<10} {result['workers']:>10} {result['seconds']:>11.3f} "
+              f"{result['records_per_s']:>12.1f} {result['records_per_s'] / baseline:>11.2f}x")
+    best = max(results[1:], key=lambda result: result['records_per_s'], default=None)
+    if best:
+        print(f"Mejor rendimiento: {best['workers']} escritores ({best['records_per_s']:.1f} tweets/s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'seed': args.seed, 'latency': None if args.live else args.latency,
+                       'results': results}, f, indent=2)
+        print(f"\nResultados guardados en '{args.output}'")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+# bench_pipeline.py
+# Rendimiento por etapa del flujo completo sobre un corpus sintético: generación,
+# normalización (JSON y objetos de tweepy), sentimiento con TextBlob, SQLite (fila a fila y
+# carga masiva), Neo4j (fila a fila y por lotes, con un controlador que registra las
+# sentencias), guardado en archivo, consultas del Analyzer y resumen con un OpenAI local.
+# Guarda el tiempo, el rendimiento y el pico de memoria de cada etapa (RSS muestreado
+# mientras corre la etapa) en JSON y puede compararlos con una ejecución anterior.
+# Uso: python benchmarks/bench_pipeline.py [--size 100k] [--stages a,b] [--output r.json] [--compare previo.json]
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import SyntheticCorpus, parse_size, DEFAULT_SEED
+from fakes import RecordingNeo4jDriver, StubOpenAIServer, install_neo4j_driver
+from records import TweetRecord
+from sentiment import score_chunk
+from sqlite_db import SQLiteDatabase
+from neo4j_db import Neo4jDatabase
+from analysis import Analyzer
+from openai_analysis import OpenAIAnalysis
+from utils import Utils
+from tweet_store import TweetStore
+
+STAGES = ['generar', 'normalizar', 'normalizar_api', 'sentimiento', 'sqlite_fila', 'sqlite_masiva',
+          'neo4j_fila', 'neo4j_lotes', 'guardar_archivo', 'analyzer', 'openai']
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SENTIMENT_LIMIT = 20000  # TextBlob es la etapa más lenta; el resto reutiliza sus puntuaciones
+DEFAULT_OPENAI_SAMPLE = 50000
+DEFAULT_TOLERANCE = 0.10  # Caída de rendimiento a partir de la cual se marca una regresión
+RSS_SAMPLE_INTERVAL = 0.005  # Segundos entre lecturas del RSS durante una etapa
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def current_rss():
+    # RSS actual en bytes; None donde no hay /proc (macOS, Windows)
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return None
+
+class RSSSampler:
+    # Pico de RSS mientras corre una etapa, leído cada RSS_SAMPLE_INTERVAL desde un hilo.
+    # El máximo de ru_maxrss es de todo el proceso y nunca baja, por lo que tras la primera
+    # etapa grande ya no distingue a las demás.
+    def __init__(self):
+        self.start = current_rss()
+        self.peak = self.start
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        rss = current_rss()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def poll(self):
+        while not self.stop_event.wait(RSS_SAMPLE_INTERVAL):
+            self.sample()
+
+    def __enter__(self):
+        if self.start is not None:
+            self.thread = threading.Thread(target=self.poll, daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.thread:
+            self.stop_event.set()
+            self.thread.join()
+            self.sample()
+        return False
+
+class StageTimer:
+    # Acumula por etapa los registros, el tiempo y el pico de memoria de todas sus llamadas
+    def __init__(self, stages, trace_memory=False):
+        self.stages = stages
+        self.trace_memory = trace_memory
+        self.results = {}
+        if trace_memory:
+            tracemalloc.start()
+
+    def run(self, name, records, function, *args):
+        # Ejecuta la función y la mide si la etapa está seleccionada; records=None cuenta el resultado
+        if name not in self.stages:
+            return function(*args)
+        stats = self.results.setdefault(name, {'records': 0, 'seconds': 0.0})
+        if self.trace_memory:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        # Las funciones del proyecto informan de cada lote por consola; aquí sólo interesa el tiempo
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), RSSSampler() as rss:
+            start_time = time.perf_counter()
+            result = function(*args)
+            elapsed = time.perf_counter() - start_time
+        stats['records'] += len(result or ()) if records is None else records
+        stats['seconds'] += elapsed
+        if self.trace_memory:
+            peak = (tracemalloc.get_traced_memory()[1] - current) / (1024 * 1024)
+            stats['peak_traced_mb'] = round(max(stats.get('peak_traced_mb', 0.0), peak), 1)
+        if rss.start is not None:
+            # Pico absoluto durante la etapa y lo que creció sobre el RSS con el que empezó
+            stats['peak_rss_mb'] = round(max(stats.get('peak_rss_mb', 0.0), rss.peak / (1024 * 1024)), 1)
+            stats['rss_growth_mb'] = round(max(stats.get('rss_growth_mb', 0.0),
+                                               (rss.peak - rss.start) / (1024 * 1024)), 1)
+        return result
+
+    def summary(self):
+        for stats in self.results.values():
+            stats['seconds'] = round(stats['seconds'], 4)
+            stats['records_per_s'] = round(stats['records'] / stats['seconds'], 1) if stats['seconds'] > 0 else None
+        return {name: self.results[name] for name in STAGES if name in self.results}
+
+def open_sqlite(directory):
+    # SQLiteDatabase abre data/twitter.db relativo al directorio actual
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            db = SQLiteDatabase()
+            db.create_tables()
+        return db
+    finally:
+        os.chdir(previous)
+
+def open_neo4j(driver):
+    install_neo4j_driver(driver)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return Neo4jDatabase()
+
+def run_benchmark(args, stages):
+    os.environ.setdefault('NEO4J_PASSWORD', 'benchmark')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    timer = StageTimer(stages, trace_memory=args.tracemalloc)
+    corpus = SyntheticCorpus(args.size, seed=args.seed, batch_size=args.batch_size)
+    utils = Utils()
+    scores = []
+    openai_sample = []
+    extra = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('fila', 'masiva'):
+            os.makedirs(os.path.join(directory, name, 'data'))
+        previous = os.getcwd()
+        os.chdir(os.path.join(directory, 'masiva'))
+        try:
+            sqlite_row = open_sqlite(os.path.join(directory, 'fila')) if 'sqlite_fila' in stages else None
+            sqlite_bulk = open_sqlite('.') if 'sqlite_masiva' in stages or 'analyzer' in stages else None
+            row_driver, batch_driver = RecordingNeo4jDriver(args.neo4j_latency), RecordingNeo4jDriver(args.neo4j_latency)
+            neo4j_row = open_neo4j(row_driver) if 'neo4j_fila' in stages else None
+            neo4j_batched = open_neo4j(batch_driver) if 'neo4j_lotes' in stages else None
+            tweet_store = TweetStore('tweets.ndjson')
+
+            batches = corpus.iter_batches()
+            while True:
+                # La generación y la normalización son la entrada del resto: siempre se ejecutan
+                batch = timer.run('generar', None, next, batches, None)
+                if batch is None:
+                    break
+                records = timer.run('normalizar', len(batch), TweetRecord.normalize_all, batch)
+                if 'normalizar_api' in stages:
+                    api_batch = corpus.to_api(batch)
+                    timer.run('normalizar_api', len(api_batch), TweetRecord.normalize_all, api_batch)
+
+                # Sentimiento: TextBlob sobre los primeros tweets hasta el límite; el resto
+                # reutiliza esas puntuaciones para que las bases de datos no lo recalculen
+                pending = args.sentiment_limit - len(scores)
+                if pending > 0 and 'sentimiento' in stages:
+                    scores.extend(timer.run('sentimiento', None, score_chunk,
+                                            [record.contenido for record in records[:pending]]))
+                for index, record in enumerate(records):
+                    record.sentimiento = scores[index % len(scores)] if scores else 0.0
+
+                if sqlite_row:
+                    timer.run('sqlite_fila', len(records), sqlite_row.insert_data, records)
+                if sqlite_bulk and 'sqlite_masiva' in stages:
+                    timer.run('sqlite_masiva', len(records), sqlite_bulk.bulk_insert_data, records)
+                if neo4j_row:
+                    timer.run('neo4j_fila', len(records), neo4j_row.insert_data, records)
+                if neo4j_batched:
+                    timer.run('neo4j_lotes', len(records), neo4j_batched.insert_data_batched, records, args.neo4j_batch_size)
+                if 'guardar_archivo' in stages:
+                    timer.run('guardar_archivo', len(records), utils.save_tweets_to_file, records, tweet_store)
+                if 'openai' in stages and len(openai_sample) < args.openai_sample:
+                    openai_sample.extend(records[:args.openai_sample - len(openai_sample)])
+
+            if sqlite_bulk and 'analyzer' in stages:
+                analyzer = Analyzer(sqlite_bulk, None)
+                count = sqlite_bulk.connection.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+                timer.run('analyzer', count, analyzer.run_analysis)
+            if 'openai' in stages:
+                with StubOpenAIServer(latency=args.openai_latency) as server:
+                    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                        openai_analysis = OpenAIAnalysis(base_url=server.base_url)
+                    timer.run('openai', len(openai_sample), openai_analysis.singularity, openai_sample)
+                    openai_analysis.http.close()
+                    extra['openai'] = server.summary()
+
+            tweet_store.close()
+            if neo4j_row:
+                extra['neo4j_fila'] = row_driver.summary()
+            if neo4j_batched:
+                extra['neo4j_lotes'] = batch_driver.summary()
+            for db in (sqlite_row, sqlite_bulk):
+                if db:
+                    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                        db.close_connection()
+        finally:
+            os.chdir(previous)
+
+    results = timer.summary()
+    for name, details in extra.items():
+        if name in results:
+            results[name].update(details)
+    return results
+
+COMPARABLE_SETTINGS = ['size', 'seed', 'batch_size', 'sentiment_limit', 'tracemalloc']
+
+def compare(results, previous, tolerance):
+    # Compara el rendimiento por etapa con una ejecución anterior; devuelve las regresiones
+    differences = [f"{key}: {previous.get(key)} -> {results.get(key)}"
+                   for key in COMPARABLE_SETTINGS if previous.get(key) != results.get(key)]
+    if differences:
+        print(f"\nAviso: la ejecución anterior usó otra configuración ({'; '.join(differences)})")
+    regressions = []
+    print(f"\n{'etapa':<16} {'anterior':>12} {'actual':>12} {'cambio':>8}")
+    for name, stats in results['stages'].items():
+        old = previous.get('stages', {}).get(name, {}).get('records_per_s')
+        new = stats.get('records_per_s')
+        if not old or not new:
+            continue
+        change = new / old - 1
+        flag = '  REGRESIÓN' if change < -tolerance else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:<16} {old:>12.1f} {new:>12.1f} {change:>+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark por etapas del flujo de tweets')
+    parser.add_argument('--size', type=str, default='10k', help='Tweets sintéticos: 10k, 100k, 1M, 10M o un número')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--stages', type=str, default=','.join(STAGES),
+                        help=f"Etapas a medir, separadas por comas (por defecto todas: {','.join(STAGES)})")
+    parser.add_argument('--sentiment-limit', type=int, default=DEFAULT_SENTIMENT_LIMIT,
+                        help=f'Tweets puntuados con TextBlob (por defecto {DEFAULT_SENTIMENT_LIMIT})')
+    parser.add_argument('--neo4j-batch-size', type=int, default=1000)
+    parser.add_argument('--neo4j-latency', type=float, default=0.0, help='Latencia simulada por sentencia de Neo4j (s)')
+    parser.add_argument('--openai-sample', type=int, default=DEFAULT_OPENAI_SAMPLE)
+    parser.add_argument('--openai-latency', type=float, default=0.0, help='Latencia simulada por solicitud a OpenAI (s)')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Medir además el pico de memoria asignada por Python (tracemalloc) de cada etapa (más lento)')
+    parser.add_argument('--output', type=str, help='Guardar los resultados en un archivo JSON')
+    parser.add_argument('--compare', type=str, help='Resultados JSON de una ejecución anterior')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    args.size = parse_size(args.size)
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+
+    start_time = time.perf_counter()
+    stage_results = run_benchmark(args, stages)
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'size': args.size,
+        'seed': args.seed,
+        'batch_size': args.batch_size,
+        'sentiment_limit': args.sentiment_limit,
+        'tracemalloc': args.tracemalloc,
+        'total_seconds': round(time.perf_counter() - start_time, 2),
+        'stages': stage_results
+    }
+
+    print(f"{args.size} tweets sintéticos (semilla {args.seed}) en {results['total_seconds']:.1f} s")
+    print(f"{'etapa':<16} {'tweets':>10} {'tiempo (s)':>11} {'tweets/s':>12} {'RSS pico (MB)':>14} {'crec. (MB)':>11}")
+    for name, stats in stage_results.items():
+        rate = f"{stats['records_per_s']:.1f}" if stats['records_per_s'] else '-'
+        rss = f"{stats['peak_rss_mb']:.1f}" if 'peak_rss_mb' in stats else '-'
+        growth = f"{stats['rss_growth_mb']:.1f}" if 'rss_growth_mb' in stats else '-'
+        traced = f"  (Python: {stats['peak_traced_mb']:.1f} MB)" if 'peak_traced_mb' in stats else ''
+        print(f"{name:<16} {stats['records']:>10} {stats['seconds']:>11.3f} {rate:>12} {rss:>14} {growth:>11}{traced}")
+    for name in ('neo4j_fila', 'neo4j_lotes'):
+        if name in stage_results:
+            print(f"{name}: {stage_results[name]['statements']} sentencias, {stage_results[name].get('transactions', 0)} transacciones")
+    if 'openai' in stage_results:
+        print(f"openai: {stage_results['openai']['requests']} solicitudes al servidor local")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nRegresiones de más del {args.tolerance:.0%}: {', '.join(regressions)}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en '{args.output}'")
+
+if __name__ == '__main__':
+    main()
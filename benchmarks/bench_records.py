@@ -0,0 +1,76 @@
+# bench_records.py
+# Memoria y tiempo de normalización por registro: diccionario plano frente a TweetRecord.
+# Uso: python benchmarks/bench_records.py [--records N]
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from records import TweetRecord
+
+def iter_source(count):
+    # Registros como los de un archivo JSON; se generan al vuelo para no medir la fuente
+    for i in range(count):
+        yield {
+            'tweet_id': str(1500000000000000000 + i),
+            'usuario_id': str(1000 + i % 500),
+            'nombre_usuario': f"usuario_{i % 500}",
+            'contenido': f"Tweet de prueba número {i} #datos @usuario_{(i + 1) % 500}",
+            'fecha_hora': '2024-05-01T12:00:00+00:00',
+            'retweets': i % 50,
+            'likes': i % 200,
+            'seguidores': 1000 + i % 500,
+            'ubicacion': None,
+            'verificado': False,
+            'lang': 'es',
+            'referenced_tweets': []
+        }
+
+def normalize_dict(data):
+    # Normalización anterior: un diccionario nuevo por tweet
+    return {
+        'tweet_id': data.get('tweet_id'),
+        'usuario_id': data.get('usuario_id'),
+        'nombre_usuario': data.get('nombre_usuario'),
+        'contenido': data.get('contenido'),
+        'fecha_hora': data.get('fecha_hora'),
+        'retweets': data.get('retweets', 0),
+        'likes': data.get('likes', 0),
+        'seguidores': data.get('seguidores', 0),
+        'ubicacion': data.get('ubicacion'),
+        'verificado': data.get('verificado', False),
+        'lang': data.get('lang'),
+        'referenced_tweets': data.get('referenced_tweets') or [],
+        'sentimiento': data.get('sentimiento')
+    }
+
+def measure(name, normalize, count):
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    records = [normalize(data) for data in iter_source(count)]
+    elapsed = time.perf_counter() - start_time
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} {current / count:8.1f} bytes/registro  {current / 1024 / 1024:9.1f} MB  "
+          f"{count / elapsed:12.0f} registros/s")
+    del records
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark de la representación de tweets')
+    parser.add_argument('--records', type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"{args.records} registros normalizados retenidos en memoria:")
+    before = measure('dict', normalize_dict, args.records)
+    after = measure('TweetRecord', TweetRecord.from_data, args.records)
+    print(f"Reducción de memoria: {(1 - after / before) * 100:.1f}%")
+
+if __name__ == '__main__':
+    main()
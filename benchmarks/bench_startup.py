@@ -0,0 +1,111 @@
+# bench_startup.py
+# Tiempo de arranque en frío de main.py por modo, con el desglose de -X importtime.
+# Uso: python benchmarks/bench_startup.py [--repeat N] [--output resultados.json]
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+MAIN = os.path.join(SRC_DIR, 'main.py')
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+TOP_MODULES = 5
+
+# Modos que no necesitan servicios externos; el resto de backends se mide con BACKENDS
+MODES = {
+    'ayuda': ['--help'],
+    'compactar': ['--compact', 'vacio.ndjson'],
+    'rollups': ['--rebuild-rollups'],
+    'load-json': ['--load', 'muestra.json', '--no-neo4j', '--no-openai'],
+    'load-parquet': ['--load', 'muestra.parquet', '--no-neo4j', '--no-openai']
+}
+# Coste de importar cada backend que main.py ya no carga al inicio
+BACKENDS = ['tweepy', 'neo4j', 'textblob', 'requests', 'numpy', 'pyarrow']
+
+SAMPLE_TWEETS = [{
+    'tweet_id': str(1000 + i),
+    'usuario_id': str(i % 3),
+    'nombre_usuario': f"usuario_{i % 3}",
+    'contenido': f"Tweet de prueba {i} #arranque",
+    'fecha_hora': '2024-05-01T12:00:00+00:00',
+    'retweets': i,
+    'likes': i * 2,
+    'seguidores': 100,
+    'verificado': False,
+    'referenced_tweets': []
+} for i in range(20)]
+
+def parse_importtime(stderr):
+    # Devuelve el tiempo total de importación (s) y los módulos de primer nivel más costosos
+    top_level = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and not match.group(3):
+            top_level[match.group(4)] = top_level.get(match.group(4), 0) + int(match.group(2))
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]
+    return sum(top_level.values()) / 1e6, [(name, micros / 1e6) for name, micros in heaviest]
+
+def run(command, cwd):
+    start_time = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start_time
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} terminó con código {result.returncode}:\n{result.stdout}{result.stderr}")
+    return elapsed, result.stderr
+
+def measure(command, cwd, repeat):
+    walls, imports, heaviest = [], [], []
+    for _ in range(repeat):
+        wall, stderr = run(command, cwd)
+        total, heaviest = parse_importtime(stderr)
+        walls.append(wall)
+        imports.append(total)
+    return {
+        'wall_median': statistics.median(walls),
+        'imports_median': statistics.median(imports),
+        'heaviest': heaviest
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque de main.py por modo')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', type=str, help='Guardar los resultados en un archivo JSON')
+    args = parser.parse_args()
+
+    results = {'python': sys.version.split()[0], 'modes': {}, 'backends': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, 'data'))
+        with open(os.path.join(directory, 'data', 'muestra.json'), 'w', encoding='utf-8') as f:
+            json.dump(SAMPLE_TWEETS, f)
+        # Preparación: crea la base de datos y el archivo Parquet que usan los modos
+        run([sys.executable, MAIN, '--load', 'muestra.json', '--no-neo4j', '--no-openai',
+             '--export', 'muestra.parquet'], directory)
+
+        for name, argv in MODES.items():
+            results['modes'][name] = measure([sys.executable, '-X', 'importtime', MAIN] + argv, directory, args.repeat)
+        for backend in BACKENDS:
+            results['backends'][backend] = measure(
+                [sys.executable, '-X', 'importtime', '-c', f'import {backend}'], directory, args.repeat
+            )
+
+    print(f"{'modo':<14} {'total (s)':>10} {'imports (s)':>12}  módulos más costosos")
+    for name, stats in results['modes'].items():
+        heaviest = ', '.join(f"{module} {seconds:.3f}" for module, seconds in stats['heaviest'])
+        print(f"{name:<14} {stats['wall_median']:>10.3f} {stats['imports_median']:>12.3f}  {heaviest}")
+    print("\nCoste de importar cada backend por separado:")
+    for backend, stats in results['backends'].items():
+        print(f"{backend:<14} {stats['imports_median']:>10.3f} s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en '{args.output}'")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# check_apis.py
+# Comprobación ejecutable de los clientes HTTP contra los servidores locales de fakes.py, sin
+# red ni credenciales reales: búsqueda de usuarios en lotes de /2/users/by, paginación con
+# next_token y since_id, reintento ante 429 con Retry-After, y resumen de OpenAI por
+# fragmentos (map-reduce) con base_url apuntando al servidor simulado y con la caché en disco.
+# También comprueba que lazy_import de un módulo ausente no falla al importar y sí al usarlo.
+# Uso: python benchmarks/check_apis.py   (termina con código 1 si alguna comprobación falla)
+
+import contextlib
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import StubOpenAIServer, StubTwitterServer
+from twitter_api import TwitterAPI, USERS_LOOKUP_BATCH, MAX_RESULTS_PER_PAGE
+from openai_analysis import OpenAIAnalysis, MAP_MAX_TOKENS, CHUNK_TOKEN_BUDGET, SINGLE_PROMPT_TOKEN_BUDGET, CHARS_PER_TOKEN
+from response_cache import ResponseCache
+from utils import lazy_import, MissingModule
+
+TWEETS_PER_USER = 250
+USERNAMES = 230
+TWEET_TEXT_CHARS = 150
+
+failures = []
+
+def check(name, condition, detail=''):
+    print(f"{'OK   ' if condition else 'FALLO'} {name}" + (f" ({detail})" if detail else ''))
+    if not condition:
+        failures.append(name)
+
+@contextlib.contextmanager
+def quiet():
+    # Los clientes informan de cada paso por consola; aquí sólo interesan las comprobaciones
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def check_twitter():
+    for key in ('TWITTER_BEARER_TOKEN', 'TWITTER_CONSUMER_KEY', 'TWITTER_CONSUMER_SECRET',
+                'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET'):
+        os.environ.setdefault(key, 'check')
+    with StubTwitterServer(tweets_per_user=TWEETS_PER_USER) as server:
+        with quiet():
+            api = TwitterAPI(base_url=server.base_url)
+            usernames = [f"user{index}" for index in range(USERNAMES)] + ['missing_user']
+            users = api.lookup_users(usernames)
+        expected = [min(USERS_LOOKUP_BATCH, len(usernames) - start)
+                    for start in range(0, len(usernames), USERS_LOOKUP_BATCH)]
+        check("users/by en lotes de 100", server.server.lookup_batches == expected,
+              f"lotes {server.server.lookup_batches}")
+        check("usuarios inexistentes descartados", len(users) == USERNAMES, f"{len(users)} usuarios")
+
+        with quiet():
+            tweets = api.fetch_user_tweets(users[0], max_pages=5)
+        pages = -(-TWEETS_PER_USER // MAX_RESULTS_PER_PAGE)
+        tokens = [params.get('pagination_token') for params in server.server.query_params]
+        check("paginación con next_token hasta agotar los tweets",
+              len(tweets) == TWEETS_PER_USER and server.server.pages[str(users[0].id)] == pages,
+              f"{len(tweets)} tweets en {server.server.pages[str(users[0].id)]} páginas, tokens {tokens}")
+
+        with quiet():
+            tweets = api.fetch_user_tweets(users[1], max_pages=2, since_id='12345')
+        last = server.server.query_params[-2:]
+        check("max_pages limita las páginas", len(tweets) == 2 * MAX_RESULTS_PER_PAGE, f"{len(tweets)} tweets")
+        check("since_id en todas las páginas", all(params.get('since_id') == '12345' for params in last))
+
+        with quiet():
+            tweets = api.get_users_tweets([user.username for user in users[:6]], max_pages=5, workers=4)
+        check("recolección en paralelo", len(tweets) == 6 * TWEETS_PER_USER, f"{len(tweets)} tweets")
+
+        retries = api.http.retries
+        server.fail(1)
+        with quiet():
+            users = api.lookup_users(['user0'])
+        check("reintento tras 429 con Retry-After", len(users) == 1 and api.http.retries == retries + 1,
+              f"{api.http.retries - retries} reintentos")
+        api.close_connection()
+
+def check_openai():
+    os.environ.setdefault('OPENAI_API_KEY', 'check')
+    # Lo bastante para superar el presupuesto de una sola solicitud y forzar map-reduce
+    count = SINGLE_PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN // TWEET_TEXT_CHARS * 5 // 4
+    tweets = [{'tweet_id': str(index), 'contenido': f"{index:06d} " + 'x' * (TWEET_TEXT_CHARS - 7)}
+              for index in range(count)]
+    with StubOpenAIServer() as server, tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(cache_path=os.path.join(directory, 'openai_cache.db'))
+        with quiet():
+            analysis = OpenAIAnalysis(base_url=server.base_url, map_workers=4, cache=cache)
+            chunks = len(analysis.split_into_chunks([tweet['contenido'] for tweet in tweets]))
+            server.fail(1)
+            summary = analysis.singularity(tweets)
+        map_requests = server.server.max_tokens[MAP_MAX_TOKENS]
+        check("map-reduce contra base_url local", summary is not None and map_requests == chunks
+              and server.server.requests == chunks + 2,
+              f"{chunks} fragmentos de hasta {CHUNK_TOKEN_BUDGET} tokens, {server.server.requests} solicitudes "
+              f"(incluido un 429 reintentado)")
+
+        requests = server.server.requests
+        with quiet():
+            second = analysis.singularity(tweets)
+        check("la caché evita repetir las solicitudes", second == summary and server.server.requests == requests,
+              f"{cache.hits} aciertos")
+        analysis.http.close()
+        cache.close_connection()
+
+def check_lazy_import():
+    # Las dependencias opcionales ausentes se detectan en el primer uso, no al importar
+    missing = lazy_import('modulo_inexistente_de_prueba')
+    try:
+        missing.anything
+        error = None
+    except ModuleNotFoundError as e:
+        error = e
+    check("lazy_import de un módulo ausente devuelve un marcador",
+          isinstance(missing, MissingModule) and 'modulo_inexistente_de_prueba' not in sys.modules)
+    check("el marcador lanza ModuleNotFoundError al usarlo",
+          error is not None and error.name == 'modulo_inexistente_de_prueba', str(error))
+    check("lazy_import de un módulo instalado lo carga al usarlo", lazy_import('json').dumps([1]) == '[1]')
+
+def main():
+    check_lazy_import()
+    check_twitter()
+    check_openai()
+    if failures:
+        print(f"\n{len(failures)} comprobaciones fallidas: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nTodas las comprobaciones pasaron.")
+
+if __name__ == '__main__':
+    main()
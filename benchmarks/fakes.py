@@ -0,0 +1,299 @@
+# fakes.py
+# Sustitutos locales de Neo4j, OpenAI y Twitter para los benchmarks y comprobaciones: un
+# controlador de Neo4j que registra las sentencias (sin servidor ni paquete neo4j) y
+# servidores HTTP que imitan POST /v1/chat/completions y GET /2/users/by y
+# /2/users/:id/tweets. Todos admiten una latencia fija por llamada; los servidores HTTP
+# pueden además responder 429 a las primeras solicitudes para ejercitar los reintentos.
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qs
+
+CLAUSE_PATTERN = re.compile(r'\b(UNWIND|LOAD CSV|MERGE|MATCH|CREATE)\b')
+RELATIONSHIP_PATTERN = re.compile(r'\[\w*:(\w+)')
+LABEL_PATTERN = re.compile(r'\(\w*:(\w+)')
+
+def statement_kind(query):
+    # Resume una sentencia Cypher por su primera cláusula y la relación (o, si no hay,
+    # la primera etiqueta) que escribe: "UNWIND PUBLICA", "MERGE Usuario"...
+    clause = CLAUSE_PATTERN.search(query)
+    target = RELATIONSHIP_PATTERN.search(query) or LABEL_PATTERN.search(query)
+    if not clause:
+        return ' '.join(query.split()[:3])
+    return clause.group(1) + (' ' + target.group(1) if target else '')
+
+class RecordingResult:
+    def __init__(self, records=()):
+        self.records = list(records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def single(self):
+        return self.records[0] if self.records else None
+
+    def data(self):
+        return self.records
+
+    def consume(self):
+        return self
+
+class RecordingTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.driver.record(query, {**(parameters or {}), **kwargs})
+
+    def commit(self):
+        self.driver.count('commits')
+
+    def rollback(self):
+        self.driver.count('rollbacks')
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class RecordingSession(RecordingTransaction):
+    def begin_transaction(self):
+        self.driver.count('transactions')
+        return RecordingTransaction(self.driver)
+
+    def execute_write(self, work, *args, **kwargs):
+        self.driver.count('transactions')
+        result = work(RecordingTransaction(self.driver), *args, **kwargs)
+        self.driver.count('commits')
+        return result
+
+    execute_read = execute_write
+
+class RecordingNeo4jDriver:
+    # Registra cuántas sentencias de cada tipo se ejecutan y cuántas filas de UNWIND reciben.
+    # Es seguro entre hilos; 'latency' simula el viaje de ida y vuelta de cada sentencia.
+    def __init__(self, latency=0.0, results=None):
+        self.latency = latency
+        self.results = results or {}  # tipo de sentencia -> filas devueltas
+        self.lock = threading.Lock()
+        self.statements = Counter()
+        self.rows = Counter()
+        self.counters = Counter()
+
+    def record(self, query, parameters):
+        kind = statement_kind(query)
+        rows = parameters.get('rows')
+        with self.lock:
+            self.statements[kind] += 1
+            self.rows[kind] += len(rows) if rows is not None else 1
+        if self.latency:
+            time.sleep(self.latency)
+        return RecordingResult(self.results.get(kind, ()))
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def session(self, **kwargs):
+        self.count('sessions')
+        return RecordingSession(self)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
+
+    def summary(self):
+        with self.lock:
+            return {
+                'statements': sum(self.statements.values()),
+                'rows': sum(self.rows.values()),
+                'by_kind': dict(self.statements),
+                **dict(self.counters)
+            }
+
+    def reset(self):
+        with self.lock:
+            self.statements.clear()
+            self.rows.clear()
+            self.counters.clear()
+
+def install_neo4j_driver(driver):
+    # Sustituye el módulo neo4j que usa neo4j_db.py por uno que devuelve 'driver', de modo que
+    # Neo4jDatabase() recorre su connect() habitual sin servidor ni paquete neo4j
+    import neo4j_db
+    neo4j_db.neo4j = SimpleNamespace(GraphDatabase=SimpleNamespace(driver=lambda uri, auth=None, **kwargs: driver))
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def begin(self):
+        # Cuenta la solicitud, aplica la latencia y, si quedan fallos programados, responde
+        # 429 con Retry-After: 0; devuelve False en ese caso
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            failing = server.fail_next > 0
+            if failing:
+                server.fail_next -= 1
+                server.failures += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if failing:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        return not failing
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class StubOpenAIHandler(StubHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self.begin():
+            return
+        request = json.loads(body or b'{}')
+        prompt = ''.join(message.get('content', '') for message in request.get('messages', []))
+        with server.lock:
+            server.prompt_bytes += len(body)
+            server.max_tokens[request.get('max_tokens')] += 1
+            number = server.requests
+        self.send_json({
+            'id': f"stub-{number}",
+            'object': 'chat.completion',
+            'model': request.get('model'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': f"Resumen simulado de {len(prompt)} caracteres."}}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 8}
+        })
+
+class StubTwitterHandler(StubHandler):
+    # Usuarios "nombre" con id estable; los nombres que empiezan por "missing" no existen.
+    # Cada usuario tiene server.tweets_per_user tweets, paginados por max_results con
+    # next_token = desplazamiento de la página siguiente.
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if not self.begin():
+            return
+        parts = url.path.strip('/').split('/')
+        if parts == ['2', 'users', 'by']:
+            usernames = params.get('usernames', '').split(',')
+            with server.lock:
+                server.lookup_batches.append(len(usernames))
+            self.send_json({
+                'data': [{'id': str(1000 + index), 'username': name, 'name': name, 'verified': False,
+                          'public_metrics': {'followers_count': 10 * index, 'following_count': 0,
+                                             'tweet_count': server.tweets_per_user, 'listed_count': 0}}
+                         for index, name in enumerate(usernames) if not name.startswith('missing')],
+                'errors': [{'value': name, 'detail': f"Could not find user with usernames: [{name}]."}
+                           for name in usernames if name.startswith('missing')]
+            })
+        elif len(parts) == 4 and parts[:2] == ['2', 'users'] and parts[3] == 'tweets':
+            user_id = parts[2]
+            offset = int(params.get('pagination_token', 0))
+            page_size = int(params.get('max_results', 10))
+            end = min(offset + page_size, server.tweets_per_user)
+            with server.lock:
+                server.pages[user_id] += 1
+                server.query_params.append(params)
+            payload = {
+                'data': [{'id': str(int(user_id) * 100000 + index), 'text': f"Tweet {index} #stub",
+                          'edit_history_tweet_ids': [str(int(user_id) * 100000 + index)],
+                          'author_id': user_id, 'created_at': '2024-11-20T12:00:00.000Z', 'lang': 'es',
+                          'public_metrics': {'retweet_count': 0, 'like_count': 0, 'reply_count': 0, 'quote_count': 0}}
+                         for index in range(offset, end)],
+                'meta': {'result_count': end - offset}
+            }
+            if end < server.tweets_per_user:
+                payload['meta']['next_token'] = str(end)
+            self.send_json(payload)
+        else:
+            self.send_json({'title': 'Not Found'}, status=404)
+
+class StubServer:
+    # Servidor local en un puerto libre, en un hilo aparte
+    handler = StubHandler
+    path = ''
+
+    def __init__(self, latency=0.0, fail_next=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.fail_next = fail_next
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.failures = 0
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}{self.path}"
+
+    def fail(self, count=1):
+        with self.server.lock:
+            self.server.fail_next += count
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+class StubOpenAIServer(StubServer):
+    # base_url se pasa a OpenAIAnalysis u OPENAI_API_BASE
+    handler = StubOpenAIHandler
+    path = '/v1'
+
+    def __init__(self, latency=0.0, fail_next=0):
+        super().__init__(latency, fail_next)
+        self.server.prompt_bytes = 0
+        self.server.max_tokens = Counter()
+
+    def summary(self):
+        return {'requests': self.server.requests, 'prompt_bytes': self.server.prompt_bytes}
+
+class StubTwitterServer(StubServer):
+    # base_url se pasa a TwitterAPI o TWITTER_API_BASE_URL
+    handler = StubTwitterHandler
+
+    def __init__(self, tweets_per_user=250, latency=0.0, fail_next=0):
+        super().__init__(latency, fail_next)
+        self.server.tweets_per_user = tweets_per_user
+        self.server.lookup_batches = []
+        self.server.pages = Counter()
+        self.server.query_params = []
+
+    def summary(self):
+        return {'requests': self.server.requests, 'lookup_batches': list(self.server.lookup_batches),
+                'pages': sum(self.server.pages.values())}
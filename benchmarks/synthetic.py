@@ -0,0 +1,237 @@
+# synthetic.py
+# Generador reproducible de tweets sintéticos con hashtags, menciones, URLs, retweets,
+# idiomas y marcas de tiempo con ciclo diario, en la forma de los archivos JSON y en la
+# de los objetos de tweepy que produce TwitterAPI ({'tweet': Tweet, 'user': User}).
+# Uso: python benchmarks/synthetic.py --size 1M --output data/sintetico_1M.ndjson [--seed N]
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+SIZES = {'10k': 10000, '100k': 100000, '1M': 1000000, '10M': 10000000}
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 10000
+
+START_EPOCH = 1730419200  # 2024-11-01 00:00 UTC
+SPAN_DAYS = 30
+FIRST_TWEET_ID = 1850000000000000000
+TWEETS_PER_USER = 50  # Usuarios distintos: tamaño / TWEETS_PER_USER (mínimo MIN_USERS)
+MIN_USERS = 100
+HASHTAG_POOL = 5000
+
+LANGUAGES = ['es', 'en', 'pt', 'fr', 'und']
+LANGUAGE_WEIGHTS = [0.50, 0.35, 0.08, 0.04, 0.03]
+# Actividad relativa por hora (UTC): valle de madrugada y picos a media mañana y por la noche
+HOURLY_ACTIVITY = np.array([3, 2, 1, 1, 1, 2, 4, 6, 8, 9, 10, 10, 9, 9, 9, 9, 10, 11, 12, 13, 12, 10, 7, 5], dtype=float)
+RETWEET_RATE = 0.2
+URL_RATE = 0.3
+VERIFIED_RATE = 0.02
+SENTIMENT_RATE = 0.6  # Tweets con una palabra de polaridad conocida
+
+WORDS = {
+    'es': ['hoy', 'nuevo', 'datos', 'equipo', 'proyecto', 'gracias', 'semana', 'mercado', 'gobierno', 'ciudad',
+           'partido', 'noticia', 'análisis', 'tecnología', 'futuro', 'gente', 'mundo', 'vida', 'trabajo', 'año'],
+    'en': ['today', 'new', 'data', 'team', 'project', 'thanks', 'week', 'market', 'release', 'city',
+           'game', 'news', 'analysis', 'technology', 'future', 'people', 'world', 'life', 'work', 'year']
+}
+# Palabras con polaridad en el léxico de TextBlob, para que el sentimiento no sea siempre 0
+SENTIMENT_WORDS = ['good', 'great', 'amazing', 'happy', 'love', 'best', 'bad', 'terrible', 'awful', 'sad',
+                   'worst', 'boring', 'interesting', 'excellent', 'poor']
+LOCATIONS = ['Madrid', 'Buenos Aires', 'Ciudad de México', 'Bogotá', 'Santiago', 'New York', 'London',
+             'São Paulo', 'Paris', None, None, None]
+SYLLABLES = ['ma', 'ri', 'to', 'lu', 'ca', 'ne', 'so', 'da', 'vi', 'pe', 'ra', 'jo', 'ki', 'la', 'mo', 'xe']
+URL_ALPHABET = np.array(list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'))
+
+def parse_size(value):
+    return SIZES.get(value) or int(value)
+
+def zipf_weights(count, exponent=1.1):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+class SyntheticCorpus:
+    # Los lotes se generan en orden con un único generador de NumPy sembrado: para la misma
+    # semilla, tamaño y tamaño de lote, el corpus es idéntico en cada ejecución
+    def __init__(self, size, seed=DEFAULT_SEED, batch_size=DEFAULT_BATCH_SIZE):
+        self.size = size
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.n_users = max(MIN_USERS, size // TWEETS_PER_USER)
+        self.user_weights = zipf_weights(self.n_users)
+        self.hashtag_weights = zipf_weights(HASHTAG_POOL)
+        self.hour_weights = HOURLY_ACTIVITY / HOURLY_ACTIVITY.sum()
+        self.users = self.build_users()
+        self.hashtags = [self.hashtag_name(index) for index in range(HASHTAG_POOL)]
+        self.api_users = {}
+        # Autor de cada tweet generado, para atribuir los retweets al autor del original
+        self.authors = np.zeros(size, dtype=np.int32)
+
+    def build_users(self):
+        rng = self.rng
+        followers = rng.lognormal(5, 2.2, self.n_users).astype(np.int64)
+        verified = rng.random(self.n_users) < VERIFIED_RATE
+        locations = rng.integers(0, len(LOCATIONS), self.n_users)
+        users = []
+        for index in range(self.n_users):
+            syllables = rng.integers(0, len(SYLLABLES), 3)
+            username = ''.join(SYLLABLES[s] for s in syllables) + f"_{index}"
+            users.append({
+                'usuario_id': str(100000 + index),
+                'nombre_usuario': username[:15],
+                'seguidores': int(followers[index]),
+                'ubicacion': LOCATIONS[locations[index]],
+                'verificado': bool(verified[index])
+            })
+        return users
+
+    def hashtag_name(self, index):
+        word = WORDS['es' if index % 2 else 'en'][index % len(WORDS['en'])]
+        return word if index < len(WORDS['en']) * 2 else f"{word}{index}"
+
+    def iter_batches(self):
+        # Produce listas de diccionarios con la forma de los archivos JSON/NDJSON
+        for start in range(0, self.size, self.batch_size):
+            yield self.generate_batch(start, min(self.batch_size, self.size - start))
+
+    def generate_batch(self, start, count):
+        rng = self.rng
+        authors = rng.choice(self.n_users, count, p=self.user_weights)
+        self.authors[start:start + count] = authors
+        langs = rng.choice(len(LANGUAGES), count, p=LANGUAGE_WEIGHTS)
+        n_words = rng.integers(6, 18, count)
+        n_hashtags = rng.choice(4, count, p=[0.45, 0.3, 0.17, 0.08])
+        n_mentions = rng.choice(3, count, p=[0.55, 0.35, 0.1])
+        has_url = rng.random(count) < URL_RATE
+        is_retweet = rng.random(count) < RETWEET_RATE
+        has_sentiment = rng.random(count) < SENTIMENT_RATE
+        # Días repartidos de forma uniforme en orden (los ids crecen con el tiempo) y hora
+        # según la actividad diaria
+        days = (np.arange(start, start + count) * SPAN_DAYS) // max(self.size, 1)
+        hours = rng.choice(24, count, p=self.hour_weights)
+        epochs = START_EPOCH + days * 86400 + hours * 3600 + rng.integers(0, 3600, count)
+        retweets = rng.poisson(np.where(is_retweet, 0, 4))
+        likes = rng.poisson(15, count)
+
+        total_words = int(n_words.sum())
+        word_draws = rng.integers(0, len(WORDS['en']), total_words)
+        hashtag_draws = rng.choice(HASHTAG_POOL, int(n_hashtags.sum()), p=self.hashtag_weights)
+        mention_draws = rng.choice(self.n_users, int(n_mentions.sum()), p=self.user_weights)
+        sentiment_draws = rng.integers(0, len(SENTIMENT_WORDS), count)
+        url_draws = URL_ALPHABET[rng.integers(0, len(URL_ALPHABET), (count, 10))]
+        # Los retweets apuntan a un tweet anterior, con preferencia por los recientes
+        ref_offsets = rng.integers(1, 1000, count)
+
+        records = []
+        word_pos = hashtag_pos = mention_pos = 0
+        for i in range(count):
+            author = self.users[authors[i]]
+            lang = LANGUAGES[langs[i]]
+            vocabulary = WORDS.get(lang, WORDS['en'])
+            words = [vocabulary[w] for w in word_draws[word_pos:word_pos + n_words[i]]]
+            word_pos += n_words[i]
+            if has_sentiment[i]:
+                words.insert(len(words) // 2, SENTIMENT_WORDS[sentiment_draws[i]])
+            for h in hashtag_draws[hashtag_pos:hashtag_pos + n_hashtags[i]]:
+                words.append('#' + self.hashtags[h])
+            hashtag_pos += n_hashtags[i]
+            for m in mention_draws[mention_pos:mention_pos + n_mentions[i]]:
+                words.insert(0, '@' + self.users[m]['nombre_usuario'])
+            mention_pos += n_mentions[i]
+            if has_url[i]:
+                words.append('https://t.co/' + ''.join(url_draws[i]))
+            referenced = []
+            index = start + i
+            if is_retweet[i] and index > 0:
+                ref_index = max(0, index - int(ref_offsets[i]))
+                referenced = [str(FIRST_TWEET_ID + ref_index)]
+                original = self.users[self.authors[ref_index]]
+                words.insert(0, f"RT @{original['nombre_usuario']}:")
+            records.append({
+                'tweet_id': str(FIRST_TWEET_ID + index),
+                'usuario_id': author['usuario_id'],
+                'nombre_usuario': author['nombre_usuario'],
+                'contenido': ' '.join(words),
+                'fecha_hora': datetime.fromtimestamp(int(epochs[i]), tz=timezone.utc).isoformat(),
+                'retweets': int(retweets[i]),
+                'likes': int(likes[i]),
+                'seguidores': author['seguidores'],
+                'ubicacion': author['ubicacion'],
+                'verificado': author['verificado'],
+                'lang': lang,
+                'referenced_tweets': referenced
+            })
+        return records
+
+    def to_api(self, records):
+        # Misma información con los objetos de tweepy que devuelve TwitterAPI; los usuarios
+        # se comparten entre sus tweets, como en las páginas de la API
+        import tweepy
+        items = []
+        for record in records:
+            user = self.api_users.get(record['usuario_id'])
+            if user is None:
+                user = tweepy.User({
+                    'id': record['usuario_id'],
+                    'name': record['nombre_usuario'],
+                    'username': record['nombre_usuario'],
+                    'location': record['ubicacion'],
+                    'verified': record['verificado'],
+                    'public_metrics': {'followers_count': record['seguidores'], 'following_count': 0,
+                                       'tweet_count': 0, 'listed_count': 0}
+                })
+                self.api_users[record['usuario_id']] = user
+            data = {
+                'id': record['tweet_id'],
+                'text': record['contenido'],
+                'edit_history_tweet_ids': [record['tweet_id']],
+                'author_id': record['usuario_id'],
+                'created_at': record['fecha_hora'].replace('+00:00', '.000Z'),
+                'lang': record['lang'],
+                'public_metrics': {'retweet_count': record['retweets'], 'like_count': record['likes'],
+                                   'reply_count': 0, 'quote_count': 0}
+            }
+            if record['referenced_tweets']:
+                data['referenced_tweets'] = [{'type': 'retweeted', 'id': ref} for ref in record['referenced_tweets']]
+            items.append({'tweet': tweepy.Tweet(data), 'user': user})
+        return items
+
+def write_corpus(corpus, path):
+    # .json: arreglo JSON de nivel superior; cualquier otra extensión: NDJSON
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    as_array = path.endswith('.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        first = True
+        if as_array:
+            f.write('[')
+        for batch in corpus.iter_batches():
+            for record in batch:
+                if as_array:
+                    f.write('\n' if first else ',\n')
+                f.write(json.dumps(record, ensure_ascii=False))
+                if not as_array:
+                    f.write('\n')
+                first = False
+        if as_array:
+            f.write('\n]\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='Generador de tweets sintéticos')
+    parser.add_argument('--size', type=str, default='10k', help=f"Número de tweets o uno de {', '.join(SIZES)}")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', type=str, required=True, help='Archivo de salida (.json o .ndjson)')
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    start_time = time.perf_counter()
+    write_corpus(SyntheticCorpus(size, seed=args.seed), args.output)
+    elapsed = time.perf_counter() - start_time
+    print(f"{size} tweets escritos en '{args.output}' en {elapsed:.1f} s ({os.path.getsize(args.output)} bytes)")
+
+if __name__ == '__main__':
+    main()
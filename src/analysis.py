@@ -4,6 +4,48 @@ from colorama import Fore, Style
 import sqlite3
 import traceback
 
+# Consultas que dependen de los índices del esquema (ver MIGRATIONS en sqlite_db.py)
+TOP_USERS_QUERY = """
+SELECT nombre_usuario, seguidores FROM usuarios
+ORDER BY seguidores DESC
+LIMIT 5
+"""
+
+RECENT_ACTIVITY_QUERY = """
+SELECT COUNT(*), AVG(sentimiento) FROM tweets
+WHERE fecha_epoch >= (SELECT MAX(fecha_epoch) FROM tweets) - ?
+"""
+
+# Hashtags: el periodo se lee como un rango de idx_tweet_hashtags_fecha (el planificador
+# preferiría recorrer todo el índice por hashtag para agrupar sin ordenar) y los pares
+# se buscan por la clave primaria (tweet_id, hashtag_id); el texto se une al final
+TOP_HASHTAGS_QUERY = """
+SELECT h.texto, c.usos FROM (
+    SELECT hashtag_id, COUNT(*) AS usos FROM tweet_hashtags INDEXED BY idx_tweet_hashtags_fecha
+    WHERE fecha_epoch >= (SELECT MAX(fecha_epoch) FROM tweets) - ?
+    GROUP BY hashtag_id
+    ORDER BY usos DESC
+    LIMIT ?
+) c JOIN hashtags h ON h.hashtag_id = c.hashtag_id
+ORDER BY c.usos DESC, h.texto
+"""
+
+HASHTAG_COOCCURRENCE_QUERY = """
+SELECT ha.texto, hb.texto, c.veces FROM (
+    SELECT a.hashtag_id AS hashtag_a, b.hashtag_id AS hashtag_b, COUNT(*) AS veces
+    FROM tweet_hashtags a
+    JOIN tweet_hashtags b ON b.tweet_id = a.tweet_id AND b.hashtag_id > a.hashtag_id
+    GROUP BY a.hashtag_id, b.hashtag_id
+    ORDER BY veces DESC
+    LIMIT ?
+) c JOIN hashtags ha ON ha.hashtag_id = c.hashtag_a
+JOIN hashtags hb ON hb.hashtag_id = c.hashtag_b
+ORDER BY c.veces DESC, ha.texto, hb.texto
+"""
+
+RECENT_DAYS = 7
+TOP_HASHTAGS = 10
+
 class Analyzer:
     def __init__(self, sqlite_db, neo4j_db):
         self.sqlite_db = sqlite_db
@@ -14,17 +56,21 @@ class Analyzer:
         self.sentiment_analysis()
         self.top_influential_users()
         self.trend_over_time()
+        self.recent_activity()
+        self.top_hashtags()
+        self.hashtag_cooccurrence()
 
     def sentiment_analysis(self):
         try:
             cursor = self.sqlite_db.connection.cursor()
+            # Agregado mantenido en cada inserción: O(usuarios) en lugar de O(tweets)
             query = """
-            SELECT sentimiento FROM tweets
+            SELECT SUM(suma_sentimiento), SUM(conteo_sentimiento) FROM resumen_usuario
             """
             cursor.execute(query)
-            sentiments = [row[0] for row in cursor.fetchall()]
-            if len(sentiments) > 0:
-                avg_sentiment = sum(sentiments) / len(sentiments)
+            total, count = cursor.fetchone()
+            if count:
+                avg_sentiment = total / count
                 print(Fore.CYAN + f"Sentimiento promedio: {avg_sentiment:.2f}" + Style.RESET_ALL)
             else:
                 print(Fore.YELLOW + "No hay suficientes datos para calcular el sentimiento promedio." + Style.RESET_ALL)
@@ -35,12 +81,7 @@ class Analyzer:
     def top_influential_users(self):
         try:
             cursor = self.sqlite_db.connection.cursor()
-            query = """
-            SELECT nombre_usuario, seguidores FROM usuarios
-            ORDER BY seguidores DESC
-            LIMIT 5
-            """
-            cursor.execute(query)
+            cursor.execute(TOP_USERS_QUERY)
             results = cursor.fetchall()
             if results:
                 print(Fore.CYAN + "Usuarios más influyentes:" + Style.RESET_ALL)
@@ -56,9 +97,8 @@ class Analyzer:
         try:
             cursor = self.sqlite_db.connection.cursor()
             query = """
-            SELECT substr(fecha_hora, 1, 10) as date, COUNT(*) as count FROM tweets
-            GROUP BY date
-            ORDER BY date
+            SELECT fecha, tweets FROM resumen_diario
+            ORDER BY fecha
             """
             cursor.execute(query)
             results = cursor.fetchall()
@@ -71,3 +111,82 @@ class Analyzer:
         except Exception as e:
             print(Fore.RED + f"Error en análisis temporal: {e}" + Style.RESET_ALL)
             traceback.print_exc()
+
+    def recent_activity(self, days=RECENT_DAYS):
+        try:
+            # Rango sobre el índice de fecha_epoch, relativo al tweet más reciente
+            cursor = self.sqlite_db.connection.cursor()
+            cursor.execute(RECENT_ACTIVITY_QUERY, (days * 86400,))
+            count, avg_sentiment = cursor.fetchone()
+            if count:
+                print(Fore.CYAN + f"Últimos {days} días: {count} tweets con sentimiento promedio {avg_sentiment:.2f}" + Style.RESET_ALL)
+            else:
+                print(Fore.YELLOW + "No hay tweets recientes con fecha registrada." + Style.RESET_ALL)
+        except Exception as e:
+            print(Fore.RED + f"Error en análisis de actividad reciente: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+
+    def top_hashtags(self, days=RECENT_DAYS, limit=TOP_HASHTAGS):
+        try:
+            cursor = self.sqlite_db.connection.cursor()
+            cursor.execute(TOP_HASHTAGS_QUERY, (days * 86400, limit))
+            results = cursor.fetchall()
+            if results:
+                print(Fore.CYAN + f"Hashtags más usados en los últimos {days} días:" + Style.RESET_ALL)
+                for texto, usos in results:
+                    print(f"- #{texto}: {usos} tweets")
+            else:
+                print(Fore.YELLOW + "No hay hashtags recientes registrados." + Style.RESET_ALL)
+        except Exception as e:
+            print(Fore.RED + f"Error en análisis de hashtags: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+
+    def hashtag_cooccurrence(self, limit=TOP_HASHTAGS):
+        try:
+            cursor = self.sqlite_db.connection.cursor()
+            cursor.execute(HASHTAG_COOCCURRENCE_QUERY, (limit,))
+            results = cursor.fetchall()
+            if results:
+                print(Fore.CYAN + "Hashtags que aparecen juntos con más frecuencia:" + Style.RESET_ALL)
+                for texto_a, texto_b, veces in results:
+                    print(f"- #{texto_a} + #{texto_b}: {veces} tweets")
+            else:
+                print(Fore.YELLOW + "No hay tweets con varios hashtags." + Style.RESET_ALL)
+        except Exception as e:
+            print(Fore.RED + f"Error en análisis de coocurrencia de hashtags: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+
+    def advanced_statistics(self):
+        # Percentiles, interacción, mapa de calor y medias móviles en una pasada con NumPy
+        from vector_analysis import VectorAnalyzer
+        return VectorAnalyzer(self.sqlite_db).report()
+
+    def influence_ranking(self, source='sqlite'):
+        # PageRank y centralidad de grado sobre el grafo de menciones y retweets; complementa
+        # el ranking por seguidores de top_influential_users
+        from influence import InfluenceEngine
+        try:
+            engine = InfluenceEngine(self.sqlite_db, self.neo4j_db, source=source)
+        except Exception as e:
+            print(Fore.RED + f"Error en el ranking de influencia: {e}" + Style.RESET_ALL)
+            return None
+        return engine.report()
+
+    def explain_query_plans(self):
+        # Muestra el plan de ejecución de las consultas que deben usar índices
+        try:
+            cursor = self.sqlite_db.connection.cursor()
+            print(Fore.BLUE + "Planes de ejecución de las consultas del análisis:" + Style.RESET_ALL)
+            for name, query, params in [
+                ("Usuarios más influyentes", TOP_USERS_QUERY, ()),
+                ("Actividad reciente", RECENT_ACTIVITY_QUERY, (RECENT_DAYS * 86400,)),
+                ("Hashtags más usados", TOP_HASHTAGS_QUERY, (RECENT_DAYS * 86400, TOP_HASHTAGS)),
+                ("Coocurrencia de hashtags", HASHTAG_COOCCURRENCE_QUERY, (TOP_HASHTAGS,))
+            ]:
+                cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+                print(Fore.CYAN + f"{name}:" + Style.RESET_ALL)
+                for row in cursor.fetchall():
+                    print(f"  {row[-1]}")
+        except Exception as e:
+            print(Fore.RED + f"Error al obtener los planes de ejecución: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
@@ -0,0 +1,138 @@
+# columnar.py
+
+from datetime import datetime
+import inspect
+from records import TweetRecord
+from colorama import Fore, Style
+import os
+import traceback
+
+COLUMNAR_EXTENSIONS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+TEXT_COLUMNS = ('contenido', 'ubicacion')  # Columnas de texto libre que se pueden omitir al cargar
+DEFAULT_ROW_GROUP_SIZE = 50000
+# Sólo se leen las columnas que acepta el constructor de TweetRecord (no todos sus slots lo son)
+RECORD_FIELDS = frozenset(inspect.signature(TweetRecord).parameters)
+
+def is_columnar_file(filename):
+    return os.path.splitext(filename)[1].lower() in COLUMNAR_EXTENSIONS
+
+# pyarrow es opcional y se importa sólo al exportar o cargar archivos columnares
+pa = None
+pq = None
+
+def require_pyarrow():
+    global pa, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("pyarrow no está instalado; instálelo con 'pip install pyarrow' para usar archivos Parquet/Arrow")
+    pa, pq = pyarrow, pyarrow.parquet
+
+def tweet_schema():
+    require_pyarrow()
+    return pa.schema([
+        ('tweet_id', pa.string()),
+        ('usuario_id', pa.string()),
+        ('nombre_usuario', pa.string()),
+        ('contenido', pa.string()),
+        ('fecha_hora', pa.timestamp('us', tz='UTC')),
+        ('retweets', pa.int64()),
+        ('likes', pa.int64()),
+        ('seguidores', pa.int64()),
+        ('ubicacion', pa.string()),
+        ('verificado', pa.bool_()),
+        ('lang', pa.string()),
+        ('referenced_tweets', pa.list_(pa.string())),
+        ('sentimiento', pa.float64())
+    ])
+
+def parse_fecha(fecha_hora):
+    return datetime.fromisoformat(fecha_hora) if fecha_hora else None
+
+class ColumnarWriter:
+    # Escribe los registros normalizados (con su sentimiento) en Parquet o Arrow IPC,
+    # un grupo de filas por lote, sin acumular el corpus en memoria
+    def __init__(self, filename, directory='data'):
+        require_pyarrow()
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.file_path = os.path.join(directory, filename)
+        self.format = COLUMNAR_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if self.format is None:
+            raise Exception(f"Extensión no soportada para exportar: '{filename}' (use .parquet, .arrow o .feather)")
+        self.schema = tweet_schema()
+        self.writer = None
+        self.rows = 0
+
+    def open(self):
+        if self.format == 'parquet':
+            return pq.ParquetWriter(self.file_path, self.schema, compression='zstd')
+        return pa.ipc.new_file(self.file_path, self.schema)
+
+    def to_batch(self, records):
+        columns = {field: [getattr(record, field) for record in records] for field in self.schema.names}
+        columns['fecha_hora'] = [parse_fecha(fecha_hora) for fecha_hora in columns['fecha_hora']]
+        columns['referenced_tweets'] = [list(refs) for refs in columns['referenced_tweets']]
+        return pa.RecordBatch.from_pydict(columns, schema=self.schema)
+
+    def write(self, records):
+        try:
+            if not records:
+                return
+            if self.writer is None:
+                self.writer = self.open()
+            batch = self.to_batch(records)
+            if self.format == 'parquet':
+                self.writer.write_batch(batch, row_group_size=DEFAULT_ROW_GROUP_SIZE)
+            else:
+                self.writer.write_batch(batch)
+            self.rows += len(records)
+        except Exception as e:
+            print(Fore.RED + f"Error al exportar tweets a '{self.file_path}': {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        size = os.path.getsize(self.file_path)
+        print(Fore.GREEN + f"{self.rows} tweets exportados a '{self.file_path}' ({size} bytes)." + Style.RESET_ALL)
+
+class ColumnarReader:
+    # Lee Parquet o Arrow IPC mapeados en memoria, leyendo sólo las columnas solicitadas
+    def __init__(self, file_path):
+        require_pyarrow()
+        self.file_path = file_path
+        self.format = COLUMNAR_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+    def available_columns(self, schema, skip_text):
+        return [name for name in schema.names
+                if name in RECORD_FIELDS and not (skip_text and name in TEXT_COLUMNS)]
+
+    def iter_arrow_batches(self, batch_size, skip_text):
+        if self.format == 'parquet':
+            parquet_file = pq.ParquetFile(self.file_path, memory_map=True)
+            columns = self.available_columns(parquet_file.schema_arrow, skip_text)
+            yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+            return
+        with pa.memory_map(self.file_path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            columns = self.available_columns(reader.schema, skip_text)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index).select(columns)
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield batch.slice(offset, batch_size)
+
+    def iter_batches(self, batch_size, skip_text=False):
+        # Produce listas de TweetRecord; el sentimiento y la fecha llegan ya tipados
+        for batch in self.iter_arrow_batches(batch_size, skip_text):
+            columns = batch.to_pydict()
+            if 'fecha_hora' in columns:
+                columns['fecha_hora'] = [fecha.isoformat() if fecha else None for fecha in columns['fecha_hora']]
+            names = list(columns)
+            yield [TweetRecord(**dict(zip(names, values))) for values in zip(*columns.values())]
@@ -0,0 +1,150 @@
+# dedup.py
+
+import hashlib
+import re
+from colorama import Fore, Style
+from utils import lazy_import
+
+np = lazy_import('numpy')
+
+SHINGLE_SIZE = 5  # Caracteres por shingle
+NUM_PERMUTATIONS = 64
+# LSH: 8 bandas de 8 filas, con umbral efectivo (1/8)^(1/8) ≈ 0.77, justo por debajo de
+# NEAR_DUPLICATE_THRESHOLD; los candidatos se verifican con la firma completa
+BANDS = 8
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Similitud de Jaccard estimada a partir de la cual dos tweets son casi idénticos
+SIGNATURE_CHUNK_SHINGLES = 1 << 16  # Shingles por pasada vectorizada: limita la matriz temporal a 64 x 65536
+INITIAL_CAPACITY = 1024  # Filas iniciales de la matriz de firmas de representantes
+# Primo menor que 2^32: con a, b, h < p, a * h + b < p^2 < 2^64 y el producto no desborda uint64
+HASH_PRIME = (1 << 32) - 5
+SHINGLE_MULTIPLIER = 1000003  # Base del hash polinómico de cada shingle
+SEED = 1
+
+RETWEET_PREFIX = re.compile(r'^rt @\w+:\s*')
+URL_PATTERN = re.compile(r'https?://\S+')
+NON_WORD_PATTERN = re.compile(r'[^\w#@]+')
+
+def normalize_content(contenido):
+    # Texto comparable: minúsculas, sin prefijo "RT @usuario:", sin URLs ni puntuación
+    text = RETWEET_PREFIX.sub('', (contenido or '').lower())
+    text = URL_PATTERN.sub(' ', text)
+    return NON_WORD_PATTERN.sub(' ', text).strip()
+
+class Deduplicator:
+    # Agrupa los duplicados exactos por hash del contenido normalizado y los casi duplicados
+    # con MinHash + LSH. Ningún tweet se descarta: todos llegan a las bases de datos, y los
+    # duplicados sólo enlazan en 'representante' el contenido de su grupo para no repetir el
+    # sentimiento ni el resumen. Cada grupo conserva su tweet representativo y su tamaño.
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        rng = np.random.default_rng(SEED)
+        self.perm_a = rng.integers(1, HASH_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+        self.perm_b = rng.integers(0, HASH_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+        self.exact = {}  # hash del contenido normalizado -> índice del representante
+        self.buckets = [{} for _ in range(BANDS)]  # banda -> firma parcial -> índices de representantes
+        # Firmas de los representantes en una matriz contigua que crece al doble al llenarse
+        self.signatures = np.empty((INITIAL_CAPACITY, NUM_PERMUTATIONS), dtype=np.uint32)
+        self.representatives = []  # (tweet_id, contenido) por índice
+        self.group_sizes = {}  # tweet_id representativo -> tweets del grupo
+        self.seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def signatures_for(self, texts):
+        # Firmas de todo un lote en una matriz (textos x permutaciones). Los textos se
+        # concatenan como puntos de código y cada shingle se resume con un hash polinómico
+        # calculado a la vez para todas las ventanas; los shingles repetidos no cambian el
+        # mínimo, por lo que no hace falta agruparlos. Los textos más cortos que un shingle
+        # se rellenan con '\0', que normalize_content nunca deja en el texto.
+        padded = [text.ljust(SHINGLE_SIZE, '\0') for text in texts]
+        lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+        codes = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        windows = len(codes) - SHINGLE_SIZE + 1
+        hashes = np.zeros(windows, dtype=np.uint64)
+        for offset in range(SHINGLE_SIZE):
+            hashes = hashes * SHINGLE_MULTIPLIER + codes[offset:offset + windows]
+        hashes = (hashes ^ (hashes >> 32)) % HASH_PRIME
+        # Sólo las ventanas que empiezan y terminan dentro del mismo texto
+        counts = lengths - SHINGLE_SIZE + 1
+        starts = np.concatenate(([0], np.cumsum(counts)))
+        hashes = hashes[np.repeat(np.cumsum(lengths) - lengths - starts[:-1], counts) + np.arange(starts[-1])]
+
+        signatures = np.empty((len(texts), NUM_PERMUTATIONS), dtype=np.uint32)
+        first = 0
+        while first < len(texts):
+            # Tantos textos como quepan en SIGNATURE_CHUNK_SHINGLES (al menos uno)
+            last = int(np.searchsorted(starts, starts[first] + SIGNATURE_CHUNK_SHINGLES, 'right')) - 1
+            last = min(max(last, first + 1), len(texts))
+            chunk = hashes[starts[first]:starts[last]]
+            # Una permutación por fila: (a * h + b) mod p, exacta en uint64; mínimo por texto
+            permuted = (np.outer(self.perm_a, chunk) + self.perm_b[:, None]) % HASH_PRIME
+            signatures[first:last] = np.minimum.reduceat(permuted, starts[first:last] - starts[first], axis=1).T
+            first = last
+        return signatures
+
+    def find_similar(self, signature):
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+            candidates.update(bucket.get(key, ()))
+        if not candidates:
+            return None
+        indexes = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        similarities = (self.signatures[indexes] == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        return int(indexes[best]) if similarities[best] >= self.threshold else None
+
+    def add_representative(self, record, signature):
+        index = len(self.representatives)
+        if index == len(self.signatures):
+            grown = np.empty((2 * index, NUM_PERMUTATIONS), dtype=np.uint32)
+            grown[:index] = self.signatures
+            self.signatures = grown
+        self.signatures[index] = signature
+        self.representatives.append((record.tweet_id, record.contenido))
+        for band, bucket in enumerate(self.buckets):
+            key = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+            bucket.setdefault(key, []).append(index)
+
+    def process(self, records):
+        # Devuelve todos los registros; los duplicados exactos y los casi duplicados conservan
+        # en 'representante' el contenido del tweet con el que coinciden
+        texts = [normalize_content(record.contenido) for record in records]
+        hashes = [hashlib.sha1(text.encode('utf-8')).hexdigest() if text else None for text in texts]
+        # Sólo se firman los contenidos nuevos, una vez cada uno, en una sola pasada por lote
+        pending = {}
+        for text, content_hash in zip(texts, hashes):
+            if content_hash and content_hash not in self.exact and content_hash not in pending:
+                pending[content_hash] = text
+        signatures = dict(zip(pending, self.signatures_for(list(pending.values())))) if pending else {}
+        for record, content_hash in zip(records, hashes):
+            self.seen += 1
+            if content_hash is None:
+                continue
+            if content_hash in self.exact:
+                representative_id, representative_content = self.representatives[self.exact[content_hash]]
+                record.representante = representative_content
+                # El mismo tweet visto otra vez (p. ej. en dos archivos) no cuenta como copia
+                if record.tweet_id != representative_id:
+                    self.exact_duplicates += 1
+                    self.group_sizes[representative_id] += 1
+                continue
+            signature = signatures[content_hash]
+            match = self.find_similar(signature)
+            if match is None:
+                self.exact[content_hash] = len(self.representatives)
+                self.group_sizes[record.tweet_id] = 1
+                self.add_representative(record, signature)
+            else:
+                representative_id, representative_content = self.representatives[match]
+                self.exact[content_hash] = match
+                self.group_sizes[representative_id] += 1
+                record.representante = representative_content
+                self.near_duplicates += 1
+        return records
+
+    def report(self):
+        groups = sum(1 for size in self.group_sizes.values() if size > 1)
+        print(Fore.CYAN + f"Deduplicación: {self.seen} tweets, {self.exact_duplicates} duplicados exactos, "
+              f"{self.near_duplicates} casi duplicados en {groups} grupos." + Style.RESET_ALL)
@@ -0,0 +1,32 @@
+# entities.py
+
+import re
+
+# Una sola expresión compilada recorre el texto una vez. Las URL van primero para que
+# los fragmentos (#seccion) o rutas con @ no se confundan con hashtags o menciones.
+# Un hashtag o mención no puede ir pegado a una palabra (correos, "a#b"), pero sí a
+# la puntuación: "(#python," y "@usuario:" se reconocen.
+ENTITY_PATTERN = re.compile(r"""
+    (?P<url>https?://[^\s<>"]+[^\s<>".,;:!?)\]'])
+  | (?<![\w&/#])\#(?P<hashtag>\w*[^\W\d]\w*)
+  | (?<![\w@/])@(?P<mention>\w{1,15})(?!\w)
+""", re.VERBOSE)
+
+NO_ENTITIES = ((), (), ())
+
+def extract_entities(contenido):
+    # Devuelve (hashtags, menciones, urls) sin repetidos y en orden de aparición.
+    # Hashtags y menciones conservan la forma escrita: es la clave de los nodos Hashtag ya
+    # guardados en Neo4j y las menciones deben coincidir con nombre_usuario.
+    if not contenido or not ('#' in contenido or '@' in contenido or '://' in contenido):
+        return NO_ENTITIES
+    hashtags, mentions, urls = {}, {}, {}
+    for match in ENTITY_PATTERN.finditer(contenido):
+        kind = match.lastgroup
+        if kind == 'hashtag':
+            hashtags[match.group(kind)] = None
+        elif kind == 'mention':
+            mentions[match.group(kind)] = None
+        else:
+            urls[match.group(kind)] = None
+    return tuple(hashtags), tuple(mentions), tuple(urls)
@@ -0,0 +1,228 @@
+# http_client.py
+
+import email.utils
+import random
+import re
+import threading
+import time
+from colorama import Fore, Style
+from utils import lazy_import
+from instrumentation import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 2  # Segundos del primer reintento antes del jitter
+DEFAULT_BACKOFF_CAP = 60
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30
+DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+requests = lazy_import('requests')
+
+def parse_duration(value):
+    # Duraciones como las de OpenAI: "1s", "250ms", "6m0s"
+    matches = DURATION_PATTERN.findall(value or '')
+    if not matches:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in matches)
+
+def retry_after_seconds(headers):
+    # Tiempo de espera indicado por el servidor, si existe
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        if retry_after.strip().isdigit():
+            return float(retry_after)
+        parsed = email.utils.parsedate_to_datetime(retry_after)
+        if parsed:
+            return max(parsed.timestamp() - time.time(), 0)
+    reset_time = headers.get('x-rate-limit-reset')
+    if reset_time:
+        return max(int(reset_time) - time.time(), 0) + 1
+    return parse_duration(headers.get('x-ratelimit-reset-requests'))
+
+class CircuitOpenError(Exception):
+    pass
+
+class RateLimitBudget:
+    # Presupuesto compartido entre hilos a partir de las cabeceras de límite de tasa.
+    # Se espera antes de agotar el límite en lugar de reaccionar a un 429.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = {}
+        self.reset = {}
+
+    def acquire(self, endpoint):
+        while True:
+            with self.lock:
+                remaining = self.remaining.get(endpoint)
+                reset_time = self.reset.get(endpoint, 0)
+                now = time.time()
+                if remaining is None or remaining > 0 or reset_time <= now:
+                    if remaining is not None:
+                        # Reservar la llamada para que otros hilos no sobrepasen el límite
+                        self.remaining[endpoint] = remaining - 1 if reset_time > now else None
+                    return
+                wait_time = reset_time - now
+            print(Fore.YELLOW + f"Límite de tasa agotado para {endpoint}. Esperando {wait_time + 1:.0f} segundos..." + Style.RESET_ALL)
+            time.sleep(wait_time + 1)
+
+    def update(self, endpoint, headers):
+        # Cabeceras de Twitter (x-rate-limit-*) o de OpenAI (x-ratelimit-*-requests)
+        remaining = headers.get('x-rate-limit-remaining', headers.get('x-ratelimit-remaining-requests'))
+        if headers.get('x-rate-limit-reset') is not None:
+            reset_time = int(headers['x-rate-limit-reset'])
+        else:
+            reset_in = parse_duration(headers.get('x-ratelimit-reset-requests'))
+            reset_time = time.time() + reset_in if reset_in is not None else None
+        if remaining is None or reset_time is None:
+            return
+        with self.lock:
+            self.remaining[endpoint] = int(remaining)
+            self.reset[endpoint] = reset_time
+
+class CircuitBreaker:
+    # Tras varios fallos consecutivos deja de enviar solicitudes durante reset_timeout
+    # segundos; después permite una solicitud de prueba (semiabierto)
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+
+    def before_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.time() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Circuito abierto: demasiados fallos consecutivos")
+            # Semiabierto: se deja pasar la solicitud y su resultado decide el estado
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold and self.opened_at is None:
+                self.opened_at = time.time()
+                self.times_opened += 1
+
+class HTTPClient:
+    # Sesión con conexiones persistentes, reintentos iterativos con backoff exponencial
+    # y jitter, respeto de Retry-After y cabeceras de límite de tasa, y circuit breaker
+    def __init__(self, name, headers=None, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP,
+                 timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, rate_limits=None,
+                 circuit_breaker=None):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.rate_limits = rate_limits
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.stats_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies = []
+
+    def backoff(self, attempt):
+        # Full jitter: espera aleatoria entre 0 y el tope exponencial
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def record(self, latency=None, retried=False, failed=False):
+        with self.stats_lock:
+            if latency is not None:
+                self.requests += 1
+                self.latencies.append(latency)
+            if retried:
+                self.retries += 1
+            if failed:
+                self.failures += 1
+        if metrics.enabled:
+            prefix = f"http.{self.name.lower()}"
+            if latency is not None:
+                metrics.count(prefix + '.solicitudes')
+                metrics.observe(prefix + '.latencia', latency)
+            if retried:
+                metrics.count(prefix + '.reintentos')
+            if failed:
+                metrics.count(prefix + '.fallos')
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        endpoint = endpoint or url
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            if self.rate_limits is not None:
+                self.rate_limits.acquire(endpoint)
+            start_time = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self.circuit_breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self.record(failed=True)
+                    raise
+                wait_time = self.backoff(attempt)
+                print(f"Error de solicitud a {self.name}: {e}. Reintento {attempt + 1} en {wait_time:.1f} segundos.")
+            else:
+                self.record(latency=time.perf_counter() - start_time)
+                if self.rate_limits is not None:
+                    self.rate_limits.update(endpoint, response.headers)
+                if response.status_code not in RETRY_STATUSES:
+                    self.circuit_breaker.record_success()
+                    return response
+                if response.status_code != 429:
+                    # Un 429 indica límite de tasa, no un servidor caído
+                    self.circuit_breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self.record(failed=True)
+                    return response
+                wait_time = retry_after_seconds(response.headers)
+                if wait_time is None:
+                    wait_time = self.backoff(attempt)
+                print(f"{self.name} respondió {response.status_code}. Reintento {attempt + 1} en {wait_time:.1f} segundos.")
+            self.record(retried=True)
+            time.sleep(wait_time)
+            attempt += 1
+
+    def stats(self):
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'circuit_opened': self.circuit_breaker.times_opened,
+            'latency_avg': sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95),
+            'latency_max': latencies[-1] if latencies else 0.0
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(Fore.CYAN + f"HTTP {self.name}: {stats['requests']} solicitudes, {stats['retries']} reintentos, "
+              f"{stats['failures']} fallos, circuito abierto {stats['circuit_opened']} veces; latencia media "
+              f"{stats['latency_avg'] * 1000:.0f} ms, p95 {stats['latency_p95'] * 1000:.0f} ms" + Style.RESET_ALL)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,211 @@
+# influence.py
+
+import time
+import traceback
+from colorama import Fore, Style
+from utils import lazy_import
+
+np = lazy_import('numpy')
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10  # Cambio total (norma L1) entre iteraciones para dar por convergido
+PAGERANK_MAX_ITERATIONS = 100
+TOP_INFLUENCERS = 10
+CACHE_BATCH_SIZE = 50000
+INFLUENCE_SOURCES = ('sqlite', 'neo4j')
+
+EDGE_DTYPE = [('origen', 'i8'), ('destino', 'i8')]
+
+# Aristas usuario -> usuario: quien menciona -> mencionado y quien retuitea o cita -> autor
+# del tweet original. Los nombres se comparan en minúsculas, como en Twitter.
+SQLITE_EDGES_QUERY = """
+SELECT lower(u.nombre_usuario), lower(m.nombre_mencionado)
+FROM mentions m JOIN usuarios u ON u.usuario_id = m.usuario_id
+UNION ALL
+SELECT lower(ua.nombre_usuario), lower(ub.nombre_usuario)
+FROM tweet_referencias r
+JOIN tweets a ON a.tweet_id = r.tweet_id
+JOIN tweets b ON b.tweet_id = r.ref_tweet_id
+JOIN usuarios ua ON ua.usuario_id = a.usuario_id
+JOIN usuarios ub ON ub.usuario_id = b.usuario_id
+"""
+# Las tablas de aristas sólo crecen (INSERT OR IGNORE): si sus tamaños y el último tweet no
+# cambian, tampoco cambia el grafo. El último tweet cuenta porque puede completar retweets
+# cuyo original aún no estaba en la base.
+SQLITE_SIGNATURE_QUERY = """
+SELECT (SELECT COUNT(*) FROM mentions), (SELECT COUNT(*) FROM tweet_referencias), (SELECT MAX(rowid) FROM tweets)
+"""
+
+# Exportación en una sola consulta para el grafo ya cargado en Neo4j
+NEO4J_EDGES_QUERY = """
+MATCH (u:Usuario)-[:MENTIONA]->(m:Usuario)
+RETURN toLower(u.nombre_usuario) AS origen, toLower(m.nombre_usuario) AS destino
+UNION ALL
+MATCH (u:Usuario)-[:PUBLICA]->(:Tweet)-[:RETWEETEA]->(:Tweet)<-[:PUBLICA]-(v:Usuario)
+RETURN toLower(u.nombre_usuario) AS origen, toLower(v.nombre_usuario) AS destino
+"""
+# Los recuentos por tipo de relación los resuelve Neo4j con sus estadísticas internas
+NEO4J_SIGNATURE_QUERIES = [
+    "MATCH ()-[r:MENTIONA]->() RETURN count(r)",
+    "MATCH ()-[r:RETWEETEA]->() RETURN count(r)"
+]
+
+TOP_CACHED_QUERY = """
+SELECT nombre_usuario, pagerank, grado_entrada, grado_salida, peso_entrada, seguidores
+FROM influencia
+ORDER BY pagerank DESC
+LIMIT ?
+"""
+
+def build_csr(origins, destinations, n_nodes):
+    # Matriz de adyacencia dispersa en formato CSR (indptr, indices, pesos). Las aristas
+    # repetidas se suman como peso y los bucles (auto-menciones) se descartan.
+    keep = origins != destinations
+    keys, weights = np.unique(origins[keep] * n_nodes + destinations[keep], return_counts=True)
+    rows, indices = np.divmod(keys, n_nodes)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+    return indptr, indices, weights.astype(np.float64)
+
+def pagerank(indptr, indices, weights, damping=PAGERANK_DAMPING,
+             tolerance=PAGERANK_TOLERANCE, max_iterations=PAGERANK_MAX_ITERATIONS):
+    # Iteración de potencias vectorizada: en cada paso, un producto matriz-vector disperso
+    # (bincount sobre los destinos) reparte el rango de cada nodo entre sus aristas de salida
+    # en proporción a su peso. Los nodos sin salidas reparten su rango de forma uniforme.
+    n_nodes = len(indptr) - 1
+    rows = np.repeat(np.arange(n_nodes), np.diff(indptr))
+    out_weight = np.bincount(rows, weights=weights, minlength=n_nodes)
+    edge_share = weights / out_weight[rows]
+    dangling = out_weight == 0
+    rank = np.full(n_nodes, 1.0 / n_nodes)
+    for iteration in range(1, max_iterations + 1):
+        spread = np.bincount(indices, weights=rank[rows] * edge_share, minlength=n_nodes)
+        new_rank = damping * (spread + rank[dangling].sum() / n_nodes) + (1.0 - damping) / n_nodes
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if change < tolerance:
+            break
+    return rank, iteration
+
+class InfluenceEngine:
+    # Ranking de influencia (PageRank y centralidad de grado) sobre el grafo de menciones y
+    # retweets, calculado en memoria sin depender del plugin Graph Data Science de Neo4j.
+    # El resultado se guarda en SQLite y se reutiliza mientras no lleguen aristas nuevas.
+    def __init__(self, sqlite_db, neo4j_db=None, source='sqlite'):
+        if source not in INFLUENCE_SOURCES:
+            raise Exception(f"Fuente de aristas no soportada: '{source}' (use {' o '.join(INFLUENCE_SOURCES)})")
+        if source == 'neo4j' and neo4j_db is None:
+            raise Exception("El ranking de influencia desde Neo4j requiere una conexión a Neo4j")
+        self.sqlite_db = sqlite_db
+        self.neo4j_db = neo4j_db
+        self.source = source
+        self.from_cache = False
+        self.load_time = 0.0
+        self.compute_time = 0.0
+
+    def edge_signature(self):
+        if self.source == 'neo4j':
+            with self.neo4j_db.driver.session() as session:
+                counts = [session.run(query).single()[0] for query in NEO4J_SIGNATURE_QUERIES]
+        else:
+            counts = self.sqlite_db.connection.execute(SQLITE_SIGNATURE_QUERY).fetchone()
+        return ':'.join([self.source] + [str(count) for count in counts])
+
+    def cached_state(self):
+        cursor = self.sqlite_db.connection.execute("SELECT clave, valor FROM influencia_estado")
+        return dict(cursor.fetchall())
+
+    def iter_edge_names(self):
+        if self.source == 'neo4j':
+            with self.neo4j_db.driver.session() as session:
+                for record in session.run(NEO4J_EDGES_QUERY):
+                    yield record[0], record[1]
+        else:
+            yield from self.sqlite_db.connection.execute(SQLITE_EDGES_QUERY)
+
+    def load_edges(self):
+        # Los nombres se convierten en índices consecutivos mientras se leen las aristas
+        start_time = time.perf_counter()
+        node_ids = {}
+        edges = np.fromiter(
+            ((node_ids.setdefault(origen, len(node_ids)), node_ids.setdefault(destino, len(node_ids)))
+             for origen, destino in self.iter_edge_names() if origen and destino),
+            dtype=EDGE_DTYPE
+        )
+        self.load_time = time.perf_counter() - start_time
+        return edges['origen'], edges['destino'], list(node_ids)
+
+    def compute(self, signature):
+        origins, destinations, names = self.load_edges()
+        start_time = time.perf_counter()
+        n_nodes = len(names)
+        if n_nodes:
+            indptr, indices, weights = build_csr(origins, destinations, n_nodes)
+            rank, iterations = pagerank(indptr, indices, weights)
+            out_degree = np.diff(indptr)
+            in_degree = np.bincount(indices, minlength=n_nodes)
+            in_weight = np.bincount(indices, weights=weights, minlength=n_nodes).astype(np.int64)
+        else:
+            indices, iterations = (), 0
+        self.compute_time = time.perf_counter() - start_time
+
+        # Seguidores de los usuarios del grafo que están en la base (los mencionados pueden no estarlo)
+        followers = {}
+        if n_nodes:
+            node_names = set(names)
+            for nombre, seguidores in self.sqlite_db.connection.execute(
+                    "SELECT lower(nombre_usuario), seguidores FROM usuarios"):
+                if nombre in node_names:
+                    followers[nombre] = seguidores
+        state = {'firma': signature, 'usuarios': n_nodes, 'aristas': len(indices), 'iteraciones': iterations}
+        try:
+            cursor = self.sqlite_db.connection.cursor()
+            cursor.execute("BEGIN;")
+            cursor.execute("DELETE FROM influencia")
+            for start in range(0, n_nodes, CACHE_BATCH_SIZE):
+                end = min(start + CACHE_BATCH_SIZE, n_nodes)
+                cursor.executemany("""
+                    INSERT INTO influencia (nombre_usuario, pagerank, grado_entrada, grado_salida, peso_entrada, seguidores)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, zip(names[start:end], rank[start:end].tolist(), in_degree[start:end].tolist(),
+                         out_degree[start:end].tolist(), in_weight[start:end].tolist(),
+                         (followers.get(name) for name in names[start:end])))
+            cursor.executemany("INSERT OR REPLACE INTO influencia_estado (clave, valor) VALUES (?, ?)",
+                               [(key, str(value)) for key, value in state.items()])
+            self.sqlite_db.connection.commit()
+        except Exception:
+            self.sqlite_db.connection.rollback()
+            raise
+        return state
+
+    def ranking(self, limit=TOP_INFLUENCERS):
+        # Usa la caché si la firma de las aristas no ha cambiado desde el último cálculo
+        signature = self.edge_signature()
+        state = self.cached_state()
+        self.from_cache = state.get('firma') == signature
+        if not self.from_cache:
+            state = self.compute(signature)
+        rows = self.sqlite_db.connection.execute(TOP_CACHED_QUERY, (limit,)).fetchall()
+        return {key: int(value) if key != 'firma' else value for key, value in state.items()}, rows
+
+    def report(self, limit=TOP_INFLUENCERS):
+        try:
+            state, rows = self.ranking(limit)
+            if not rows:
+                print(Fore.YELLOW + "No hay menciones ni retweets para calcular el ranking de influencia." + Style.RESET_ALL)
+                return rows
+            origin = "desde caché" if self.from_cache else (
+                f"lectura {self.load_time:.2f} s, cálculo {self.compute_time:.2f} s, {state['iteraciones']} iteraciones")
+            print(Fore.CYAN + f"Ranking de influencia (PageRank sobre menciones y retweets en {self.source}; "
+                  f"{state['usuarios']} usuarios, {state['aristas']} aristas; {origin}):" + Style.RESET_ALL)
+            others = max(state['usuarios'] - 1, 1)
+            for nombre, rank, in_degree, out_degree, in_weight, seguidores in rows:
+                followers = f", {seguidores} seguidores" if seguidores is not None else ""
+                print(f"- {nombre}: PageRank {rank:.5f}, centralidad de grado {in_degree / others:.4f} "
+                      f"({in_degree} usuarios lo mencionan o retuitean, {in_weight} veces; "
+                      f"menciona o retuitea a {out_degree}){followers}")
+            return rows
+        except Exception as e:
+            print(Fore.RED + f"Error en el ranking de influencia: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            return None
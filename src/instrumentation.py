@@ -0,0 +1,219 @@
+# instrumentation.py
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from colorama import Fore, Style
+
+DEFAULT_METRICS_FILE = 'metricas.json'
+DEFAULT_PROFILE_FILE = 'perfil.prof'
+PROFILE_TOP = 25
+# Límites superiores (en segundos) de los cubos de los histogramas: 0.1 ms, 0.2 ms ... ~105 s
+HISTOGRAM_BOUNDS = tuple(1e-4 * 2 ** i for i in range(21))
+PERCENTILES = (0.50, 0.95, 0.99)
+EXHAUSTED = object()
+
+class Histogram:
+    # Cubos logarítmicos fijos: memoria constante sin guardar cada muestra. Los percentiles
+    # se aproximan por el límite superior del cubo que los contiene.
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS, value)] += 1
+
+    def percentile(self, p):
+        target = p * self.count
+        cumulative = 0
+        for index, count in enumerate(self.buckets):
+            cumulative += count
+            if count and cumulative >= target:
+                return min(HISTOGRAM_BOUNDS[index], self.max) if index < len(HISTOGRAM_BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self):
+        result = {
+            'count': self.count,
+            'total_s': self.total,
+            'mean_s': self.total / self.count if self.count else 0.0,
+            'min_s': self.min or 0.0,
+            'max_s': self.max
+        }
+        for p in PERCENTILES:
+            result[f"p{int(p * 100)}_s"] = self.percentile(p)
+        result['buckets'] = {
+            (f"<={HISTOGRAM_BOUNDS[index]:g}" if index < len(HISTOGRAM_BOUNDS) else f">{HISTOGRAM_BOUNDS[-1]:g}"): count
+            for index, count in enumerate(self.buckets) if count
+        }
+        return result
+
+class NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer:
+    __slots__ = ('metrics', 'name', 'start_time')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start_time)
+        return False
+
+class Metrics:
+    # Registro de temporizadores (histogramas de duración en segundos) y contadores por nombre.
+    # Desactivado por defecto: cada llamada vuelve tras comprobar 'enabled', timer() devuelve
+    # un contexto vacío compartido y timed()/timed_iter() devuelven el objeto sin envolver.
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = None
+        self.start_time = None
+
+    def enable(self):
+        self.enabled = True
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.start_time = time.perf_counter()
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def timer(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name)
+
+    def timed(self, name, function):
+        # La decisión se toma al envolver: activa la instrumentación antes de construir las etapas
+        if not self.enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with Timer(self, name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def timed_iter(self, name, iterable):
+        # Mide cada next() de un iterador: el tiempo de lectura o descarga de cada lote
+        if not self.enabled:
+            return iterable
+        return self.iter_timed(name, iter(iterable))
+
+    def iter_timed(self, name, iterator):
+        while True:
+            with Timer(self, name):
+                item = next(iterator, EXHAUSTED)
+            if item is EXHAUSTED:
+                return
+            yield item
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'started_at': self.started_at,
+                'duration_s': time.perf_counter() - self.start_time if self.start_time else 0.0,
+                'counters': dict(sorted(self.counters.items())),
+                'timers': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}
+            }
+
+    def write_report(self, path):
+        try:
+            report = self.snapshot()
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(Fore.CYAN + f"Métricas ({report['duration_s']:.2f} s) guardadas en '{path}':" + Style.RESET_ALL)
+            for name, timer in report['timers'].items():
+                print(f"- {name}: {timer['count']} llamadas, {timer['total_s']:.3f} s en total, "
+                      f"p95 {timer['p95_s'] * 1000:.1f} ms")
+            for name, value in report['counters'].items():
+                print(f"- {name}: {value}")
+        except Exception as e:
+            print(Fore.RED + f"Error al guardar las métricas: {e}" + Style.RESET_ALL)
+
+    def report_at_exit(self, path):
+        # atexit también cubre las salidas con sys.exit() del programa principal
+        atexit.register(self.write_report, path)
+
+# Registro compartido por todos los módulos
+metrics = Metrics()
+
+def profile_call(function, *args, output=None, top=PROFILE_TOP):
+    # Ejecuta la función bajo cProfile y muestra las funciones con más tiempo propio; el
+    # volcado completo (pstats) se puede abrir después con snakeviz o python -m pstats.
+    # Cada hilo creado durante la ejecución (etapas de --async, descargas en paralelo)
+    # recibe su propio perfilador y los resultados se suman al final; los procesos del
+    # cálculo de sentimiento con --workers no se perfilan.
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    thread_profilers = []
+
+    def profile_thread(*_):
+        thread_profiler = cProfile.Profile()
+        thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    threading.setprofile(profile_thread)
+    try:
+        return profiler.runcall(function, *args)
+    finally:
+        threading.setprofile(None)
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+        if output:
+            directory = os.path.dirname(output)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            stats.dump_stats(output)
+            print(Fore.CYAN + f"Perfil guardado en '{output}'." + Style.RESET_ALL)
+        print(Fore.CYAN + f"Funciones con más tiempo propio (top {top}, {len(thread_profilers) + 1} hilos):" + Style.RESET_ALL)
+        stats.strip_dirs().sort_stats('tottime').print_stats(top)
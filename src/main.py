@@ -2,28 +2,131 @@
 
 import sys
 import argparse
-from twitter_api import TwitterAPI
+from twitter_api import TwitterAPI, DEFAULT_MAX_PAGES, DEFAULT_FETCH_WORKERS
 from sqlite_db import SQLiteDatabase
-from neo4j_db import Neo4jDatabase
+from neo4j_db import Neo4jDatabase, DEFAULT_BATCH_SIZE, DEFAULT_WRITE_WORKERS
 from analysis import Analyzer
-from openai_analysis import OpenAIAnalysis
+from openai_analysis import OpenAIAnalysis, DEFAULT_MAP_WORKERS
+from sentiment import SentimentEnricher
+from response_cache import ResponseCache
 from utils import Utils
+from records import TweetRecord
+from dedup import Deduplicator
+from influence import INFLUENCE_SOURCES
+from neo4j_import import Neo4jCSVExporter, load_csv_import, DEFAULT_IMPORT_DIR
+from tweet_store import TweetStore, DEFAULT_STORE_FILE, DEFAULT_COMPACT_THRESHOLD
 from colorama import Fore, Style
+from columnar import ColumnarWriter, ColumnarReader, is_columnar_file
+from instrumentation import metrics, profile_call, DEFAULT_METRICS_FILE, DEFAULT_PROFILE_FILE, PROFILE_TOP
 import traceback
 import os
-import json
 
-def main():
+DEFAULT_LOAD_BATCH_SIZE = 5000  # Tweets leídos por lote con --load
+DEFAULT_QUEUE_SIZE = 4  # Lotes en espera entre etapas de --async; limita la memoria (backpressure)
+OPENAI_SAMPLE_SIZE = 50000  # Máximo de tweets enviados al resumen de OpenAI (map-reduce si no caben en un prompt)
+
+def parse_args():
     parser = argparse.ArgumentParser(description='Herramienta de Análisis de Datos de Twitter')
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('--fetch', action='store_true', help='Recolectar tweets desde la API de Twitter')
-    group.add_argument('--load', type=str, help='Cargar tweets desde un archivo JSON en el directorio data/')
+    group.add_argument('--load', type=str,
+                       help='Cargar tweets desde un archivo JSON, NDJSON, Parquet o Arrow en el directorio data/')
+    group.add_argument('--rebuild-rollups', action='store_true',
+                       help='Recalcular desde cero los agregados diarios y por usuario de SQLite')
+    group.add_argument('--compact', type=str, nargs='?', const=DEFAULT_STORE_FILE,
+                       help=f'Compactar el almacén NDJSON de data/ (por defecto {DEFAULT_STORE_FILE}) si supera el umbral')
+    parser.add_argument('--neo4j-batch-size', type=int, nargs='?', const=DEFAULT_BATCH_SIZE, default=None,
+                        help=f'Insertar en Neo4j por lotes con UNWIND (tamaño de lote, por defecto {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--neo4j-workers', type=int, nargs='?', const=DEFAULT_WRITE_WORKERS, default=None,
+                        help=f'Escribir en Neo4j con N hilos en paralelo, cada uno con su sesión y los tweets '
+                             f'repartidos por usuario (por defecto {DEFAULT_WRITE_WORKERS}); usa --neo4j-batch-size por transacción')
+    parser.add_argument('--neo4j-pool-size', type=int, default=None,
+                        help='Tamaño máximo del pool de conexiones del controlador de Neo4j')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Número de procesos para calcular el sentimiento en paralelo')
+    parser.add_argument('--sqlite-bulk', action='store_true',
+                        help='Insertar en SQLite con executemany en una sola transacción y PRAGMAs de carga masiva')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_LOAD_BATCH_SIZE,
+                        help=f'Tweets leídos por lote al cargar un archivo (por defecto {DEFAULT_LOAD_BATCH_SIZE})')
+    parser.add_argument('--compact-threshold', type=float, default=DEFAULT_COMPACT_THRESHOLD / (1024 * 1024),
+                        help='Tamaño en MB a partir del cual --compact reescribe el almacén')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help=f'Páginas de 100 tweets a recorrer por usuario con --fetch (por defecto {DEFAULT_MAX_PAGES})')
+    parser.add_argument('--fetch-workers', type=int, default=DEFAULT_FETCH_WORKERS,
+                        help=f'Usuarios recolectados en paralelo con --fetch (por defecto {DEFAULT_FETCH_WORKERS})')
+    parser.add_argument('--full-fetch', action='store_true',
+                        help='Ignorar los checkpoints y volver a recolectar los tweets más recientes de cada usuario')
+    parser.add_argument('--explain', action='store_true',
+                        help='Mostrar EXPLAIN QUERY PLAN de las consultas del análisis')
+    parser.add_argument('--advanced-stats', action='store_true',
+                        help='Calcular percentiles de sentimiento, interacción, mapa de calor y medias móviles con NumPy')
+    parser.add_argument('--influence', type=str, nargs='?', const='sqlite', choices=INFLUENCE_SOURCES,
+                        help='Calcular el ranking de influencia (PageRank y centralidad de grado) sobre menciones y '
+                             'retweets, leyendo las aristas de SQLite (por defecto) o de Neo4j')
+    parser.add_argument('--openai-workers', type=int, default=DEFAULT_MAP_WORKERS,
+                        help=f'Solicitudes simultáneas al resumir por fragmentos con OpenAI (por defecto {DEFAULT_MAP_WORKERS})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='No usar la caché en disco de respuestas de OpenAI')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='Vaciar la caché de respuestas de OpenAI antes de consultar')
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help='Ejecutar recolección/lectura, normalización, sentimiento y escrituras como etapas concurrentes')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'Lotes en espera entre etapas del modo --async (por defecto {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--export', type=str,
+                        help='Exportar los tweets procesados (con sentimiento) a data/ en formato Parquet (.parquet) o Arrow IPC (.arrow)')
+    parser.add_argument('--skip-text', action='store_true',
+                        help='Con --load de un archivo columnar, no leer las columnas de texto libre (contenido, ubicación); '
+                             'requiere --no-sqlite, --no-neo4j y --no-openai')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Agrupar los tweets duplicados y casi duplicados (MinHash/LSH) para no repetir el sentimiento ni el resumen')
+    parser.add_argument('--neo4j-csv', type=str, nargs='?', const=DEFAULT_IMPORT_DIR,
+                        help=f'En lugar de escribir en Neo4j, generar los CSV de neo4j-admin database import '
+                             f'(directorio, por defecto {DEFAULT_IMPORT_DIR})')
+    parser.add_argument('--neo4j-load-csv', type=str, nargs='?', const='file:///',
+                        help='Con --neo4j-csv, cargar después los CSV en la base en ejecución con LOAD CSV '
+                             '(URL base donde el servidor ve los archivos, por defecto file:///)')
+    parser.add_argument('--no-sqlite', action='store_true',
+                        help='No escribir los tweets en SQLite (el análisis se hace sobre los datos ya guardados)')
+    parser.add_argument('--no-neo4j', action='store_true',
+                        help='No escribir en Neo4j (ni conectarse ni importar su controlador)')
+    parser.add_argument('--no-openai', action='store_true',
+                        help='Omitir el resumen con OpenAI')
+    parser.add_argument('--metrics', type=str, nargs='?', const=DEFAULT_METRICS_FILE,
+                        help=f'Medir cada etapa (tiempos, filas escritas, aciertos de caché, reintentos, viajes a '
+                             f'Neo4j y HTTP) y guardar un informe JSON en data/ al terminar (por defecto {DEFAULT_METRICS_FILE})')
+    parser.add_argument('--profile', type=str, nargs='?', const=DEFAULT_PROFILE_FILE,
+                        help=f'Ejecutar bajo cProfile, mostrar las funciones más costosas y guardar el perfil en data/ '
+                             f'(por defecto {DEFAULT_PROFILE_FILE})')
+    parser.add_argument('--profile-top', type=int, default=PROFILE_TOP,
+                        help=f'Funciones mostradas con --profile (por defecto {PROFILE_TOP})')
     args = parser.parse_args()
+    if args.neo4j_load_csv and (args.no_neo4j or not args.neo4j_csv):
+        parser.error('--neo4j-load-csv necesita --neo4j-csv y una conexión a Neo4j (no se admite con --no-neo4j)')
+    # Sin texto, los destinos que guardan el contenido lo dejarían vacío
+    if args.skip_text and not (args.no_sqlite and args.no_neo4j and args.no_openai and not args.neo4j_csv):
+        parser.error('--skip-text deja los tweets sin contenido: sólo se admite con --no-sqlite, --no-neo4j y '
+                     '--no-openai, sin --neo4j-csv (p. ej. para --export o el análisis)')
+    return args
 
+def run(args):
     try:
         # Inicialización de utilidades
         utils = Utils()
 
+        if args.compact:
+            TweetStore(args.compact).compact(threshold=int(args.compact_threshold * 1024 * 1024))
+            return
+
+        # Conexión a la base de datos SQLite
+        sqlite_db = SQLiteDatabase()
+        sqlite_db.create_tables()
+
+        if args.rebuild_rollups:
+            sqlite_db.rebuild_rollups()
+            sqlite_db.close_connection()
+            return
+
         if args.fetch:
             # Solicitar nombres de usuario al usuario
             usernames = utils.get_usernames()
@@ -33,68 +136,214 @@ def main():
                 print(Fore.YELLOW + "No se proporcionaron nombres de usuario. Terminando el programa." + Style.RESET_ALL)
                 sys.exit()
 
-            # Limitar a un usuario para evitar exceder los límites de tasa
-            usernames = usernames[:1]
-
             # Inicialización de la API de Twitter
             twitter_api = TwitterAPI()
+            # Un único almacén para toda la ejecución: su índice se lee una sola vez
+            tweet_store = TweetStore(DEFAULT_STORE_FILE)
 
-            # Obtener tweets de los usuarios especificados
-            tweets_data = twitter_api.get_users_tweets(usernames)
+            # Checkpoints por usuario para pedir sólo los tweets posteriores al último guardado
+            since_ids = {} if args.full_fetch else sqlite_db.get_checkpoints()
 
-            if not tweets_data:
-                print(Fore.YELLOW + "No se pudieron obtener tweets. Por favor, verifica los nombres de usuario y los límites de tasa." + Style.RESET_ALL)
-                sys.exit()
+            if args.async_mode:
+                # Las páginas se entregan al pipeline en cuanto se descargan, con hasta
+                # --fetch-workers usuarios recolectados a la vez
+                sources = [metrics.timed_iter('etapa.recoleccion', pages) for pages in twitter_api.user_page_sources(
+                    usernames, max_pages=args.max_pages, since_ids=since_ids)]
+            else:
+                # Obtener tweets de los usuarios especificados
+                with metrics.timer('etapa.recoleccion'):
+                    tweets_data = twitter_api.get_users_tweets(usernames, max_pages=args.max_pages,
+                                                               workers=args.fetch_workers, since_ids=since_ids)
+
+                if not tweets_data:
+                    print(Fore.YELLOW + "No se obtuvieron tweets nuevos. Verifica los nombres de usuario y los límites de tasa." + Style.RESET_ALL)
+                    sqlite_db.close_connection()
+                    sys.exit()
 
-            # Guardar tweets en un archivo para análisis posterior
-            utils.save_tweets_to_file(tweets_data, 'tweets.json')
+                # Guardar tweets en un archivo para análisis posterior
+                with metrics.timer('etapa.archivo'):
+                    utils.save_tweets_to_file(tweets_data, tweet_store)
+                batches = [tweets_data]
         elif args.load:
             json_file = args.load
             json_path = os.path.join('data', json_file)
             if not os.path.exists(json_path):
                 print(Fore.RED + f"El archivo JSON '{json_file}' no existe en el directorio 'data/'." + Style.RESET_ALL)
                 sys.exit(1)
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    tweets_data = json.load(f)
-                print(Fore.GREEN + f"Datos de tweets cargados desde '{json_path}' exitosamente." + Style.RESET_ALL)
-            except Exception as e:
-                print(Fore.RED + f"Error al cargar el archivo JSON: {e}" + Style.RESET_ALL)
-                traceback.print_exc()
-                sys.exit(1)
+            # Los tweets se leen por lotes para que la memoria dependa del lote y no del archivo
+            if is_columnar_file(json_file):
+                batches = ColumnarReader(json_path).iter_batches(args.batch_size, skip_text=args.skip_text)
+            else:
+                batches = utils.iter_tweet_batches(json_path, args.batch_size)
+            batches = metrics.timed_iter('etapa.lectura', batches)
+            print(Fore.GREEN + f"Leyendo tweets desde '{json_path}' en lotes de {args.batch_size}." + Style.RESET_ALL)
 
-        # Conexión a la base de datos SQLite
-        sqlite_db = SQLiteDatabase()
-        sqlite_db.create_tables()
-        sqlite_db.insert_data(tweets_data)
+        enricher = SentimentEnricher(workers=args.workers)
+        exporter = ColumnarWriter(args.export) if args.export else None
 
         # Conexión a la base de datos Neo4j
-        neo4j_db = Neo4jDatabase()
-        neo4j_db.create_constraints()
-        neo4j_db.insert_data(tweets_data)
+        neo4j_db = None
+        if not args.no_neo4j and (not args.neo4j_csv or args.neo4j_load_csv):
+            neo4j_db = Neo4jDatabase(pool_size=args.neo4j_pool_size)
+            neo4j_db.create_constraints()
+        # Con --neo4j-csv el grafo se vuelca a CSV y no se escribe con Cypher durante la carga;
+        # el volcado no necesita conexión, por lo que también se hace con --no-neo4j
+        csv_exporter = Neo4jCSVExporter(args.neo4j_csv) if args.neo4j_csv else None
+        write_neo4j = neo4j_db is not None and csv_exporter is None
+
+        deduplicator = Deduplicator() if args.dedup else None
+
+        def normalize_batch(batch):
+            # Normalizar una sola vez a TweetRecord antes del sentimiento y de las bases de datos
+            records = TweetRecord.normalize_all(batch)
+            if deduplicator:
+                records = deduplicator.process(records)
+            return records
+
+        def insert_sqlite(records):
+            if args.sqlite_bulk:
+                sqlite_db.bulk_insert_data(records, checkpoints=args.fetch)
+            else:
+                sqlite_db.insert_data(records, checkpoints=args.fetch)
+
+        def insert_neo4j(records):
+            if args.neo4j_workers:
+                neo4j_db.insert_data_parallel(records, workers=args.neo4j_workers,
+                                              batch_size=args.neo4j_batch_size or DEFAULT_BATCH_SIZE)
+            elif args.neo4j_batch_size:
+                neo4j_db.insert_data_batched(records, batch_size=args.neo4j_batch_size)
+            else:
+                neo4j_db.insert_data(records)
+
+        openai_sample = []
+        processed = []
+
+        def collect_sample(records):
+            # Sólo se conserva una muestra acotada del texto para el resumen de OpenAI
+            remaining = OPENAI_SAMPLE_SIZE - len(openai_sample)
+            if remaining > 0:
+                # Los casi duplicados se representan por su primer tweet y el tamaño del grupo
+                openai_sample.extend(record for record in records[:remaining]
+                                     if record.contenido and record.representante is None)
+            processed.append(len(records))
+            metrics.count('tweets.procesados', len(records))
+
+        # Temporizadores por etapa; sin --metrics son las mismas funciones, sin envolver
+        normalize_batch = metrics.timed('etapa.normalizacion', normalize_batch)
+        enrich = metrics.timed('etapa.sentimiento', enricher.enrich)
+        insert_sqlite = metrics.timed('etapa.sqlite', insert_sqlite)
+        insert_neo4j = metrics.timed('etapa.neo4j', insert_neo4j)
+        write_csv = metrics.timed('etapa.neo4j_csv', csv_exporter.write) if csv_exporter else None
+        export = metrics.timed('etapa.exportacion', exporter.write) if exporter else None
+
+        if args.async_mode:
+            # asyncio y el pipeline sólo se cargan en este modo
+            import asyncio
+            from pipeline import AsyncPipeline
+            sinks = {'muestra': collect_sample}
+            if not args.no_sqlite:
+                sinks['SQLite'] = insert_sqlite
+            if write_neo4j:
+                sinks['Neo4j'] = insert_neo4j
+            if csv_exporter:
+                sinks['Neo4j CSV'] = write_csv
+            if args.fetch:
+                sinks['archivo'] = metrics.timed('etapa.archivo',
+                                                 lambda records: utils.save_tweets_to_file(records, tweet_store))
+            if exporter:
+                sinks['exportación'] = export
+            pipeline = AsyncPipeline(normalize_batch, enrich, sinks, queue_size=args.queue_size,
+                                     source_workers=args.fetch_workers if args.fetch else 1)
+            asyncio.run(pipeline.run(*(sources if args.fetch else [batches])))
+            pipeline.report()
+        else:
+            for batch in batches:
+                records = normalize_batch(batch)
+                enrich(records)
+                if not args.no_sqlite:
+                    insert_sqlite(records)
+                if write_neo4j:
+                    insert_neo4j(records)
+                if csv_exporter:
+                    write_csv(records)
+                collect_sample(records)
+                if exporter:
+                    export(records)
+        total_tweets = sum(processed)
+        if args.sqlite_bulk:
+            sqlite_db.end_bulk_load()
+        if exporter:
+            exporter.close()
+        if csv_exporter:
+            csv_exporter.close()
+            if neo4j_db:
+                with metrics.timer('etapa.neo4j_load_csv'):
+                    load_csv_import(neo4j_db, args.neo4j_csv, base_url=args.neo4j_load_csv)
+
+        enricher.close_connection()
+        print(Fore.GREEN + f"Se procesaron {total_tweets} tweets." + Style.RESET_ALL)
 
         # Análisis de datos
         analyzer = Analyzer(sqlite_db, neo4j_db)
-        analyzer.run_analysis()
+        with metrics.timer('etapa.analisis'):
+            analyzer.run_analysis()
+        if args.advanced_stats:
+            with metrics.timer('etapa.estadisticas_avanzadas'):
+                analyzer.advanced_statistics()
+        if args.influence:
+            with metrics.timer('etapa.influencia'):
+                analyzer.influence_ranking(args.influence)
+        if args.explain:
+            analyzer.explain_query_plans()
 
         # Análisis con OpenAI
-        openai_analysis = OpenAIAnalysis()
-        summary = openai_analysis.singularity(tweets_data)
+        response_cache = None
+        openai_analysis = None
+        if args.clear_cache:
+            # Se vacía aunque no se consulte a OpenAI en esta ejecución (--no-openai)
+            cache_to_clear = ResponseCache()
+            try:
+                cache_to_clear.clear()
+            finally:
+                cache_to_clear.close_connection()
+        if not args.no_openai:
+            response_cache = None if args.no_cache else ResponseCache()
+            openai_analysis = OpenAIAnalysis(map_workers=args.openai_workers, cache=response_cache)
+            with metrics.timer('etapa.openai'):
+                summary = openai_analysis.singularity(
+                    openai_sample, group_sizes=deduplicator.group_sizes if deduplicator else None
+                )
 
-        if summary:
-            if args.fetch:
-                print(Fore.GREEN + "El resumen se ha publicado en Twitter exitosamente." + Style.RESET_ALL)
+            if summary:
+                if args.fetch:
+                    print(Fore.GREEN + "El resumen se ha publicado en Twitter exitosamente." + Style.RESET_ALL)
+                else:
+                    print(Fore.CYAN + "Continuando..." + Style.RESET_ALL)
             else:
-                print(Fore.CYAN + "Continuando..." + Style.RESET_ALL)
-        else:
-            print(Fore.YELLOW + "No se pudo generar el resumen con OpenAI." + Style.RESET_ALL)
+                print(Fore.YELLOW + "No se pudo generar el resumen con OpenAI." + Style.RESET_ALL)
+
+        # Estadísticas de reintentos y latencia de las APIs externas
+        if openai_analysis:
+            openai_analysis.http.report()
+        if args.fetch:
+            twitter_api.http.report()
 
         # Cerrar conexiones
+        if openai_analysis:
+            openai_analysis.http.close()
         if args.fetch:
             twitter_api.close_connection()
+            tweet_store.close()
         sqlite_db.close_connection()
-        neo4j_db.close_connection()
+        if neo4j_db:
+            neo4j_db.close_connection()
 
+        enricher.report()
+        if deduplicator:
+            deduplicator.report()
+        if response_cache:
+            response_cache.report()
+            response_cache.close_connection()
         print(Fore.GREEN + "Análisis completado exitosamente." + Style.RESET_ALL)
 
     except Exception as e:
@@ -102,5 +351,16 @@ def main():
         traceback.print_exc()
         sys.exit(1)
 
+def main():
+    args = parse_args()
+    if args.metrics:
+        # Activar antes de construir las etapas: timed() decide al envolver
+        metrics.enable()
+        metrics.report_at_exit(os.path.join('data', args.metrics))
+    if args.profile:
+        profile_call(run, args, output=os.path.join('data', args.profile), top=args.profile_top)
+    else:
+        run(args)
+
 if __name__ == "__main__":
     main()
@@ -1,14 +1,66 @@
-from neo4j import GraphDatabase
-from utils import Utils
-from textblob import TextBlob
+from utils import Utils, lazy_import
+from records import TweetRecord
+from instrumentation import metrics
 from colorama import Fore, Style
 import os
 from dotenv import load_dotenv
 import traceback
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+neo4j = lazy_import('neo4j')
+textblob = lazy_import('textblob')
+
+# Sentencias parametrizadas para la escritura por lotes con UNWIND
+UNWIND_USUARIOS = """
+    UNWIND $rows AS row
+    MERGE (u:Usuario {nombre_usuario: row.nombre_usuario})
+    SET u.seguidores = row.seguidores,
+        u.verificado = row.verificado,
+        u.ubicacion = row.ubicacion
+"""
+
+UNWIND_TWEETS = """
+    UNWIND $rows AS row
+    MERGE (t:Tweet {tweet_id: row.tweet_id})
+    SET t.contenido = row.contenido,
+        t.fecha_hora = row.fecha_hora,
+        t.retweets = row.retweets,
+        t.likes = row.likes,
+        t.sentimiento = row.sentimiento
+    WITH t, row
+    MATCH (u:Usuario {nombre_usuario: row.nombre_usuario})
+    MERGE (u)-[:PUBLICA]->(t)
+"""
+
+UNWIND_MENCIONES = """
+    UNWIND $rows AS row
+    MATCH (u:Usuario {nombre_usuario: row.nombre_usuario}), (m:Usuario {nombre_usuario: row.mention})
+    MERGE (u)-[:MENTIONA]->(m)
+"""
+
+UNWIND_HASHTAGS = """
+    UNWIND $rows AS row
+    MERGE (h:Hashtag {texto: row.hashtag})
+    WITH h, row
+    MATCH (t:Tweet {tweet_id: row.tweet_id})
+    MERGE (t)-[:TRATA_DE]->(h)
+"""
+
+UNWIND_RETWEETS = """
+    UNWIND $rows AS row
+    MATCH (t:Tweet {tweet_id: row.tweet_id}), (rt:Tweet {tweet_id: row.ref_tweet_id})
+    MERGE (t)-[:RETWEETEA]->(rt)
+"""
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WRITE_WORKERS = 4
 
 class Neo4jDatabase:
-    def __init__(self):
+    def __init__(self, pool_size=None):
         self.utils = Utils()
+        self.pool_size = pool_size
         self.driver = self.connect()
 
     def connect(self):
@@ -23,7 +75,10 @@ class Neo4jDatabase:
                 print(Fore.RED + "Error: La contraseña de Neo4j no está configurada." + Style.RESET_ALL)
                 raise Exception("Contraseña de Neo4j no configurada")
 
-            driver = GraphDatabase.driver(uri, auth=(user, password))
+            # El controlador mantiene un pool de conexiones; con escritores en paralelo
+            # conviene que tenga al menos una conexión por hilo
+            options = {'max_connection_pool_size': self.pool_size} if self.pool_size else {}
+            driver = neo4j.GraphDatabase.driver(uri, auth=(user, password), **options)
             print(Fore.GREEN + "Conectado a la base de datos Neo4j exitosamente." + Style.RESET_ALL)
             return driver
         except Exception as e:
@@ -49,92 +104,271 @@ class Neo4jDatabase:
             if not tweets_data:
                 print(Fore.YELLOW + "No hay datos de tweets para insertar en Neo4j." + Style.RESET_ALL)
                 return
+            start_time = time.perf_counter()
+            rows_written = 0
+            round_trips = 0
             with self.driver.session() as session:
-                for data in tweets_data:
-                    if 'tweet' in data and 'user' in data:
-                        tweet = data['tweet']
-                        user = data['user']
+                for record in TweetRecord.normalize_all(tweets_data):
+                    nombre_usuario = record.nombre_usuario
+                    tweet_id = record.tweet_id
+                    contenido = record.contenido or ''
 
-                        if not user:
-                            print(Fore.YELLOW + "No se encontró información del usuario para un tweet. Saltando..." + Style.RESET_ALL)
-                            continue
+                    # Crear nodo de usuario
+                    session.run("""
+                        MERGE (u:Usuario {nombre_usuario: $nombre_usuario})
+                        SET u.seguidores = $seguidores,
+                            u.verificado = $verificado,
+                            u.ubicacion = $ubicacion
+                    """, nombre_usuario=nombre_usuario,
+                         seguidores=record.seguidores,
+                         verificado=record.verificado,
+                         ubicacion=record.ubicacion)
 
-                        # Procesar datos del usuario
-                        nombre_usuario = user.username if hasattr(user, 'username') else None
+                    # Crear nodo de tweet
+                    session.run("""
+                        MERGE (t:Tweet {tweet_id: $tweet_id})
+                        SET t.contenido = $contenido,
+                            t.fecha_hora = $fecha_hora,
+                            t.retweets = $retweets,
+                            t.likes = $likes,
+                            t.sentimiento = $sentimiento
+                    """, tweet_id=tweet_id,
+                         contenido=contenido,
+                         fecha_hora=self.format_fecha(record.fecha_hora),
+                         retweets=record.retweets,
+                         likes=record.likes,
+                         sentimiento=self.get_sentiment(record))
 
-                        # Verificar que public_metrics no sea None
-                        seguidores = user.public_metrics.get('followers_count', 0) if hasattr(user, 'public_metrics') and user.public_metrics else 0
-                        retweets = tweet.public_metrics.get('retweet_count', 0) if hasattr(tweet, 'public_metrics') and tweet.public_metrics else 0
-                        likes = tweet.public_metrics.get('like_count', 0) if hasattr(tweet, 'public_metrics') and tweet.public_metrics else 0
+                    # Relación de Publicación
+                    session.run("""
+                        MATCH (u:Usuario {nombre_usuario: $nombre_usuario}), (t:Tweet {tweet_id: $tweet_id})
+                        MERGE (u)-[:PUBLICA]->(t)
+                    """, nombre_usuario=nombre_usuario, tweet_id=tweet_id)
 
-                        # Crear nodo de usuario
+                    # Menciones extraídas en la normalización
+                    for mention in record.mentions:
                         session.run("""
-                            MERGE (u:Usuario {nombre_usuario: $nombre_usuario})
-                            SET u.seguidores = $seguidores,
-                                u.verificado = $verificado,
-                                u.ubicacion = $ubicacion
-                        """, nombre_usuario=nombre_usuario,
-                             seguidores=seguidores,
-                             verificado=user.verified if hasattr(user, 'verified') else False,
-                             ubicacion=user.location if hasattr(user, 'location') else None)
-
-                        # Análisis de sentimiento
-                        analysis = TextBlob(tweet.text)
-                        sentiment = analysis.sentiment.polarity
-
-                        # Crear nodo de tweet
+                            MATCH (u:Usuario {nombre_usuario: $nombre_usuario}), (m:Usuario {nombre_usuario: $mention})
+                            MERGE (u)-[:MENTIONA]->(m)
+                        """, nombre_usuario=nombre_usuario, mention=mention)
+
+                    # Detectar retweets y crear relaciones
+                    for ref_tweet_id in record.referenced_tweets:
                         session.run("""
-                            MERGE (t:Tweet {tweet_id: $tweet_id})
-                            SET t.contenido = $contenido,
-                                t.fecha_hora = $fecha_hora,
-                                t.retweets = $retweets,
-                                t.likes = $likes,
-                                t.sentimiento = $sentimiento
-                        """, tweet_id=str(tweet.id),
-                             contenido=tweet.text,
-                             fecha_hora=tweet.created_at.strftime("%Y-%m-%d %H:%M:%S") if hasattr(tweet, 'created_at') and tweet.created_at else None,
-                             retweets=retweets,
-                             likes=likes,
-                             sentimiento=sentiment)
-
-                        # Relación de Publicación
+                            MATCH (t:Tweet {tweet_id: $tweet_id}), (rt:Tweet {tweet_id: $ref_tweet_id})
+                            MERGE (t)-[:RETWEETEA]->(rt)
+                        """, tweet_id=tweet_id, ref_tweet_id=ref_tweet_id)
+
+                    # Crear relaciones basadas en hashtags
+                    for hashtag in record.hashtags:
                         session.run("""
-                            MATCH (u:Usuario {nombre_usuario: $nombre_usuario}), (t:Tweet {tweet_id: $tweet_id})
-                            MERGE (u)-[:PUBLICA]->(t)
-                        """, nombre_usuario=nombre_usuario, tweet_id=str(tweet.id))
-
-                        # Detectar menciones (si existen)
-                        if tweet.text and '@' in tweet.text:
-                            mentions = [word.strip('@') for word in tweet.text.split() if word.startswith('@')]
-                            for mention in mentions:
-                                session.run("""
-                                    MATCH (u:Usuario {nombre_usuario: $nombre_usuario}), (m:Usuario {nombre_usuario: $mention})
-                                    MERGE (u)-[:MENTIONA]->(m)
-                                """, nombre_usuario=nombre_usuario, mention=mention)
-
-                        # Detectar retweets y crear relaciones
-                        if hasattr(tweet, 'referenced_tweets') and tweet.referenced_tweets:
-                            for ref_tweet in tweet.referenced_tweets:
-                                session.run("""
-                                    MATCH (t:Tweet {tweet_id: $tweet_id}), (rt:Tweet {tweet_id: $ref_tweet_id})
-                                    MERGE (t)-[:RETWEETEA]->(rt)
-                                """, tweet_id=str(tweet.id), ref_tweet_id=ref_tweet.id)
-
-                        # Crear relaciones basadas en hashtags
-                        hashtags = [word.strip('#') for word in tweet.text.split() if word.startswith('#')]
-                        for hashtag in hashtags:
-                            session.run("""
-                                MERGE (h:Hashtag {texto: $hashtag})
-                                MERGE (t:Tweet {tweet_id: $tweet_id})
-                                MERGE (t)-[:TRATA_DE]->(h)
-                            """, hashtag=hashtag, tweet_id=str(tweet.id))
+                            MERGE (h:Hashtag {texto: $hashtag})
+                            MERGE (t:Tweet {tweet_id: $tweet_id})
+                            MERGE (t)-[:TRATA_DE]->(h)
+                        """, hashtag=hashtag, tweet_id=tweet_id)
 
+                    rows_written += 1
+                    # Cada session.run es una transacción implícita con su propio viaje de ida y vuelta
+                    round_trips += 3 + len(record.mentions) + len(record.referenced_tweets) + len(record.hashtags)
+
+            elapsed = time.perf_counter() - start_time
+            metrics.count('neo4j.tweets', rows_written)
+            metrics.count('neo4j.viajes_bolt', round_trips)
+            metrics.count('neo4j.transacciones', round_trips)
             print(Fore.GREEN + "Datos insertados en Neo4j exitosamente." + Style.RESET_ALL)
+            self.report_throughput("fila a fila", rows_written, elapsed)
         except Exception as e:
             print(Fore.RED + f"Error al insertar datos en Neo4j: {e}" + Style.RESET_ALL)
             traceback.print_exc()
             raise
 
+    @staticmethod
+    def format_fecha(fecha_hora):
+        # Neo4j almacena la fecha como "YYYY-MM-DD HH:MM:SS"
+        return fecha_hora.replace('T', ' ')[:19] if fecha_hora else None
+
+    @staticmethod
+    def get_sentiment(record):
+        # Usa el sentimiento precalculado por la etapa de enriquecimiento si existe
+        if record.sentimiento is None:
+            return textblob.TextBlob(record.contenido or '').sentiment.polarity
+        return record.sentimiento
+
+    @classmethod
+    def build_batch_rows(cls, records):
+        # Prepara los parámetros de cada sentencia UNWIND para un lote; no usa la conexión,
+        # por lo que también lo reutiliza el generador de CSV de neo4j_import.py
+        tweets, mentions, hashtags, retweets = [], [], [], []
+        users = {}
+        for record in records:
+            nombre_usuario = record.nombre_usuario
+            tweet_id = record.tweet_id
+            if not nombre_usuario or not tweet_id:
+                continue
+            contenido = record.contenido or ''
+            users[nombre_usuario] = {
+                'nombre_usuario': nombre_usuario,
+                'seguidores': record.seguidores,
+                'verificado': record.verificado,
+                'ubicacion': record.ubicacion
+            }
+            tweets.append({
+                'tweet_id': tweet_id,
+                'nombre_usuario': nombre_usuario,
+                'contenido': contenido,
+                'fecha_hora': cls.format_fecha(record.fecha_hora),
+                'retweets': record.retweets,
+                'likes': record.likes,
+                'sentimiento': cls.get_sentiment(record)
+            })
+            for mention in record.mentions:
+                mentions.append({'nombre_usuario': nombre_usuario, 'mention': mention})
+            for hashtag in record.hashtags:
+                hashtags.append({'tweet_id': tweet_id, 'hashtag': hashtag})
+            for ref_tweet_id in record.referenced_tweets:
+                retweets.append({'tweet_id': tweet_id, 'ref_tweet_id': ref_tweet_id})
+        return list(users.values()), tweets, mentions, hashtags, retweets
+
+    def write_batch(self, tx, users, tweets, mentions, hashtags, retweets):
+        # Los usuarios y tweets se escriben antes que las relaciones que los referencian
+        return self.write_nodes(tx, users, tweets) + self.write_relationships(tx, mentions, hashtags, retweets)
+
+    @staticmethod
+    def write_nodes(tx, users, tweets):
+        tx.run(UNWIND_USUARIOS, rows=users)
+        tx.run(UNWIND_TWEETS, rows=tweets)
+        return 2
+
+    @staticmethod
+    def write_relationships(tx, mentions, hashtags, retweets):
+        if mentions:
+            tx.run(UNWIND_MENCIONES, rows=mentions)
+        if hashtags:
+            tx.run(UNWIND_HASHTAGS, rows=hashtags)
+        if retweets:
+            tx.run(UNWIND_RETWEETS, rows=retweets)
+        return bool(mentions) + bool(hashtags) + bool(retweets)
+
+    def insert_data_batched(self, tweets_data, batch_size=DEFAULT_BATCH_SIZE):
+        try:
+            if not tweets_data:
+                print(Fore.YELLOW + "No hay datos de tweets para insertar en Neo4j." + Style.RESET_ALL)
+                return
+            start_time = time.perf_counter()
+            rows_written = 0
+            round_trips = 0
+            transactions = 0
+            records = TweetRecord.normalize_all(tweets_data)
+            with self.driver.session() as session:
+                for chunk in self.utils.chunked(records, batch_size):
+                    users, tweets, mentions, hashtags, retweets = self.build_batch_rows(chunk)
+                    if not tweets:
+                        continue
+                    # Cada lote se escribe en una única transacción explícita
+                    with session.begin_transaction() as tx:
+                        statements = self.write_batch(tx, users, tweets, mentions, hashtags, retweets)
+                        tx.commit()
+                    rows_written += len(tweets)
+                    round_trips += statements + 1
+                    transactions += 1
+
+            elapsed = time.perf_counter() - start_time
+            metrics.count('neo4j.tweets', rows_written)
+            metrics.count('neo4j.viajes_bolt', round_trips)
+            metrics.count('neo4j.transacciones', transactions)
+            print(Fore.GREEN + f"Datos insertados en Neo4j por lotes de {batch_size} exitosamente." + Style.RESET_ALL)
+            self.report_throughput("por lotes", rows_written, elapsed)
+        except Exception as e:
+            print(Fore.RED + f"Error al insertar datos por lotes en Neo4j: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    @staticmethod
+    def partition_by_user(records, partitions):
+        # Todos los tweets de un mismo usuario caen en la misma partición (crc32 es estable
+        # entre ejecuciones, a diferencia de hash()), así que el MERGE de cada nodo Usuario
+        # y de sus tweets lo hace siempre un único hilo
+        result = [[] for _ in range(partitions)]
+        for record in records:
+            if record.nombre_usuario:
+                result[zlib.crc32(record.nombre_usuario.encode('utf-8')) % partitions].append(record)
+        return result
+
+    def write_partition(self, write, chunks):
+        # Un hilo y una sesión por partición. execute_write confirma cada fragmento en una
+        # transacción gestionada que el controlador repite ante errores transitorios
+        # (p. ej. DeadlockDetected entre relaciones que cruzan particiones); las sentencias
+        # usan MERGE, por lo que repetirlas es seguro
+        attempts = 0
+        statements = 0
+
+        def work(tx, chunk):
+            nonlocal attempts
+            attempts += 1
+            return write(tx, *chunk)
+
+        start_time = time.perf_counter()
+        with self.driver.session() as session:
+            for chunk in chunks:
+                statements += session.execute_write(work, chunk)
+        return {
+            'transactions': len(chunks),
+            'retries': attempts - len(chunks),
+            'statements': statements,
+            'seconds': time.perf_counter() - start_time
+        }
+
+    def insert_data_parallel(self, tweets_data, workers=DEFAULT_WRITE_WORKERS, batch_size=DEFAULT_BATCH_SIZE):
+        try:
+            if not tweets_data:
+                print(Fore.YELLOW + "No hay datos de tweets para insertar en Neo4j." + Style.RESET_ALL)
+                return
+            start_time = time.perf_counter()
+            records = TweetRecord.normalize_all(tweets_data)
+            partitions = [partition for partition in self.partition_by_user(records, workers) if partition]
+            rows = [[self.build_batch_rows(chunk) for chunk in self.utils.chunked(partition, batch_size)]
+                    for partition in partitions]
+            node_chunks = [[(users, tweets) for users, tweets, _, _, _ in partition if tweets]
+                           for partition in rows]
+            relationship_chunks = [[(mentions, hashtags, retweets) for _, _, mentions, hashtags, retweets in partition
+                                    if mentions or hashtags or retweets]
+                                   for partition in rows]
+
+            # Primero los nodos (usuarios, tweets y PUBLICA), que no se comparten entre particiones;
+            # después, con todos los nodos del lote ya escritos, las relaciones que pueden cruzarlas
+            # (menciones, hashtags y retweets), igual que en una transacción de insert_data_batched
+            with ThreadPoolExecutor(max_workers=max(len(partitions), 1), thread_name_prefix='neo4j') as executor:
+                node_stats = list(executor.map(self.write_partition, [self.write_nodes] * len(partitions), node_chunks))
+                relationship_stats = list(executor.map(self.write_partition,
+                                                       [self.write_relationships] * len(partitions),
+                                                       relationship_chunks))
+            elapsed = time.perf_counter() - start_time
+
+            rows_written = sum(len(tweets) for partition in node_chunks for _, tweets in partition)
+            stats = node_stats + relationship_stats
+            transactions = sum(item['transactions'] for item in stats)
+            retries = sum(item['retries'] for item in stats)
+            metrics.count('neo4j.tweets', rows_written)
+            metrics.count('neo4j.viajes_bolt', sum(item['statements'] for item in stats) + transactions)
+            metrics.count('neo4j.transacciones', transactions + retries)
+            metrics.count('neo4j.reintentos', retries)
+            print(Fore.GREEN + f"Datos insertados en Neo4j con {workers} escritores en paralelo exitosamente." + Style.RESET_ALL)
+            self.report_throughput(f"{workers} escritores", rows_written, elapsed)
+            busy = [nodes['seconds'] + relationships['seconds']
+                    for nodes, relationships in zip(node_stats, relationship_stats)]
+            print(Fore.CYAN + f"Neo4j ({workers} escritores): tweets por partición "
+                  f"{'/'.join(str(len(partition)) for partition in partitions)}, "
+                  f"tiempo por hilo {'/'.join(f'{seconds:.2f}' for seconds in busy)} s, "
+                  f"{transactions} transacciones, {retries} reintentos" + Style.RESET_ALL)
+        except Exception as e:
+            print(Fore.RED + f"Error al insertar datos en paralelo en Neo4j: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    def report_throughput(self, mode, rows_written, elapsed):
+        rate = rows_written / elapsed if elapsed > 0 else 0.0
+        print(Fore.CYAN + f"Neo4j ({mode}): {rows_written} tweets en {elapsed:.2f} s ({rate:.1f} filas/s)" + Style.RESET_ALL)
+
     def close_connection(self):
         self.driver.close()
         print(Fore.GREEN + "Conexión a Neo4j cerrada." + Style.RESET_ALL)
@@ -0,0 +1,209 @@
+# neo4j_import.py
+
+import csv
+import json
+import os
+import traceback
+from colorama import Fore, Style
+from neo4j_db import Neo4jDatabase
+
+DEFAULT_IMPORT_DIR = 'data/neo4j_import'
+DEFAULT_ROWS_PER_FILE = 1000000  # Filas por archivo de datos antes de abrir la siguiente parte
+MANIFEST_FILE = 'manifest.json'
+
+# Archivos del formato de neo4j-admin database import: cabecera aparte y partes sin cabecera.
+# (nombre, tipo, etiqueta o tipo de relación, cabecera, columnas de la fila de UNWIND)
+ENTITIES = [
+    ('usuarios', 'nodes', 'Usuario',
+     ['nombre_usuario:ID(Usuario)', 'seguidores:long', 'verificado:boolean', 'ubicacion'],
+     ['nombre_usuario', 'seguidores', 'verificado', 'ubicacion']),
+    ('tweets', 'nodes', 'Tweet',
+     ['tweet_id:ID(Tweet)', 'contenido', 'fecha_hora', 'retweets:long', 'likes:long', 'sentimiento:double'],
+     ['tweet_id', 'contenido', 'fecha_hora', 'retweets', 'likes', 'sentimiento']),
+    ('hashtags', 'nodes', 'Hashtag',
+     ['texto:ID(Hashtag)'],
+     ['hashtag']),
+    ('publica', 'relationships', 'PUBLICA',
+     [':START_ID(Usuario)', ':END_ID(Tweet)'],
+     ['nombre_usuario', 'tweet_id']),
+    ('menciona', 'relationships', 'MENTIONA',
+     [':START_ID(Usuario)', ':END_ID(Usuario)'],
+     ['nombre_usuario', 'mention']),
+    ('trata_de', 'relationships', 'TRATA_DE',
+     [':START_ID(Tweet)', ':END_ID(Hashtag)'],
+     ['tweet_id', 'hashtag']),
+    ('retweetea', 'relationships', 'RETWEETEA',
+     [':START_ID(Tweet)', ':END_ID(Tweet)'],
+     ['tweet_id', 'ref_tweet_id'])
+]
+
+# Alternativa para una base en ejecución: LOAD CSV por posición (las partes no llevan
+# cabecera) y lotes de transacciones con CALL {} IN TRANSACTIONS
+LOAD_CSV_QUERIES = {
+    'usuarios': """
+        MERGE (u:Usuario {nombre_usuario: row[0]})
+        SET u.seguidores = toInteger(row[1]), u.verificado = row[2] = 'true', u.ubicacion = row[3]
+    """,
+    'tweets': """
+        MERGE (t:Tweet {tweet_id: row[0]})
+        SET t.contenido = row[1], t.fecha_hora = row[2], t.retweets = toInteger(row[3]),
+            t.likes = toInteger(row[4]), t.sentimiento = toFloat(row[5])
+    """,
+    'hashtags': """
+        MERGE (h:Hashtag {texto: row[0]})
+    """,
+    'publica': """
+        MATCH (u:Usuario {nombre_usuario: row[0]}), (t:Tweet {tweet_id: row[1]})
+        MERGE (u)-[:PUBLICA]->(t)
+    """,
+    'menciona': """
+        MATCH (u:Usuario {nombre_usuario: row[0]}), (m:Usuario {nombre_usuario: row[1]})
+        MERGE (u)-[:MENTIONA]->(m)
+    """,
+    'trata_de': """
+        MATCH (t:Tweet {tweet_id: row[0]}), (h:Hashtag {texto: row[1]})
+        MERGE (t)-[:TRATA_DE]->(h)
+    """,
+    'retweetea': """
+        MATCH (t:Tweet {tweet_id: row[0]}), (rt:Tweet {tweet_id: row[1]})
+        MERGE (t)-[:RETWEETEA]->(rt)
+    """
+}
+DEFAULT_LOAD_CSV_BATCH = 10000
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+class PartWriter:
+    # Escribe filas en archivos numerados de tamaño acotado
+    def __init__(self, directory, name, rows_per_file):
+        self.directory = directory
+        self.name = name
+        self.rows_per_file = rows_per_file
+        self.parts = []
+        self.file = None
+        self.writer = None
+        self.rows_in_part = 0
+        self.rows = 0
+
+    def open_part(self):
+        self.close()
+        filename = f"{self.name}_{len(self.parts) + 1:04d}.csv"
+        self.parts.append(filename)
+        self.file = open(os.path.join(self.directory, filename), 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.rows_in_part = 0
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.writer is None or self.rows_in_part >= self.rows_per_file:
+                self.open_part()
+            self.writer.writerow(row)
+            self.rows_in_part += 1
+            self.rows += 1
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+class Neo4jCSVExporter:
+    # Convierte el flujo de registros normalizados en los CSV de nodos y relaciones de
+    # neo4j-admin database import. Sólo escribe archivos: no necesita una instancia de Neo4j.
+    def __init__(self, directory=DEFAULT_IMPORT_DIR, rows_per_file=DEFAULT_ROWS_PER_FILE):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.writers = {name: PartWriter(directory, name, rows_per_file) for name, *_ in ENTITIES}
+        # Los usuarios y hashtags se repiten entre tweets; sólo se escribe su primera aparición
+        self.seen_users = set()
+        self.seen_hashtags = set()
+
+    def write(self, records):
+        try:
+            users, tweets, mentions, hashtags, retweets = Neo4jDatabase.build_batch_rows(records)
+            users = [user for user in users if user['nombre_usuario'] not in self.seen_users]
+            self.seen_users.update(user['nombre_usuario'] for user in users)
+            new_hashtags = []
+            for row in hashtags:
+                if row['hashtag'] not in self.seen_hashtags:
+                    self.seen_hashtags.add(row['hashtag'])
+                    new_hashtags.append(row)
+            rows = {
+                'usuarios': users,
+                'tweets': tweets,
+                'hashtags': new_hashtags,
+                'publica': tweets,
+                'menciona': mentions,
+                'trata_de': hashtags,
+                'retweetea': retweets
+            }
+            for name, _, _, _, columns in ENTITIES:
+                self.writers[name].write_rows([csv_value(row[column]) for column in columns] for row in rows[name])
+        except Exception as e:
+            print(Fore.RED + f"Error al generar los CSV de importación de Neo4j: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    def close(self):
+        # Escribe las cabeceras y el manifiesto, y devuelve el comando de importación
+        manifest = {}
+        for name, kind, label, header, _ in ENTITIES:
+            writer = self.writers[name]
+            writer.close()
+            header_file = f"{name}_header.csv"
+            with open(os.path.join(self.directory, header_file), 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerow(header)
+            manifest[name] = {'kind': kind, 'label': label, 'header': header_file,
+                              'parts': writer.parts, 'rows': writer.rows}
+        with open(os.path.join(self.directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        command = self.import_command(manifest)
+        with open(os.path.join(self.directory, 'import.sh'), 'w', encoding='utf-8') as f:
+            f.write("#!/bin/sh\n# Ejecutar con la base de datos detenida\n" + command + "\n")
+        totals = ', '.join(f"{name}: {entry['rows']}" for name, entry in manifest.items())
+        print(Fore.GREEN + f"CSV de importación de Neo4j generados en '{self.directory}' ({totals})." + Style.RESET_ALL)
+        print(Fore.CYAN + f"Importación inicial (base detenida):\n{command}" + Style.RESET_ALL)
+        return command
+
+    def import_command(self, manifest, database='neo4j'):
+        # Las relaciones con nodos ausentes (menciones o retweets fuera del corpus) se omiten,
+        # igual que los MATCH de la escritura con Cypher
+        arguments = [f"neo4j-admin database import full {database}"]
+        for name, entry in manifest.items():
+            if not entry['parts']:
+                continue
+            files = ','.join(os.path.join(self.directory, filename) for filename in [entry['header']] + entry['parts'])
+            arguments.append(f"--{entry['kind']}={entry['label']}={files}")
+        # Los tweets pueden contener saltos de línea dentro de campos entrecomillados
+        arguments += ["--multiline-fields=true", "--skip-duplicate-nodes=true", "--skip-bad-relationships=true"]
+        return ' \\\n    '.join(arguments)
+
+def load_csv_import(neo4j_db, directory=DEFAULT_IMPORT_DIR, base_url='file:///', batch_rows=DEFAULT_LOAD_CSV_BATCH):
+    # Carga los CSV generados en una base de datos en ejecución. Los archivos deben ser
+    # accesibles por el servidor en base_url (por defecto, su directorio de importación).
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        with neo4j_db.driver.session() as session:
+            # Los nodos antes que las relaciones (el orden de ENTITIES)
+            for name, *_ in ENTITIES:
+                for filename in manifest[name]['parts']:
+                    # CALL {} IN TRANSACTIONS requiere una transacción implícita (session.run)
+                    session.run(f"""
+                        LOAD CSV FROM $url AS row
+                        CALL {{
+                            WITH row
+                            {LOAD_CSV_QUERIES[name]}
+                        }} IN TRANSACTIONS OF {int(batch_rows)} ROWS
+                    """, url=base_url + filename).consume()
+                print(Fore.GREEN + f"LOAD CSV de {name}: {manifest[name]['rows']} filas." + Style.RESET_ALL)
+    except Exception as e:
+        print(Fore.RED + f"Error al cargar los CSV en Neo4j: {e}" + Style.RESET_ALL)
+        traceback.print_exc()
+        raise
@@ -1,21 +1,41 @@
 # openai_analysis.py
 
 import os
-import time
-import requests
-import json
-import re
-from utils import Utils
+from utils import Utils, lazy_import
+from records import TweetRecord
 from colorama import Fore, Style
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http_client import HTTPClient, RateLimitBudget
 
 MAX_RETRIES = 5  # Número máximo de reintentos
 INITIAL_WAIT_TIME = 2  # Tiempo inicial de espera en segundos
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+SINGLE_PROMPT_TOKEN_BUDGET = 60000  # Por encima de este tamaño se usa map-reduce
+CHUNK_TOKEN_BUDGET = 12000  # Tokens de tweets por fragmento en la fase map
+MAP_MAX_TOKENS = 500  # Longitud máxima de cada resumen parcial
+DEFAULT_MAP_WORKERS = 4
+CHARS_PER_TOKEN = 4  # Aproximación para estimar tokens sin tokenizador
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.5
+
+requests = lazy_import('requests')
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
 
 class OpenAIAnalysis:
-    def __init__(self):
+    def __init__(self, base_url=None, map_workers=DEFAULT_MAP_WORKERS, cache=None):
         self.utils = Utils()
+        self.cache = cache  # ResponseCache opcional; None desactiva la caché
         self.api_key = self.load_api_key()
+        base_url = base_url or os.getenv('OPENAI_API_BASE') or DEFAULT_API_BASE
+        self.api_url = base_url.rstrip('/') + "/chat/completions"
+        self.map_workers = max(1, map_workers)
+        self.http = HTTPClient('OpenAI', headers={
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }, max_retries=MAX_RETRIES, backoff_base=INITIAL_WAIT_TIME, rate_limits=RateLimitBudget())
 
     def load_api_key(self):
         try:
@@ -30,78 +50,104 @@ class OpenAIAnalysis:
             traceback.print_exc()
             raise
 
-    def ask_singularity(self, prompt, max_tokens=4000, retry_count=0):
+    def ask_singularity(self, prompt, max_tokens=4000):
         if not self.api_key:
             raise Exception("La variable de entorno OPENAI_API_KEY no se ha configurado.")
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        # Consultar la caché antes de cualquier llamada HTTP
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(MODEL, prompt, max_tokens, TEMPERATURE)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         data = {
-            "model": "gpt-4o-mini",  # Modelo corregido
+            "model": MODEL,
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens,
-            "temperature": 0.5
+            "temperature": TEMPERATURE
         }
 
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                return response.json()['choices'][0]['message']['content'].strip()
-            else:
-                # Manejo de errores específicos basados en el código de estado
-                error_response = response.json()
-                if response.status_code == 500 and error_response.get("error", {}).get("code") == "request_timeout":
-                    if retry_count < MAX_RETRIES:
-                        wait_time = INITIAL_WAIT_TIME * (2 ** retry_count)
-                        print(f"Tiempo de espera agotado. Reintentando {retry_count + 1} en {wait_time} segundos.")
-                        time.sleep(wait_time)
-                        return self.ask_singularity(prompt, max_tokens, retry_count + 1)
-                    else:
-                        raise Exception(f"Tiempo de espera agotado después de {MAX_RETRIES} reintentos.")
-                else:
-                    raise Exception(f"Error en la API: {response.status_code}, {response.text}")
-
+            # Reintentos con backoff y jitter, Retry-After y circuit breaker en HTTPClient
+            response = self.http.request('POST', self.api_url, endpoint='chat/completions', json=data)
         except requests.exceptions.RequestException as e:
-            if retry_count < MAX_RETRIES:
-                wait_time = INITIAL_WAIT_TIME * (2 ** retry_count)
-                print(f"Error de solicitud: {str(e)}. Reintentando {retry_count + 1} en {wait_time} segundos.")
-                time.sleep(wait_time)
-                return self.ask_singularity(prompt, max_tokens, retry_count + 1)
-            else:
-                raise Exception(f"Error de solicitud no resuelto después de {MAX_RETRIES} reintentos. Error: {str(e)}")
-
-    def singularity(self, tweets_data):
+            raise Exception(f"Error de solicitud no resuelto después de {MAX_RETRIES} reintentos. Error: {str(e)}")
+
+        if response.status_code != 200:
+            raise Exception(f"Error en la API: {response.status_code}, {response.text}")
+
+        content = response.json()['choices'][0]['message']['content'].strip()
+        if self.cache is not None:
+            self.cache.put(cache_key, content)
+        return content
+
+    def build_prompt(self, content):
+        return (
+            f"Analiza los siguientes tweets y proporciona un resumen de las tendencias, sentimientos y temas principales:\n\n"
+            f"   {content}\n\n"
+            f"Lo que harás es redactar un tweet con esta información para compartir con otros usuarios. Mencionando que el análisis fue realizado por OpenAI utilizando herramientas programáticas y bases de datos para la materia de Modelado de Datos de la Maestría en Cómputo Aplicado como proyecto final de esa materia.\n\n"
+            f"Debes de utilizar forzozamente emojis, hashtags y menciones para hacerlo más interesante y atractivo para los lectores.\n\n"
+        )
+
+    def split_into_chunks(self, tweets_text, token_budget=CHUNK_TOKEN_BUDGET):
+        # Agrupa tweets consecutivos sin superar el presupuesto de tokens por fragmento
+        chunks, current, current_tokens = [], [], 0
+        for text in tweets_text:
+            tokens = estimate_tokens(text)
+            if current and current_tokens + tokens > token_budget:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def summarize_chunk(self, tweets_text):
+        prompt = (
+            "Resume en viñetas breves las tendencias, sentimientos, temas, hashtags y menciones principales "
+            "de los siguientes tweets:\n\n" + "\n\n".join(tweets_text)
+        )
+        return self.ask_singularity(prompt, max_tokens=MAP_MAX_TOKENS)
+
+    def map_reduce(self, tweets_text):
+        # Map: resúmenes parciales en paralelo con un número acotado de hilos (map conserva el orden)
+        chunks = self.split_into_chunks(tweets_text)
+        print(Fore.BLUE + f"Resumiendo {len(tweets_text)} tweets en {len(chunks)} fragmentos con {self.map_workers} hilos..." + Style.RESET_ALL)
+        with ThreadPoolExecutor(max_workers=self.map_workers) as executor:
+            partial_summaries = list(executor.map(self.summarize_chunk, chunks))
+        # Reduce: si los resúmenes aún exceden el presupuesto, se vuelven a agrupar
+        combined = "\n\n".join(partial_summaries)
+        if estimate_tokens(combined) > SINGLE_PROMPT_TOKEN_BUDGET:
+            return self.map_reduce(partial_summaries)
+        return combined
+
+    def singularity(self, tweets_data, group_sizes=None):
         try:
             if not tweets_data:
                 print(Fore.YELLOW + "No hay datos de tweets para analizar con OpenAI." + Style.RESET_ALL)
                 return None
             print(Fore.BLUE + "Realizando análisis con OpenAI..." + Style.RESET_ALL)
             # Preparar el contenido para enviar a OpenAI
-            if all('tweet' in data and 'user' in data for data in tweets_data):
-                # Datos provenientes de la API
-                tweets_text = [data['tweet'].text for data in tweets_data if 'tweet' in data and data['tweet']]
-            else:
-                # Datos provenientes de archivos JSON
-                tweets_text = [data.get('contenido', '') for data in tweets_data]
+            group_sizes = group_sizes or {}
+            tweets_text = []
+            for record in TweetRecord.normalize_all(tweets_data):
+                text = record.contenido or ''
+                copies = group_sizes.get(record.tweet_id, 1)
+                if copies > 1:
+                    # Un solo representante por grupo de casi duplicados, con el número de copias
+                    text += f" [publicado {copies} veces]"
+                tweets_text.append(text)
 
             combined_text = "\n\n".join(tweets_text)
+            if estimate_tokens(combined_text) > SINGLE_PROMPT_TOKEN_BUDGET:
+                # Demasiado grande para una sola solicitud: resumir por fragmentos y combinar
+                combined_text = self.map_reduce(tweets_text)
 
             # Crear el prompt para OpenAI
-            prompt = (
-                f"Analiza los siguientes tweets y proporciona un resumen de las tendencias, sentimientos y temas principales:\n\n"
-                f"   {combined_text}\n\n"
-                f"Lo que harás es redactar un tweet con esta información para compartir con otros usuarios. Mencionando que el análisis fue realizado por OpenAI utilizando herramientas programáticas y bases de datos para la materia de Modelado de Datos de la Maestría en Cómputo Aplicado como proyecto final de esa materia.\n\n"
-                f"Debes de utilizar forzozamente emojis, hashtags y menciones para hacerlo más interesante y atractivo para los lectores.\n\n"
-            )
+            prompt = self.build_prompt(combined_text)
 
             # Enviar la solicitud a OpenAI usando ask_singularity
             analysis_text = self.ask_singularity(prompt)
@@ -114,4 +160,4 @@ class OpenAIAnalysis:
         except Exception as e:
             print(Fore.RED + f"Error en el análisis con OpenAI: {e}" + Style.RESET_ALL)
             traceback.print_exc()
-            return None 
+            return None
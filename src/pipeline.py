@@ -0,0 +1,135 @@
+# pipeline.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+
+END = None  # Marca de fin de flujo que recorre todas las colas
+
+class StageMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.batches = 0
+        self.records = 0
+        self.busy_time = 0.0
+
+class AsyncPipeline:
+    # Etapas concurrentes unidas por colas acotadas:
+    #   origen -> normalización -> sentimiento -> {un destino por sink}
+    # El trabajo bloqueante de cada etapa corre en su propio hilo, de modo que la
+    # descarga de la siguiente página se solapa con las escrituras en las bases de datos.
+    # El origen puede ser varios iterables (p. ej. uno por usuario) que se recorren a la vez
+    # con hasta source_workers hilos.
+    def __init__(self, normalize, enrich, sinks, queue_size, source_workers=1):
+        self.normalize = normalize
+        self.enrich = enrich
+        self.sinks = sinks  # {nombre: función que recibe la lista de registros}
+        self.queue_size = queue_size
+        self.source_workers = max(1, source_workers)
+        self.metrics = {}
+        self.max_depth = {}
+        self.executors = {}
+        self.wall_time = 0.0
+
+    def stage_metrics(self, name, workers=1):
+        if name not in self.metrics:
+            self.metrics[name] = StageMetrics(name)
+            # Un hilo por etapa: cada conexión de base de datos se usa siempre desde el mismo hilo
+            self.executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"etapa-{name}")
+        return self.metrics[name]
+
+    async def put(self, queue_name, queue, item):
+        await queue.put(item)
+        self.max_depth[queue_name] = max(self.max_depth.get(queue_name, 0), queue.qsize())
+
+    async def call(self, name, fn, *args):
+        metrics = self.stage_metrics(name)
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        result = await loop.run_in_executor(self.executors[name], fn, *args)
+        metrics.busy_time += time.perf_counter() - start_time
+        return result
+
+    async def drain(self, batches, out_name, out_queue, semaphore):
+        # Cada iterable lo avanza un solo hilo a la vez; el semáforo limita cuántos se
+        # recorren en paralelo
+        async with semaphore:
+            iterator = iter(batches)
+            metrics = self.stage_metrics('origen')
+            while True:
+                batch = await self.call('origen', next, iterator, END)
+                if batch is END:
+                    break
+                metrics.batches += 1
+                metrics.records += len(batch)
+                await self.put(out_name, out_queue, batch)
+
+    async def source(self, sources, out_name, out_queue):
+        self.stage_metrics('origen', workers=self.source_workers)
+        semaphore = asyncio.Semaphore(self.source_workers)
+        await asyncio.gather(*(self.drain(batches, out_name, out_queue, semaphore) for batches in sources))
+        await out_queue.put(END)
+
+    async def stage(self, name, fn, in_queue, outputs):
+        metrics = self.stage_metrics(name)
+        while True:
+            item = await in_queue.get()
+            if item is END:
+                break
+            records = await self.call(name, fn, item)
+            metrics.batches += 1
+            metrics.records += len(records)
+            for out_name, out_queue in outputs:
+                await self.put(out_name, out_queue, records)
+        for _, out_queue in outputs:
+            await out_queue.put(END)
+
+    def enrich_batch(self, records):
+        self.enrich(records)
+        return records
+
+    def sink_batch(self, fn):
+        def write(records):
+            fn(records)
+            return records
+        return write
+
+    async def run(self, *sources):
+        start_time = time.perf_counter()
+        raw_queue = asyncio.Queue(maxsize=self.queue_size)
+        normalized_queue = asyncio.Queue(maxsize=self.queue_size)
+        sink_queues = {name: asyncio.Queue(maxsize=self.queue_size) for name in self.sinks}
+
+        coroutines = [
+            self.source(sources, 'origen->normalización', raw_queue),
+            self.stage('normalización', self.normalize, raw_queue,
+                       [('normalización->sentimiento', normalized_queue)]),
+            self.stage('sentimiento', self.enrich_batch, normalized_queue,
+                       [(f'sentimiento->{name}', queue) for name, queue in sink_queues.items()])
+        ]
+        coroutines += [
+            self.stage(name, self.sink_batch(fn), sink_queues[name], [])
+            for name, fn in self.sinks.items()
+        ]
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            # Si una etapa falla, las demás quedarían bloqueadas en sus colas
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            for executor in self.executors.values():
+                executor.shutdown(wait=False)
+            self.wall_time = time.perf_counter() - start_time
+
+    def report(self):
+        print(Fore.CYAN + f"Pipeline asíncrono completado en {self.wall_time:.2f} s:" + Style.RESET_ALL)
+        for metrics in self.metrics.values():
+            rate = metrics.records / metrics.busy_time if metrics.busy_time > 0 else 0.0
+            print(f"- {metrics.name}: {metrics.batches} lotes, {metrics.records} tweets, "
+                  f"{metrics.busy_time:.2f} s ocupada ({rate:.1f} tweets/s)")
+        for queue_name, depth in self.max_depth.items():
+            print(f"- cola {queue_name}: profundidad máxima {depth}/{self.queue_size}")
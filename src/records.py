@@ -0,0 +1,125 @@
+# records.py
+
+from entities import extract_entities
+
+class TweetRecord:
+    # Registro plano de un tweet con __slots__: sin diccionario por instancia, por lo que
+    # ocupa una fracción de la memoria de un dict y el acceso a atributos es directo.
+    # Se construye una sola vez en la normalización y lo consumen todos los destinos.
+    __slots__ = (
+        'tweet_id', 'usuario_id', 'nombre_usuario', 'contenido', 'fecha_hora', 'retweets',
+        'likes', 'seguidores', 'ubicacion', 'verificado', 'lang', 'referenced_tweets', 'sentimiento',
+        'representante', 'entities'
+    )
+
+    # Campos que se guardan en el almacén de tweets (el sentimiento vive en su propia caché
+    # y las entidades se derivan del contenido)
+    STORED_FIELDS = __slots__[:12]
+
+    def __init__(self, tweet_id, usuario_id, nombre_usuario=None, contenido=None, fecha_hora=None,
+                 retweets=0, likes=0, seguidores=0, ubicacion=None, verificado=False, lang=None,
+                 referenced_tweets=(), sentimiento=None, representante=None):
+        self.tweet_id = tweet_id
+        self.usuario_id = usuario_id
+        self.nombre_usuario = nombre_usuario
+        self.contenido = contenido
+        self.fecha_hora = fecha_hora
+        self.retweets = retweets or 0
+        self.likes = likes or 0
+        self.seguidores = seguidores or 0
+        self.ubicacion = ubicacion
+        self.verificado = bool(verificado)
+        self.lang = lang
+        self.referenced_tweets = tuple(referenced_tweets or ())
+        self.sentimiento = sentimiento
+        # Contenido del tweet representativo cuando éste es casi idéntico a uno anterior
+        self.representante = representante
+        # Hashtags, menciones y URLs: se extraen en el primer acceso y se comparten entre
+        # todos los destinos; una carga que no los usa no paga las expresiones regulares
+        self.entities = None
+
+    def get_entities(self):
+        entities = self.entities
+        if entities is None:
+            entities = self.entities = extract_entities(self.contenido)
+        return entities
+
+    @property
+    def hashtags(self):
+        return self.get_entities()[0]
+
+    @property
+    def mentions(self):
+        return self.get_entities()[1]
+
+    @property
+    def urls(self):
+        return self.get_entities()[2]
+
+    @classmethod
+    def from_api(cls, tweet, user):
+        # Objetos de tweepy (o compatibles); los atributos opcionales pueden faltar
+        if not user:
+            return None
+        user_metrics = getattr(user, 'public_metrics', None) or {}
+        tweet_metrics = getattr(tweet, 'public_metrics', None) or {}
+        created_at = getattr(tweet, 'created_at', None)
+        referenced = getattr(tweet, 'referenced_tweets', None) or ()
+        return cls(
+            str(tweet.id),
+            str(user.id),
+            getattr(user, 'username', None),
+            tweet.text,
+            created_at.isoformat() if created_at else None,
+            tweet_metrics.get('retweet_count', 0),
+            tweet_metrics.get('like_count', 0),
+            user_metrics.get('followers_count', 0),
+            getattr(user, 'location', None),
+            getattr(user, 'verified', None),
+            getattr(tweet, 'lang', None),
+            [str(ref.id) for ref in referenced]
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        # Diccionarios provenientes de archivos JSON/NDJSON
+        get = data.get
+        return cls(
+            get('tweet_id'),
+            get('usuario_id'),
+            get('nombre_usuario'),
+            get('contenido'),
+            get('fecha_hora'),
+            get('retweets', 0),
+            get('likes', 0),
+            get('seguidores', 0),
+            get('ubicacion'),
+            get('verificado', False),
+            get('lang'),
+            get('referenced_tweets'),
+            get('sentimiento')
+        )
+
+    @classmethod
+    def from_data(cls, data):
+        # Punto único de normalización: acepta registros ya normalizados,
+        # registros de la API ({'tweet', 'user'}) o diccionarios de archivos
+        if isinstance(data, cls):
+            return data
+        if 'tweet' in data and 'user' in data:
+            return cls.from_api(data['tweet'], data['user'])
+        return cls.from_dict(data)
+
+    @classmethod
+    def normalize_all(cls, tweets_data):
+        # Descarta los registros sin usuario; no hace trabajo si ya están normalizados
+        return [record for record in map(cls.from_data, tweets_data) if record]
+
+    def to_dict(self, fields=STORED_FIELDS):
+        data = {field: getattr(self, field) for field in fields}
+        if 'referenced_tweets' in data:
+            data['referenced_tweets'] = list(data['referenced_tweets'])
+        return data
+
+    def __repr__(self):
+        return f"TweetRecord(tweet_id={self.tweet_id!r}, nombre_usuario={self.nombre_usuario!r})"
@@ -0,0 +1,102 @@
+# response_cache.py
+
+import sqlite3
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from colorama import Fore, Style
+from instrumentation import metrics
+
+CACHE_PATH = 'data/openai_cache.db'
+DEFAULT_TTL = 7 * 24 * 3600  # Segundos que una respuesta se considera válida
+DEFAULT_MAX_ENTRIES = 1000
+
+class ResponseCache:
+    # Caché en disco de respuestas de OpenAI con expiración (TTL) y desalojo LRU por tamaño
+    def __init__(self, cache_path=CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Las solicitudes map-reduce llegan desde varios hilos
+        self.lock = threading.Lock()
+        self.connection = self.connect()
+
+    def connect(self):
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.cache_path, check_same_thread=False)
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                respuesta TEXT,
+                creado REAL,
+                ultimo_acceso REAL
+            );
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas(ultimo_acceso)")
+            connection.commit()
+            return connection
+        except Exception as e:
+            print(Fore.RED + f"Error al abrir la caché de respuestas: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    @staticmethod
+    def make_key(model, prompt, max_tokens, temperature):
+        payload = json.dumps([model, prompt, max_tokens, temperature], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            now = time.time()
+            row = self.connection.execute(
+                "SELECT respuesta, creado FROM respuestas WHERE clave = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self.connection.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (now, key))
+                self.connection.commit()
+                self.hits += 1
+                metrics.count('openai.cache_aciertos')
+                return row[0]
+            if row:
+                # Respuesta expirada
+                self.connection.execute("DELETE FROM respuestas WHERE clave = ?", (key,))
+                self.connection.commit()
+            self.misses += 1
+            metrics.count('openai.cache_fallos')
+            return None
+
+    def put(self, key, response):
+        with self.lock:
+            now = time.time()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, respuesta, creado, ultimo_acceso) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            # Desalojar las entradas usadas hace más tiempo si se supera el tamaño máximo
+            self.connection.execute("""
+                DELETE FROM respuestas WHERE clave IN (
+                    SELECT clave FROM respuestas ORDER BY ultimo_acceso DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            deleted = self.connection.execute("DELETE FROM respuestas").rowcount
+            self.connection.commit()
+        print(Fore.GREEN + f"Caché de respuestas de OpenAI vaciada ({deleted} entradas)." + Style.RESET_ALL)
+
+    def report(self):
+        print(Fore.CYAN + f"Caché de OpenAI: {self.hits} aciertos, {self.misses} fallos." + Style.RESET_ALL)
+
+    def close_connection(self):
+        if self.connection:
+            self.connection.close()
@@ -0,0 +1,178 @@
+# sentiment.py
+
+import sqlite3
+import hashlib
+import os
+import traceback
+import time
+from concurrent.futures import ProcessPoolExecutor
+from colorama import Fore, Style
+from utils import lazy_import
+from instrumentation import metrics
+
+CACHE_PATH = 'data/sentiment_cache.db'
+LOOKUP_CHUNK = 500  # Límite de parámetros por consulta IN (...)
+MIN_CHUNK_SIZE = 250  # Tweets mínimos por tarea: por debajo, serializar cuesta más que puntuar
+SERIAL_SAMPLE_SIZE = 1000  # Muestra usada para estimar el rendimiento en serie
+
+textblob = lazy_import('textblob')
+
+def score_chunk(contents):
+    # Se ejecuta en los procesos hijos; debe ser una función de módulo para poder serializarse
+    return [textblob.TextBlob(contenido or '').sentiment.polarity for contenido in contents]
+
+def warm_up():
+    # Importa textblob y carga su léxico una sola vez por proceso, fuera de las mediciones
+    score_chunk(['warm up'])
+
+class SentimentEnricher:
+    def __init__(self, cache_path=CACHE_PATH, workers=1):
+        self.cache_path = cache_path
+        self.workers = max(1, workers or 1)
+        self.connection = self.connect()
+        self.hits = 0
+        self.misses = 0
+        self.scored = 0
+        self.scoring_time = 0.0
+        self.serial_sample = None
+        self.executor = None
+
+    def connect(self):
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.cache_path, check_same_thread=False)
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS sentimientos (
+                hash TEXT PRIMARY KEY,
+                polaridad REAL
+            );
+            """)
+            connection.commit()
+            return connection
+        except Exception as e:
+            print(Fore.RED + f"Error al abrir la caché de sentimiento: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    @staticmethod
+    def content_hash(contenido):
+        return hashlib.sha1((contenido or '').encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def score(contenido):
+        return textblob.TextBlob(contenido or '').sentiment.polarity
+
+    def lookup(self, hashes):
+        cached = {}
+        hashes = list(hashes)
+        for start in range(0, len(hashes), LOOKUP_CHUNK):
+            chunk = hashes[start:start + LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT hash, polaridad FROM sentimientos WHERE hash IN ({placeholders})", chunk
+            ).fetchall()
+            cached.update(rows)
+        return cached
+
+    def score_missing(self, pending):
+        # pending: {hash: contenido}; devuelve {hash: polaridad}
+        keys = list(pending)
+        contents = [pending[key] for key in keys]
+        start_time = time.perf_counter()
+        if self.workers > 1 and len(contents) >= MIN_CHUNK_SIZE * 2:
+            polarities = self.score_parallel(contents)
+        else:
+            polarities = score_chunk(contents)
+        self.scoring_time += time.perf_counter() - start_time
+        self.scored += len(contents)
+        return dict(zip(keys, polarities))
+
+    def get_executor(self):
+        # Un único pool para toda la ejecución: los procesos importan textblob al arrancar
+        # y se reutilizan en cada lote; se cierra en close_connection
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        return self.executor
+
+    def score_parallel(self, contents):
+        # Un fragmento por proceso para que todos trabajen en cada lote;
+        # executor.map conserva el orden de entrada
+        chunk_size = max(MIN_CHUNK_SIZE, -(-len(contents) // self.workers))
+        chunks = [contents[start:start + chunk_size] for start in range(0, len(contents), chunk_size)]
+        polarities = []
+        for result in self.get_executor().map(score_chunk, chunks):
+            polarities.extend(result)
+        return polarities
+
+    def measure_serial_rate(self, contents):
+        sample = contents[:SERIAL_SAMPLE_SIZE]
+        if not sample:
+            return 0.0
+        # El arranque de los procesos sí cuenta en el tiempo en paralelo, pero la importación
+        # diferida de textblob en este proceso no debe cargarse a la referencia en serie
+        warm_up()
+        start_time = time.perf_counter()
+        score_chunk(sample)
+        elapsed = time.perf_counter() - start_time
+        return len(sample) / elapsed if elapsed > 0 else 0.0
+
+    def enrich(self, records):
+        # Calcula el sentimiento una sola vez por contenido y lo adjunta a cada registro;
+        # se respeta el sentimiento que ya traigan (p. ej. de un archivo exportado) y los
+        # casi duplicados reciben el de su tweet representativo
+        try:
+            missing = [record for record in records if record.sentimiento is None]
+            texts = [record.contenido if record.representante is None else record.representante for record in missing]
+            hashes = [self.content_hash(text) for text in texts]
+            scores = self.lookup(set(hashes))
+            pending = {}
+            for key, text in zip(hashes, texts):
+                if key in scores:
+                    self.hits += 1
+                elif key not in pending:
+                    self.misses += 1
+                    pending[key] = text
+                else:
+                    self.hits += 1
+
+            if pending:
+                new_scores = self.score_missing(pending)
+                if self.workers > 1 and self.serial_sample is None:
+                    self.serial_sample = list(pending.values())[:SERIAL_SAMPLE_SIZE]
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO sentimientos (hash, polaridad) VALUES (?, ?)",
+                    new_scores.items()
+                )
+                self.connection.commit()
+                scores.update(new_scores)
+
+            for key, record in zip(hashes, missing):
+                record.sentimiento = scores[key]
+            metrics.count('sentimiento.cache_aciertos', len(hashes) - len(pending))
+            metrics.count('sentimiento.puntuados', len(pending))
+            return records
+        except Exception as e:
+            print(Fore.RED + f"Error al calcular el sentimiento: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            self.connection.rollback()
+            raise
+
+    def report(self):
+        print(Fore.CYAN + f"Caché de sentimiento: {self.hits} aciertos, {self.misses} tweets puntuados." + Style.RESET_ALL)
+        if not self.scored or self.scoring_time <= 0:
+            return
+        rate = self.scored / self.scoring_time
+        print(Fore.CYAN + f"Sentimiento: {self.scored} tweets en {self.scoring_time:.2f} s ({rate:.1f} tweets/s, {self.workers} procesos)" + Style.RESET_ALL)
+        if self.serial_sample:
+            serial_rate = self.measure_serial_rate(self.serial_sample)
+            if serial_rate > 0:
+                print(Fore.CYAN + f"Referencia en serie: {serial_rate:.1f} tweets/s (aceleración x{rate / serial_rate:.2f})" + Style.RESET_ALL)
+
+    def close_connection(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+        if self.connection:
+            self.connection.close()
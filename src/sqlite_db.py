@@ -1,16 +1,125 @@
 # sqlite_db.py
 
 import sqlite3
-from utils import Utils
-from textblob import TextBlob
+from utils import Utils, lazy_import
+from records import TweetRecord
+from instrumentation import metrics
 from colorama import Fore, Style
 import os
 import traceback
+import time
+
+textblob = lazy_import('textblob')
+
+# Ajustes para cargas masivas; al terminar se restauran los valores que tenía la conexión
+BULK_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -200000,  # ~200 MB
+    'temp_store': 'MEMORY'
+}
+
+# Migraciones del esquema; PRAGMA user_version guarda cuántas se han aplicado
+MIGRATIONS = [
+    # 1: marca de tiempo como entero (segundos Unix) e índices secundarios.
+    # Los agregados se eliminan para recrearlos a partir de la nueva columna.
+    [
+        "ALTER TABLE tweets ADD COLUMN fecha_epoch INTEGER",
+        "UPDATE tweets SET fecha_epoch = CAST(strftime('%s', fecha_hora) AS INTEGER) WHERE fecha_hora IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_usuarios_seguidores ON usuarios(seguidores)",
+        "CREATE INDEX IF NOT EXISTS idx_tweets_usuario_id ON tweets(usuario_id)",
+        "CREATE INDEX IF NOT EXISTS idx_tweets_fecha_epoch ON tweets(fecha_epoch)",
+        "DROP TRIGGER IF EXISTS tweets_resumen_ai",
+        "DROP TABLE IF EXISTS resumen_diario",
+        "DROP TABLE IF EXISTS resumen_usuario"
+    ],
+    # 2: índice relacional de hashtags y menciones. fecha_epoch se copia del tweet para
+    # que las consultas por periodo se resuelvan sólo con los índices de estas tablas.
+    [
+        """CREATE TABLE IF NOT EXISTS hashtags (
+            hashtag_id INTEGER PRIMARY KEY,
+            texto TEXT NOT NULL UNIQUE
+        )""",
+        """CREATE TABLE IF NOT EXISTS tweet_hashtags (
+            tweet_id TEXT NOT NULL,
+            hashtag_id INTEGER NOT NULL REFERENCES hashtags(hashtag_id),
+            fecha_epoch INTEGER,
+            PRIMARY KEY (tweet_id, hashtag_id)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS mentions (
+            tweet_id TEXT NOT NULL,
+            usuario_id TEXT,
+            nombre_mencionado TEXT NOT NULL COLLATE NOCASE,
+            fecha_epoch INTEGER,
+            PRIMARY KEY (tweet_id, nombre_mencionado)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_tweet_hashtags_fecha ON tweet_hashtags(fecha_epoch, hashtag_id)",
+        "CREATE INDEX IF NOT EXISTS idx_tweet_hashtags_hashtag ON tweet_hashtags(hashtag_id, tweet_id)",
+        "CREATE INDEX IF NOT EXISTS idx_mentions_nombre ON mentions(nombre_mencionado, fecha_epoch)"
+    ],
+    # 3: tweets referenciados (retweets y citas) y caché del ranking de influencia.
+    # influencia_estado guarda la firma de las aristas con la que se calculó el ranking.
+    [
+        """CREATE TABLE IF NOT EXISTS tweet_referencias (
+            tweet_id TEXT NOT NULL,
+            ref_tweet_id TEXT NOT NULL,
+            PRIMARY KEY (tweet_id, ref_tweet_id)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS influencia (
+            nombre_usuario TEXT PRIMARY KEY,
+            pagerank REAL,
+            grado_entrada INTEGER,
+            grado_salida INTEGER,
+            peso_entrada INTEGER,
+            seguidores INTEGER
+        )""",
+        """CREATE TABLE IF NOT EXISTS influencia_estado (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_influencia_pagerank ON influencia(pagerank)"
+    ]
+]
+ENTITIES_MIGRATION = 2
+BACKFILL_BATCH_SIZE = 50000
+
+# fecha_epoch se calcula en SQLite a partir del mismo parámetro que fecha_hora (?4)
+INSERT_TWEET = """
+    INSERT OR IGNORE INTO tweets (tweet_id, usuario_id, contenido, fecha_hora, fecha_epoch, retweets, likes, sentimiento)
+    VALUES (?1, ?2, ?3, ?4, CAST(strftime('%s', ?4) AS INTEGER), ?5, ?6, ?7)
+"""
+
+INSERT_HASHTAG = "INSERT OR IGNORE INTO hashtags (texto) VALUES (?)"
+# El identificador del hashtag se resuelve en SQLite con el índice único de texto
+INSERT_TWEET_HASHTAG = """
+    INSERT OR IGNORE INTO tweet_hashtags (tweet_id, hashtag_id, fecha_epoch)
+    SELECT ?1, hashtag_id, CAST(strftime('%s', ?3) AS INTEGER) FROM hashtags WHERE texto = ?2
+"""
+INSERT_REFERENCE = "INSERT OR IGNORE INTO tweet_referencias (tweet_id, ref_tweet_id) VALUES (?, ?)"
+INSERT_MENTION = """
+    INSERT OR IGNORE INTO mentions (tweet_id, usuario_id, nombre_mencionado, fecha_epoch)
+    VALUES (?1, ?2, ?3, CAST(strftime('%s', ?4) AS INTEGER))
+"""
+
+# Agregados incrementales por día y por usuario para los reportes del Analyzer
+ROLLUP_TABLES = {
+    'resumen_diario': """
+        SELECT date(fecha_epoch, 'unixepoch'), COUNT(*), COALESCE(SUM(sentimiento), 0), COUNT(sentimiento)
+        FROM tweets WHERE fecha_epoch IS NOT NULL
+        GROUP BY date(fecha_epoch, 'unixepoch')
+    """,
+    'resumen_usuario': """
+        SELECT usuario_id, COUNT(*), COALESCE(SUM(sentimiento), 0), COUNT(sentimiento)
+        FROM tweets WHERE usuario_id IS NOT NULL
+        GROUP BY usuario_id
+    """
+}
 
 class SQLiteDatabase:
     def __init__(self):
         self.utils = Utils()
         self.connection = self.connect()
+        self.saved_pragmas = None
 
     def connect(self):
         try:
@@ -18,7 +127,8 @@ class SQLiteDatabase:
             if not os.path.exists('data'):
                 os.makedirs('data')
             # Conectar a la base de datos SQLite
-            connection = sqlite3.connect('data/twitter.db')
+            # check_same_thread=False: en modo --async la conexión se usa desde el hilo de su etapa
+            connection = sqlite3.connect('data/twitter.db', check_same_thread=False)
             print(Fore.GREEN + "Conectado a la base de datos SQLite exitosamente." + Style.RESET_ALL)
             return connection
         except Exception as e:
@@ -53,6 +163,18 @@ class SQLiteDatabase:
                 FOREIGN KEY (usuario_id) REFERENCES usuarios(usuario_id)
             );
             """)
+            # Último tweet visto por usuario para recolecciones incrementales (since_id)
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                usuario_id TEXT PRIMARY KEY,
+                ultimo_tweet_id TEXT
+            );
+            """)
+            self.connection.commit()
+            previous_version = self.run_migrations()
+            if previous_version < ENTITIES_MIGRATION:
+                self.backfill_entities(cursor)
+            self.create_rollups(cursor)
             self.connection.commit()
             print(Fore.GREEN + "Tablas creadas exitosamente en SQLite." + Style.RESET_ALL)
         except Exception as e:
@@ -61,99 +183,148 @@ class SQLiteDatabase:
             self.connection.rollback()
             raise
 
-    def insert_data(self, tweets_data):
+    def run_migrations(self):
+        # Aplica en orden las migraciones pendientes; cada una en su propia transacción
+        cursor = self.connection.cursor()
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            try:
+                cursor.execute("BEGIN;")
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(f"PRAGMA user_version = {number}")
+                self.connection.commit()
+                print(Fore.GREEN + f"Migración {number} del esquema de SQLite aplicada." + Style.RESET_ALL)
+            except Exception:
+                self.connection.rollback()
+                raise
+        return version
+
+    def backfill_entities(self, cursor):
+        # Bases de datos anteriores al índice de entidades: se extraen del contenido guardado,
+        # por bloques para no cargar toda la tabla en memoria
+        reader = self.connection.cursor()
+        reader.execute("SELECT tweet_id, usuario_id, contenido, fecha_hora FROM tweets")
+        total = 0
+        while True:
+            rows = reader.fetchmany(BACKFILL_BATCH_SIZE)
+            if not rows:
+                break
+            self.insert_entities(cursor, [
+                TweetRecord(tweet_id, usuario_id, contenido=contenido, fecha_hora=fecha_hora)
+                for tweet_id, usuario_id, contenido, fecha_hora in rows
+            ])
+            total += len(rows)
+        self.connection.commit()
+        if total:
+            print(Fore.GREEN + f"Índice de hashtags y menciones generado para {total} tweets existentes." + Style.RESET_ALL)
+
+    def create_rollups(self, cursor):
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumen_diario (
+            fecha TEXT PRIMARY KEY,
+            tweets INTEGER,
+            suma_sentimiento REAL,
+            conteo_sentimiento INTEGER
+        );
+        """)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumen_usuario (
+            usuario_id TEXT PRIMARY KEY,
+            tweets INTEGER,
+            suma_sentimiento REAL,
+            conteo_sentimiento INTEGER
+        );
+        """)
+        # El trigger se ejecuta dentro de la transacción del INSERT y sólo para filas
+        # realmente insertadas (INSERT OR IGNORE no lo dispara para duplicados)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tweets_resumen_ai AFTER INSERT ON tweets
+        BEGIN
+            INSERT INTO resumen_diario (fecha, tweets, suma_sentimiento, conteo_sentimiento)
+            SELECT date(NEW.fecha_epoch, 'unixepoch'), 1, COALESCE(NEW.sentimiento, 0), NEW.sentimiento IS NOT NULL
+            WHERE NEW.fecha_epoch IS NOT NULL
+            ON CONFLICT(fecha) DO UPDATE SET
+                tweets = tweets + 1,
+                suma_sentimiento = suma_sentimiento + excluded.suma_sentimiento,
+                conteo_sentimiento = conteo_sentimiento + excluded.conteo_sentimiento;
+            INSERT INTO resumen_usuario (usuario_id, tweets, suma_sentimiento, conteo_sentimiento)
+            SELECT NEW.usuario_id, 1, COALESCE(NEW.sentimiento, 0), NEW.sentimiento IS NOT NULL
+            WHERE NEW.usuario_id IS NOT NULL
+            ON CONFLICT(usuario_id) DO UPDATE SET
+                tweets = tweets + 1,
+                suma_sentimiento = suma_sentimiento + excluded.suma_sentimiento,
+                conteo_sentimiento = conteo_sentimiento + excluded.conteo_sentimiento;
+        END;
+        """)
+        # Bases de datos existentes: poblar los agregados la primera vez
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM resumen_usuario), EXISTS (SELECT 1 FROM tweets)")
+        has_rollups, has_tweets = cursor.fetchone()
+        if has_tweets and not has_rollups:
+            for table, query in ROLLUP_TABLES.items():
+                cursor.execute(f"INSERT INTO {table} {query}")
+
+    def rebuild_rollups(self):
+        # Recalcula los agregados desde cero y devuelve cuántas filas no coincidían
+        try:
+            cursor = self.connection.cursor()
+            differences = 0
+            for table, query in ROLLUP_TABLES.items():
+                cursor.execute(f"SELECT * FROM {table}")
+                current = {row[0]: row[1:] for row in cursor.fetchall()}
+                cursor.execute(query)
+                expected = {row[0]: row[1:] for row in cursor.fetchall()}
+                for key in current.keys() | expected.keys():
+                    old, new = current.get(key), expected.get(key)
+                    if old is None or new is None or old[0] != new[0] or old[2] != new[2] or abs(old[1] - new[1]) > 1e-9:
+                        differences += 1
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(f"INSERT INTO {table} {query}")
+            self.connection.commit()
+            print(Fore.GREEN + f"Agregados reconstruidos en SQLite ({differences} filas diferían de los valores incrementales)." + Style.RESET_ALL)
+            return differences
+        except Exception as e:
+            print(Fore.RED + f"Error al reconstruir los agregados en SQLite: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            self.connection.rollback()
+            raise
+
+    def insert_data(self, tweets_data, checkpoints=False):
         try:
             if not tweets_data:
                 print(Fore.YELLOW + "No hay datos de tweets para insertar en SQLite." + Style.RESET_ALL)
                 return
             cursor = self.connection.cursor()
+            changes = self.connection.total_changes
 
-            for data in tweets_data:
-                if 'tweet' in data and 'user' in data:
-                    # Datos provenientes de la API
-                    tweet = data['tweet']
-                    user = data['user']
-
-                    if not user:
-                        print(Fore.YELLOW + "No se encontró información del usuario para un tweet. Saltando..." + Style.RESET_ALL)
-                        continue  # Saltar si no hay información de usuario
-
-                    # Procesar datos del usuario
-                    seguidores = user.public_metrics.get('followers_count', 0) if hasattr(user, 'public_metrics') and user.public_metrics else 0
-                    verificado = user.verified if hasattr(user, 'verified') and user.verified is not None else False
-                    ubicacion = user.location if hasattr(user, 'location') else None
-                    nombre_usuario = user.username if hasattr(user, 'username') else None
-
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO usuarios (usuario_id, nombre_usuario, seguidores, ubicacion, verificado)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        str(user.id),
-                        nombre_usuario,
-                        seguidores,
-                        ubicacion,
-                        verificado
-                    ))
-
-                    # Análisis de sentimiento
-                    analysis = TextBlob(tweet.text)
-                    sentiment = analysis.sentiment.polarity
-
-                    # Procesar datos del tweet
-                    retweets = tweet.public_metrics.get('retweet_count', 0) if hasattr(tweet, 'public_metrics') and tweet.public_metrics else 0
-                    likes = tweet.public_metrics.get('like_count', 0) if hasattr(tweet, 'public_metrics') and tweet.public_metrics else 0
-
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO tweets (tweet_id, usuario_id, contenido, fecha_hora, retweets, likes, sentimiento)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        str(tweet.id),
-                        str(user.id),
-                        tweet.text,
-                        tweet.created_at.isoformat() if hasattr(tweet, 'created_at') and tweet.created_at else None,
-                        retweets,
-                        likes,
-                        sentiment
-                    ))
-                else:
-                    # Datos provenientes de archivos JSON
-                    tweet_id = data.get('tweet_id')
-                    usuario_id = data.get('usuario_id')
-                    nombre_usuario = data.get('nombre_usuario')
-                    contenido = data.get('contenido')
-                    fecha_hora = data.get('fecha_hora')
-                    retweets = data.get('retweets', 0)
-                    likes = data.get('likes', 0)
-                    seguidores = data.get('seguidores', 0)
-                    ubicacion = data.get('ubicacion')
-                    verificado = data.get('verificado', False)
-                    sentimiento = TextBlob(contenido).sentiment.polarity  # Recalcular sentimiento
-
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO usuarios (usuario_id, nombre_usuario, seguidores, ubicacion, verificado)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        usuario_id,
-                        nombre_usuario,
-                        seguidores,
-                        ubicacion,
-                        verificado
-                    ))
-
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO tweets (tweet_id, usuario_id, contenido, fecha_hora, retweets, likes, sentimiento)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        tweet_id,
-                        usuario_id,
-                        contenido,
-                        fecha_hora,
-                        retweets,
-                        likes,
-                        sentimiento
-                    ))
+            records = TweetRecord.normalize_all(tweets_data)
+            for record in records:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO usuarios (usuario_id, nombre_usuario, seguidores, ubicacion, verificado)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    record.usuario_id,
+                    record.nombre_usuario,
+                    record.seguidores,
+                    record.ubicacion,
+                    record.verificado
+                ))
 
+                cursor.execute(INSERT_TWEET, (
+                    record.tweet_id,
+                    record.usuario_id,
+                    record.contenido,
+                    record.fecha_hora,
+                    record.retweets,
+                    record.likes,
+                    self.get_sentiment(record)
+                ))
+
+            self.insert_entities(cursor, records)
+            if checkpoints:
+                self.update_checkpoints(cursor, records)
             self.connection.commit()
+            self.count_writes(records, changes)
             print(Fore.GREEN + "Datos insertados en SQLite exitosamente." + Style.RESET_ALL)
         except Exception as e:
             print(Fore.RED + f"Error al insertar datos en SQLite: {e}" + Style.RESET_ALL)
@@ -161,7 +332,150 @@ class SQLiteDatabase:
             self.connection.rollback()
             raise
 
+    def bulk_insert_data(self, records, checkpoints=False):
+        try:
+            if not records:
+                print(Fore.YELLOW + "No hay datos de tweets para insertar en SQLite." + Style.RESET_ALL)
+                return
+            start_time = time.perf_counter()
+
+            # Construir las tuplas de antemano; los usuarios se deduplican en memoria
+            usuarios = {}
+            tweets = []
+            records = TweetRecord.normalize_all(records)
+            for record in records:
+                usuario_id = record.usuario_id
+                if usuario_id not in usuarios:
+                    usuarios[usuario_id] = (
+                        usuario_id,
+                        record.nombre_usuario,
+                        record.seguidores,
+                        record.ubicacion,
+                        record.verificado
+                    )
+                tweets.append((
+                    record.tweet_id,
+                    usuario_id,
+                    record.contenido,
+                    record.fecha_hora,
+                    record.retweets,
+                    record.likes,
+                    self.get_sentiment(record)
+                ))
+
+            self.begin_bulk_load()
+            try:
+                cursor = self.connection.cursor()
+                changes = self.connection.total_changes
+                cursor.execute("BEGIN;")
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO usuarios (usuario_id, nombre_usuario, seguidores, ubicacion, verificado)
+                    VALUES (?, ?, ?, ?, ?)
+                """, usuarios.values())
+                cursor.executemany(INSERT_TWEET, tweets)
+                self.insert_entities(cursor, records)
+                if checkpoints:
+                    self.update_checkpoints(cursor, records)
+                self.connection.commit()
+                self.count_writes(records, changes)
+            except Exception:
+                self.connection.rollback()
+                self.end_bulk_load()
+                raise
+
+            elapsed = time.perf_counter() - start_time
+            rate = len(tweets) / elapsed if elapsed > 0 else 0.0
+            print(Fore.GREEN + "Datos insertados en SQLite (carga masiva) exitosamente." + Style.RESET_ALL)
+            print(Fore.CYAN + f"SQLite (carga masiva): {len(tweets)} tweets y {len(usuarios)} usuarios en {elapsed:.2f} s ({rate:.1f} filas/s)" + Style.RESET_ALL)
+        except Exception as e:
+            print(Fore.RED + f"Error en la carga masiva de SQLite: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
+    def count_writes(self, records, changes):
+        # Filas modificadas en la transacción (tweets, entidades, checkpoints y agregados de los triggers)
+        metrics.count('sqlite.tweets', len(records))
+        metrics.count('sqlite.filas_escritas', self.connection.total_changes - changes)
+        metrics.count('sqlite.transacciones')
+
+    def begin_bulk_load(self):
+        # Una sola vez por sesión de carga: se guardan los valores actuales y se aplican los
+        # de carga masiva; los lotes siguientes la reutilizan sin cambiar el modo del diario
+        if self.saved_pragmas is not None:
+            return
+        self.connection.commit()
+        self.saved_pragmas = {name: self.connection.execute(f"PRAGMA {name}").fetchone()[0]
+                              for name in BULK_PRAGMAS}
+        for name, value in BULK_PRAGMAS.items():
+            self.connection.execute(f"PRAGMA {name} = {value}")
+
+    def end_bulk_load(self):
+        if self.saved_pragmas is None:
+            return
+        self.connection.commit()
+        for name, value in self.saved_pragmas.items():
+            self.connection.execute(f"PRAGMA {name} = {value}")
+        self.saved_pragmas = None
+
+    @staticmethod
+    def get_sentiment(record):
+        # Usa el sentimiento precalculado por la etapa de enriquecimiento si existe
+        if record.sentimiento is None:
+            return textblob.TextBlob(record.contenido or '').sentiment.polarity
+        return record.sentimiento
+
+    def insert_entities(self, cursor, records):
+        # Hashtags y menciones ya extraídos en la normalización y tweets referenciados
+        # (aristas del grafo de influencia), con un executemany por tabla y lote
+        hashtags = set()
+        tweet_hashtags = []
+        mentions = []
+        references = []
+        for record in records:
+            if not record.tweet_id:
+                continue
+            for hashtag in record.hashtags:
+                hashtags.add(hashtag)
+                tweet_hashtags.append((record.tweet_id, hashtag, record.fecha_hora))
+            for mention in record.mentions:
+                mentions.append((record.tweet_id, record.usuario_id, mention, record.fecha_hora))
+            for ref_tweet_id in record.referenced_tweets:
+                references.append((record.tweet_id, ref_tweet_id))
+        cursor.executemany(INSERT_HASHTAG, ((hashtag,) for hashtag in hashtags))
+        cursor.executemany(INSERT_TWEET_HASHTAG, tweet_hashtags)
+        cursor.executemany(INSERT_MENTION, mentions)
+        cursor.executemany(INSERT_REFERENCE, references)
+
+    def update_checkpoints(self, cursor, records):
+        # Guarda el tweet_id más reciente por usuario dentro de la misma transacción que los tweets.
+        # Sólo con tweets recién recolectados de la API (--fetch): un archivo antiguo cargado
+        # con --load no debe mover el since_id. Los ids no numéricos no pueden ser since_id.
+        newest = {}
+        for record in records:
+            usuario_id = record.usuario_id
+            tweet_id = record.tweet_id
+            if not usuario_id or not tweet_id or not str(tweet_id).isdigit():
+                continue
+            if usuario_id not in newest or int(tweet_id) > int(newest[usuario_id]):
+                newest[usuario_id] = tweet_id
+        cursor.executemany("""
+            INSERT INTO checkpoints (usuario_id, ultimo_tweet_id) VALUES (?, ?)
+            ON CONFLICT(usuario_id) DO UPDATE SET ultimo_tweet_id = excluded.ultimo_tweet_id
+            WHERE CAST(excluded.ultimo_tweet_id AS INTEGER) > CAST(checkpoints.ultimo_tweet_id AS INTEGER)
+        """, newest.items())
+
+    def get_checkpoints(self):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT usuario_id, ultimo_tweet_id FROM checkpoints")
+            return dict(cursor.fetchall())
+        except Exception as e:
+            print(Fore.RED + f"Error al leer los checkpoints de SQLite: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
+
     def close_connection(self):
         if self.connection:
+            self.end_bulk_load()
             self.connection.close()
             print(Fore.GREEN + "Conexión a SQLite cerrada." + Style.RESET_ALL)
@@ -0,0 +1,122 @@
+# tweet_store.py
+
+from colorama import Fore, Style
+import json
+import os
+import traceback
+
+DEFAULT_STORE_FILE = 'tweets.ndjson'
+DEFAULT_COMPACT_THRESHOLD = 64 * 1024 * 1024  # Bytes a partir de los cuales se compacta
+
+class TweetStore:
+    # Almacén de tweets en JSON delimitado por líneas con un índice lateral de tweet_id.
+    # Las escrituras sólo añaden al final, por lo que cada guardado cuesta O(tweets nuevos).
+    # Una instancia por archivo durante toda la ejecución: el índice se lee una sola vez y
+    # los archivos quedan abiertos en modo de adición hasta close().
+    def __init__(self, filename=DEFAULT_STORE_FILE, directory='data'):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.file_path = os.path.join(directory, filename)
+        self.index_path = self.file_path + '.idx'
+        self.known_ids = None
+        self.data_file = None
+        self.index_file = None
+
+    def load_index(self):
+        if self.known_ids is not None:
+            return self.known_ids
+        if os.path.exists(self.file_path) and not os.path.exists(self.index_path):
+            # Índice ausente: reconstruirlo a partir del archivo de datos
+            self.rebuild_index()
+        self.known_ids = set()
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.known_ids.update(line.strip() for line in f if line.strip())
+        return self.known_ids
+
+    def iter_records(self):
+        if not os.path.exists(self.file_path):
+            return
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def rebuild_index(self):
+        tweet_ids = []
+        seen = set()
+        for record in self.iter_records():
+            tweet_id = record.get('tweet_id')
+            if tweet_id and tweet_id not in seen:
+                seen.add(tweet_id)
+                tweet_ids.append(tweet_id)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{tweet_id}\n" for tweet_id in tweet_ids)
+        self.known_ids = seen
+
+    def append(self, records):
+        # Añade sólo los tweets cuyo tweet_id no se haya guardado antes
+        known_ids = self.load_index()
+        new_records = []
+        for record in records:
+            tweet_id = record.get('tweet_id')
+            if not tweet_id or tweet_id in known_ids:
+                continue
+            known_ids.add(tweet_id)
+            new_records.append(record)
+        if not new_records:
+            return 0
+        # Primero los datos y después el índice: si el proceso se interrumpe entre ambos,
+        # el duplicado resultante se elimina en la siguiente compactación
+        if self.data_file is None:
+            self.data_file = open(self.file_path, 'a', encoding='utf-8')
+            self.index_file = open(self.index_path, 'a', encoding='utf-8')
+        self.data_file.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in new_records)
+        self.data_file.flush()
+        self.index_file.writelines(f"{record['tweet_id']}\n" for record in new_records)
+        self.index_file.flush()
+        return len(new_records)
+
+    def close(self):
+        for f in (self.data_file, self.index_file):
+            if f:
+                f.close()
+        self.data_file = self.index_file = None
+
+    def compact(self, threshold=DEFAULT_COMPACT_THRESHOLD):
+        try:
+            self.close()
+            if not os.path.exists(self.file_path):
+                print(Fore.YELLOW + f"No existe '{self.file_path}'; no hay nada que compactar." + Style.RESET_ALL)
+                return False
+            size = os.path.getsize(self.file_path)
+            if size < threshold:
+                print(Fore.CYAN + f"'{self.file_path}' ocupa {size} bytes, por debajo del umbral de {threshold}; no se compacta." + Style.RESET_ALL)
+                return False
+
+            # Reescribir el archivo sin duplicados en dos pasadas para no cargarlo en memoria;
+            # se conserva la última versión de cada tweet y, tal cual, las líneas sin tweet_id
+            last_line = {}
+            keep = set()
+            for line_number, record in enumerate(self.iter_records()):
+                tweet_id = record.get('tweet_id')
+                if tweet_id:
+                    last_line[tweet_id] = line_number
+                else:
+                    keep.add(line_number)
+            keep.update(last_line.values())
+            tmp_path = self.file_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for line_number, record in enumerate(self.iter_records()):
+                    if line_number in keep:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.file_path)
+            self.rebuild_index()
+            new_size = os.path.getsize(self.file_path)
+            print(Fore.GREEN + f"'{self.file_path}' compactado: {len(keep)} tweets, {size} -> {new_size} bytes." + Style.RESET_ALL)
+            return True
+        except Exception as e:
+            print(Fore.RED + f"Error al compactar el almacén de tweets: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            raise
@@ -1,18 +1,32 @@
 # twitter_api.py
 
-import tweepy
-from tweepy.errors import TooManyRequests, Forbidden, TweepyException
-from utils import Utils
+from utils import Utils, lazy_import
 from colorama import Fore, Style
 import os
 from dotenv import load_dotenv
 import traceback
-import time
+from concurrent.futures import ThreadPoolExecutor
+from http_client import HTTPClient, RateLimitBudget
+
+tweepy = lazy_import('tweepy')
+
+DEFAULT_API_BASE_URL = "https://api.twitter.com"
+USERS_LOOKUP_BATCH = 100  # Máximo de nombres por llamada a /2/users/by
+MAX_RESULTS_PER_PAGE = 100
+DEFAULT_MAX_PAGES = 5
+DEFAULT_FETCH_WORKERS = 4
+TWEET_FIELDS = 'created_at,text,public_metrics,lang,referenced_tweets'
+USER_FIELDS = 'username,public_metrics,verified,location'
 
 class TwitterAPI:
-    def __init__(self):
+    def __init__(self, base_url=None):
         self.utils = Utils()
         self.client, self.api_v1 = self.authenticate()
+        self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
+        self.base_url = (base_url or os.getenv('TWITTER_API_BASE_URL') or DEFAULT_API_BASE_URL).rstrip('/')
+        # Sesión compartida con presupuesto de tasa, reintentos y circuit breaker
+        self.http = HTTPClient('Twitter', headers={"Authorization": f"Bearer {self.bearer_token}"},
+                               rate_limits=RateLimitBudget())
 
     def authenticate(self):
         try:
@@ -51,62 +65,96 @@ class TwitterAPI:
             traceback.print_exc()
             raise
 
-    def get_users_tweets(self, usernames):
-        tweets_data = []
-        for username in usernames:
-            while True:
-                try:
-                    print(Fore.BLUE + f"Obteniendo tweets del usuario @{username}..." + Style.RESET_ALL)
-                    # Obtener el ID del usuario
-                    user_response = self.client.get_user(username=username)
-                    if not user_response.data:
-                        print(Fore.RED + f"No se encontró al usuario @{username}." + Style.RESET_ALL)
-                        break
-                    user_id = user_response.data.id
-
-                    # Obtener los tweets del usuario
-                    response = self.client.get_users_tweets(
-                        id=user_id,
-                        max_results=5,
-                        tweet_fields=['created_at', 'text', 'public_metrics', 'lang'],
-                        user_fields=['username', 'public_metrics', 'verified', 'location']
-                    )
-
-                    if response.errors:
-                        print(Fore.RED + f"Errores al obtener tweets del usuario @{username}: {response.errors}" + Style.RESET_ALL)
-                        break
-
-                    tweets = response.data if response.data else []
-
-                    for tweet in tweets:
-                        tweets_data.append({
-                            'tweet': tweet,
-                            'user': user_response.data  # Información del usuario
-                        })
-
-                    print(Fore.GREEN + f"Se obtuvieron {len(tweets)} tweets del usuario @{username}." + Style.RESET_ALL)
-                    break  # Salir del bucle while si se obtuvo la información correctamente
-                except Forbidden as e:
-                    print(Fore.RED + f"No tienes acceso para obtener los tweets del usuario @{username}. Verifica si el usuario es privado o si tienes los permisos necesarios." + Style.RESET_ALL)
-                    traceback.print_exc()
-                    break
-                except TooManyRequests as e:
-                    print(Fore.RED + f"Se ha excedido el límite de tasa para el usuario @{username}. Debes esperar antes de volver a intentarlo." + Style.RESET_ALL)
-                    # Esperar hasta que se restablezca el límite
-                    reset_time = int(e.response.headers.get('x-rate-limit-reset', time.time() + 900))
-                    wait_time = max(reset_time - int(time.time()), 0)
-                    print(Fore.YELLOW + f"Esperando {wait_time + 5} segundos antes de continuar..." + Style.RESET_ALL)
-                    time.sleep(wait_time + 5)  # Agregar 5 segundos adicionales por seguridad
-                except TweepyException as e:
-                    print(Fore.RED + f"Error de Tweepy al obtener tweets del usuario @{username}: {e}" + Style.RESET_ALL)
-                    traceback.print_exc()
-                    break
-                except Exception as e:
-                    print(Fore.RED + f"Error inesperado al obtener tweets del usuario @{username}: {e}" + Style.RESET_ALL)
-                    traceback.print_exc()
+    def request(self, endpoint, path, params):
+        # Los 429 y errores transitorios se reintentan en HTTPClient según las cabeceras de límite
+        response = self.http.request('GET', self.base_url + path, endpoint=endpoint, params=params)
+        if response.status_code == 429:
+            print(Fore.RED + f"Se ha excedido el límite de tasa en {endpoint}." + Style.RESET_ALL)
+        if response.status_code == 403:
+            raise tweepy.errors.Forbidden(response)
+        response.raise_for_status()
+        return response.json()
+
+    def lookup_users(self, usernames):
+        # Resuelve los nombres de usuario en lotes con el endpoint de búsqueda múltiple
+        users = []
+        for start in range(0, len(usernames), USERS_LOOKUP_BATCH):
+            batch = usernames[start:start + USERS_LOOKUP_BATCH]
+            payload = self.request('users/by', '/2/users/by', {
+                'usernames': ','.join(batch),
+                'user.fields': USER_FIELDS
+            })
+            for error in payload.get('errors', []):
+                print(Fore.RED + f"No se encontró al usuario @{error.get('value')}: {error.get('detail')}" + Style.RESET_ALL)
+            users.extend(tweepy.User(data) for data in payload.get('data', []))
+        return users
+
+    def iter_user_pages(self, user, max_pages, since_id=None):
+        # Produce una lista de tweets por página siguiendo next_token hasta max_pages páginas
+        params = {
+            'max_results': MAX_RESULTS_PER_PAGE,
+            'tweet.fields': TWEET_FIELDS
+        }
+        if since_id:
+            # Sólo los tweets posteriores al último guardado
+            params['since_id'] = since_id
+        total = 0
+        try:
+            if since_id:
+                print(Fore.BLUE + f"Obteniendo tweets nuevos del usuario @{user.username} desde {since_id}..." + Style.RESET_ALL)
+            else:
+                print(Fore.BLUE + f"Obteniendo tweets del usuario @{user.username}..." + Style.RESET_ALL)
+            for _ in range(max_pages):
+                payload = self.request('users/tweets', f'/2/users/{user.id}/tweets', params)
+                page = [{
+                    'tweet': tweepy.Tweet(data),
+                    'user': user  # Información del usuario
+                } for data in payload.get('data', [])]
+                total += len(page)
+                if page:
+                    yield page
+                next_token = payload.get('meta', {}).get('next_token')
+                if not next_token:
                     break
+                params['pagination_token'] = next_token
+            print(Fore.GREEN + f"Se obtuvieron {total} tweets del usuario @{user.username}." + Style.RESET_ALL)
+        except tweepy.errors.Forbidden:
+            print(Fore.RED + f"No tienes acceso para obtener los tweets del usuario @{user.username}. Verifica si el usuario es privado o si tienes los permisos necesarios." + Style.RESET_ALL)
+        except Exception as e:
+            print(Fore.RED + f"Error inesperado al obtener tweets del usuario @{user.username}: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+
+    def fetch_user_tweets(self, user, max_pages, since_id=None):
+        tweets_data = []
+        for page in self.iter_user_pages(user, max_pages, since_id):
+            tweets_data.extend(page)
+        return tweets_data
+
+    def safe_lookup_users(self, usernames):
+        try:
+            return self.lookup_users(usernames)
+        except Exception as e:
+            print(Fore.RED + f"Error al buscar los usuarios {', '.join('@' + u for u in usernames)}: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            return []
+
+    def get_users_tweets(self, usernames, max_pages=DEFAULT_MAX_PAGES, workers=DEFAULT_FETCH_WORKERS, since_ids=None):
+        # since_ids: {usuario_id: último tweet_id guardado} para recolectar sólo la diferencia
+        since_ids = since_ids or {}
+        tweets_data = []
+        users = self.safe_lookup_users(usernames)
+        # Varios usuarios en paralelo; map conserva el orden de los usuarios
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for user_tweets in executor.map(lambda user: self.fetch_user_tweets(user, max_pages, since_ids.get(str(user.id))), users):
+                tweets_data.extend(user_tweets)
         return tweets_data
 
+    def user_page_sources(self, usernames, max_pages=DEFAULT_MAX_PAGES, since_ids=None):
+        # Variante en flujo (modo --async): un iterador de páginas por usuario, que el pipeline
+        # recorre en paralelo y entrega cada página en cuanto se descarga
+        since_ids = since_ids or {}
+        return [self.iter_user_pages(user, max_pages, since_ids.get(str(user.id)))
+                for user in self.safe_lookup_users(usernames)]
+
     def close_connection(self):
-        # No es necesario cerrar conexiones explícitamente
-        pass
+        self.http.close()
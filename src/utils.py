@@ -1,9 +1,40 @@
 # utils.py
 
 from colorama import Fore, Style, init
+from records import TweetRecord
+import importlib.util
 import json
-import os
+import sys
 import traceback
+import types
+
+READ_CHUNK_SIZE = 1 << 16  # Caracteres leídos por iteración al transmitir archivos JSON
+
+class MissingModule(types.ModuleType):
+    # Marcador de una dependencia opcional no instalada: el error aparece al usarla, no al
+    # importar el módulo que la declara, de modo que los modos que no la necesitan funcionan
+    def __getattr__(self, attribute):
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        raise ModuleNotFoundError(f"No se encontró el módulo '{self.__name__}'", name=self.__name__)
+
+def lazy_import(name):
+    # Devuelve el módulo sin ejecutarlo; se carga al acceder por primera vez a un atributo.
+    # Así los modos que no usan un backend no pagan su tiempo de importación.
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        spec = None
+    if spec is None:
+        return MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
 
 class Utils:
     def __init__(self):
@@ -11,7 +42,7 @@ class Utils:
 
     def get_usernames(self):
         try:
-            usernames_input = input(Fore.BLUE + "Ingrese los nombres de usuario de Twitter separados por comas (máximo 1 usuario): " + Style.RESET_ALL)
+            usernames_input = input(Fore.BLUE + "Ingrese los nombres de usuario de Twitter separados por comas: " + Style.RESET_ALL)
             usernames_list = [uname.strip().lstrip('@') for uname in usernames_input.split(',') if uname.strip()]
             if not usernames_list:
                 print(Fore.RED + "Debe ingresar al menos un nombre de usuario." + Style.RESET_ALL)
@@ -21,88 +52,93 @@ class Utils:
             print(Fore.RED + f"Error al obtener nombres de usuario: {e}" + Style.RESET_ALL)
             exit()
 
-    def save_tweets_to_file(self, tweets_data, filename):
-        try:
-            # Crear directorio 'data' si no existe
-            if not os.path.exists('data'):
-                os.makedirs('data')
+    def normalize_tweet(self, data):
+        # Convierte un registro de la API (tweet + usuario) o un diccionario
+        # proveniente de archivos JSON al mismo registro compacto
+        return TweetRecord.from_data(data)
 
-            existing_tweets = []
-            file_path = os.path.join('data', filename)
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    existing_tweets = json.load(f)
-                    if not isinstance(existing_tweets, list):
-                        existing_tweets = []
-                        print(Fore.YELLOW + f"El archivo '{filename}' no es una lista válida. Se creará una nueva lista." + Style.RESET_ALL)
+    def chunked(self, iterable, size):
+        # Agrupa cualquier iterable en listas de tamaño fijo
+        chunk = []
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
 
-            # Procesar nuevos tweets
-            for data in tweets_data:
-                if 'tweet' in data and 'user' in data:
-                    # Datos provenientes de la API
-                    tweet = data['tweet']
-                    user = data['user']
+    def iter_tweets_from_file(self, file_path):
+        # Produce los tweets uno a uno sin cargar el archivo completo en memoria.
+        # Acepta un arreglo JSON de nivel superior o JSON delimitado por líneas (NDJSON).
+        with open(file_path, 'r', encoding='utf-8') as f:
+            first_char = ''
+            while True:
+                first_char = f.read(1)
+                if not first_char or not first_char.isspace():
+                    break
+            if not first_char:
+                return
+            if first_char == '[':
+                yield from self._iter_json_array(f)
+            else:
+                first_line = first_char + f.readline()
+                for line in self._chain_lines(first_line, f):
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
 
-                    # Verificar si 'public_metrics' existe y no es None para el usuario
-                    if hasattr(user, 'public_metrics') and user.public_metrics:
-                        seguidores = user.public_metrics.get('followers_count', 0)
-                    else:
-                        seguidores = 0
-                        print(Fore.YELLOW + f"No se encontraron 'public_metrics' para el usuario @{user.username}. Asignando 0 seguidores." + Style.RESET_ALL)
+    @staticmethod
+    def _chain_lines(first_line, f):
+        yield first_line
+        yield from f
 
-                    # Verificar si 'public_metrics' existe y no es None para el tweet
-                    if hasattr(tweet, 'public_metrics') and tweet.public_metrics:
-                        retweets = tweet.public_metrics.get('retweet_count', 0)
-                        likes = tweet.public_metrics.get('like_count', 0)
-                    else:
-                        retweets = 0
-                        likes = 0
-                        print(Fore.YELLOW + f"No se encontraron 'public_metrics' para el tweet ID {tweet.id}. Asignando 0 retweets y 0 likes." + Style.RESET_ALL)
+    @staticmethod
+    def _iter_json_array(f):
+        decoder = json.JSONDecoder()
+        buffer = ''
+        pos = 0
+        eof = False
+        while True:
+            # Saltar separadores entre elementos
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','):
+                pos += 1
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError("Fin de archivo inesperado: el arreglo JSON no está cerrado")
+                buffer, pos = buffer[pos:], 0
+                chunk = f.read(READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer += chunk
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Elemento incompleto: leer más datos y reintentar
+                buffer, pos = buffer[pos:], 0
+                chunk = f.read(READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield obj
+            pos = end
 
-                    existing_tweets.append({
-                        'tweet_id': str(tweet.id),
-                        'usuario_id': str(user.id),
-                        'nombre_usuario': user.username if hasattr(user, 'username') else None,
-                        'contenido': tweet.text,
-                        'fecha_hora': tweet.created_at.isoformat() if hasattr(tweet, 'created_at') and tweet.created_at else None,
-                        'retweets': retweets,
-                        'likes': likes,
-                        'seguidores': seguidores,
-                        'ubicacion': user.location if hasattr(user, 'location') else None,
-                        'verificado': user.verified if hasattr(user, 'verified') else False,
-                        'lang': tweet.lang if hasattr(tweet, 'lang') else None
-                    })
-                else:
-                    # Datos provenientes de archivos JSON
-                    tweet_id = data.get('tweet_id')
-                    usuario_id = data.get('usuario_id')
-                    nombre_usuario = data.get('nombre_usuario')
-                    contenido = data.get('contenido')
-                    fecha_hora = data.get('fecha_hora')
-                    retweets = data.get('retweets', 0)
-                    likes = data.get('likes', 0)
-                    seguidores = data.get('seguidores', 0)
-                    ubicacion = data.get('ubicacion')
-                    verificado = data.get('verificado', False)
-                    lang = data.get('lang')
+    def iter_tweet_batches(self, file_path, batch_size):
+        return self.chunked(self.iter_tweets_from_file(file_path), batch_size)
 
-                    existing_tweets.append({
-                        'tweet_id': tweet_id,
-                        'usuario_id': usuario_id,
-                        'nombre_usuario': nombre_usuario,
-                        'contenido': contenido,
-                        'fecha_hora': fecha_hora,
-                        'retweets': retweets,
-                        'likes': likes,
-                        'seguidores': seguidores,
-                        'ubicacion': ubicacion,
-                        'verificado': verificado,
-                        'lang': lang
-                    })
+    def save_tweets_to_file(self, tweets_data, store):
+        try:
+            # El sentimiento se guarda en su propia caché, no en el almacén de tweets
+            records = [record.to_dict() for record in TweetRecord.normalize_all(tweets_data)]
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(existing_tweets, f, ensure_ascii=False, indent=4)
-            print(Fore.GREEN + f"Tweets guardados en 'data/{filename}' exitosamente." + Style.RESET_ALL)
+            # Sólo se añaden al final los tweets nuevos; el archivo existente no se reescribe.
+            # 'store' es el TweetStore de toda la ejecución, con el índice ya en memoria
+            added = store.append(records)
+            print(Fore.GREEN + f"{added} tweets nuevos guardados en '{store.file_path}' ({len(records) - added} ya existentes)." + Style.RESET_ALL)
         except Exception as e:
             print(Fore.RED + f"Error al guardar tweets en archivo: {e}" + Style.RESET_ALL)
             traceback.print_exc()
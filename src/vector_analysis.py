@@ -0,0 +1,121 @@
+# vector_analysis.py
+
+import numpy as np
+import time
+import traceback
+from colorama import Fore, Style
+
+# Una sola lectura de las columnas necesarias; el resto se calcula sobre arreglos
+COLUMNS_QUERY = """
+SELECT t.fecha_epoch, t.sentimiento, t.likes, t.retweets, u.seguidores
+FROM tweets t LEFT JOIN usuarios u ON u.usuario_id = t.usuario_id
+"""
+COLUMNS_DTYPE = [
+    ('fecha_epoch', 'f8'),
+    ('sentimiento', 'f8'),
+    ('likes', 'f8'),
+    ('retweets', 'f8'),
+    ('seguidores', 'f8')
+]
+PERCENTILES = [10, 25, 50, 75, 90]
+ROLLING_WINDOW = 7  # Días de la media móvil
+WEEKDAYS = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
+EPOCH_WEEKDAY = 3  # El 1970-01-01 fue jueves (lunes = 0)
+
+def rolling_mean(values, window):
+    # Media móvil con sumas acumuladas; las primeras posiciones usan la ventana disponible
+    sums = np.cumsum(np.insert(values, 0, 0.0))
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    starts = np.arange(1, len(values) + 1) - counts
+    return (sums[1:] - sums[starts]) / counts
+
+class VectorAnalyzer:
+    # Estadísticas ampliadas del corpus calculadas con NumPy sobre columnas leídas de SQLite
+    def __init__(self, sqlite_db):
+        self.sqlite_db = sqlite_db
+        self.columns = None
+        self.load_time = 0.0
+        self.compute_time = 0.0
+
+    def load_columns(self):
+        cursor = self.sqlite_db.connection.cursor()
+        count = cursor.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+        start_time = time.perf_counter()
+        # fromiter consume el cursor directamente; los NULL se convierten en NaN
+        self.columns = np.fromiter(cursor.execute(COLUMNS_QUERY), dtype=COLUMNS_DTYPE, count=count)
+        self.load_time = time.perf_counter() - start_time
+        return self.columns
+
+    def compute(self):
+        columns = self.columns if self.columns is not None else self.load_columns()
+        start_time = time.perf_counter()
+        stats = {'tweets': len(columns)}
+
+        sentiment = columns['sentimiento']
+        sentiment = sentiment[~np.isnan(sentiment)]
+        stats['sentiment_percentiles'] = (
+            dict(zip(PERCENTILES, np.percentile(sentiment, PERCENTILES))) if len(sentiment) else {}
+        )
+
+        # Tasa de interacción: (likes + retweets) por seguidor, sólo usuarios con seguidores
+        followers = columns['seguidores']
+        with_followers = followers > 0
+        interactions = np.nan_to_num(columns['likes']) + np.nan_to_num(columns['retweets'])
+        engagement = interactions[with_followers] / followers[with_followers]
+        stats['engagement_mean'] = float(engagement.mean()) if len(engagement) else None
+        stats['engagement_median'] = float(np.median(engagement)) if len(engagement) else None
+
+        epochs = columns['fecha_epoch']
+        dated = ~np.isnan(epochs)
+        epochs = epochs[dated].astype(np.int64)
+        dated_sentiment = columns['sentimiento'][dated]
+        has_sentiment = ~np.isnan(dated_sentiment)
+        if len(epochs):
+            # Mapa de calor día de la semana x hora (UTC) con un solo bincount
+            days = epochs // 86400
+            hours = (epochs // 3600) % 24
+            weekdays = (days + EPOCH_WEEKDAY) % 7
+            stats['heatmap'] = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+
+            # Serie diaria continua (incluye días sin tweets) y sus medias móviles
+            day_index = days - days.min()
+            n_days = int(day_index.max()) + 1
+            daily_counts = np.bincount(day_index, minlength=n_days).astype(float)
+            daily_sentiment = np.bincount(day_index, weights=np.nan_to_num(dated_sentiment), minlength=n_days)
+            daily_scored = np.bincount(day_index, weights=has_sentiment, minlength=n_days)
+            stats['first_day'] = int(days.min())
+            stats['daily_counts'] = daily_counts
+            stats['rolling_counts'] = rolling_mean(daily_counts, ROLLING_WINDOW)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                stats['rolling_sentiment'] = (rolling_mean(daily_sentiment, ROLLING_WINDOW)
+                                              / rolling_mean(daily_scored, ROLLING_WINDOW))
+        self.compute_time = time.perf_counter() - start_time
+        return stats
+
+    def report(self):
+        try:
+            stats = self.compute()
+            if not stats['tweets']:
+                print(Fore.YELLOW + "No hay tweets para calcular estadísticas ampliadas." + Style.RESET_ALL)
+                return stats
+            print(Fore.CYAN + f"Estadísticas ampliadas ({stats['tweets']} tweets; lectura {self.load_time:.2f} s, "
+                  f"cálculo {self.compute_time:.2f} s):" + Style.RESET_ALL)
+            if stats['sentiment_percentiles']:
+                percentiles = ', '.join(f"p{p}={value:.2f}" for p, value in stats['sentiment_percentiles'].items())
+                print(f"- Percentiles de sentimiento: {percentiles}")
+            if stats['engagement_mean'] is not None:
+                print(f"- Interacción por seguidor: media {stats['engagement_mean']:.4f}, mediana {stats['engagement_median']:.4f}")
+            if 'heatmap' in stats:
+                print("- Tweets por día de la semana y hora (UTC):")
+                print("       " + ''.join(f"{hour:>5}" for hour in range(24)))
+                for weekday, row in zip(WEEKDAYS, stats['heatmap']):
+                    print(f"  {weekday:<4} " + ''.join(f"{count:>5}" for count in row))
+                last = len(stats['daily_counts']) - 1
+                last_day = np.datetime64(stats['first_day'] + last, 'D')
+                print(f"- Media móvil de {ROLLING_WINDOW} días al {last_day}: "
+                      f"{stats['rolling_counts'][last]:.1f} tweets/día, sentimiento {stats['rolling_sentiment'][last]:.2f}")
+            return stats
+        except Exception as e:
+            print(Fore.RED + f"Error en las estadísticas ampliadas: {e}" + Style.RESET_ALL)
+            traceback.print_exc()
+            return None